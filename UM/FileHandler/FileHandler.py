@@ -92,6 +92,23 @@ class FileHandler(QObject):
     def _readLocalFile(self, file):
         raise NotImplementedError("_readLocalFile needs to be implemented by subclasses")
 
+    ##  Read a number of local files, like the files that were selected at
+    #   once in a file dialog.
+    #
+    #   \param files A list of QUrls of the files to read.
+    @pyqtSlot("QVariantList")
+    def readLocalFiles(self, files):
+        files = [file for file in files if file.isValid()]
+        if files:
+            self._readLocalFiles(files)
+
+    ##  Read a number of local files. By default, they are read one by one.
+    #
+    #   \param files A list of valid QUrls.
+    def _readLocalFiles(self, files):
+        for file in files:
+            self._readLocalFile(file)
+
     ##  Get list of all supported filetypes for writing.
     #   \return List of dicts containing id, extension, description and mime_type for all supported file types.
     def getSupportedFileTypesWrite(self):
@@ -63,7 +63,7 @@ class ReadFileJob(Job):
 
         try:
             begin_time = time.time()
-            self.setResult(self._handler.readerRead(reader, self._filename))
+            self.setResult(self._read(reader))
             end_time = time.time()
             Logger.log("d", "Loading file took %0.1f seconds", end_time - begin_time)
         except:
@@ -75,3 +75,21 @@ class ReadFileJob(Job):
                 result_message.show()
                 return
             self._loading_message.hide()
+
+    ##  Read the file with the file handler.
+    #
+    #   The progress of this read is reported to this job only, even if the
+    #   same reader is reading other files at the same time.
+    #
+    #   \param reader The reader to read the file with.
+    #   \return The result of reading the file.
+    def _read(self, reader):
+        return self._handler.readerRead(reader, self._filename, progress_callback = self._onReaderProgress)
+
+    ##  Forward the progress reported by the reader to the loading message.
+    #
+    #   \param amount \type{int} The amount of progress made, from 0 to 100.
+    def _onReaderProgress(self, amount):
+        if self._loading_message:
+            self._loading_message.setProgress(amount)
+        self.progress.emit(self, amount)
@@ -0,0 +1,115 @@
+# Copyright (c) 2018 Ultimaker B.V.
+# Uranium is released under the terms of the LGPLv3 or higher.
+
+from typing import Iterable, Tuple
+
+import numpy
+
+from UM.Math.AxisAlignedBox import AxisAlignedBox
+from UM.Math.Ray import Ray
+from UM.Math.Vector import Vector
+from UM.Math.VectorArray import VectorArray, _wrapArray as _wrapVectorArray
+
+
+##  An immutable array of axis aligned boxes.
+#
+#   This is the bulk companion of AxisAlignedBox. The boxes are stored in a
+#   single N x 6 numpy array, with the minimum X, Y and Z followed by the
+#   maximum X, Y and Z of each box, so a ray can be intersected with all of
+#   them in a single numpy operation.
+class AxisAlignedBoxArray:
+    ##  Creates an array of boxes.
+    #
+    #   \param data An N x 6 array-like with the minimum and maximum of each
+    #   box. If it is a read-only numpy array of 64-bit floats, it is used as
+    #   it is, without copying.
+    def __init__(self, data = None):
+        if data is None:
+            data = numpy.zeros((0, 6), dtype = numpy.float64)
+        data = numpy.asarray(data, dtype = numpy.float64).reshape((-1, 6))
+        if data.flags.writeable:
+            data = data.copy()
+            data.flags.writeable = False
+        self._data = data
+
+    ##  Create an array from a sequence of boxes.
+    #
+    #   \param boxes An iterable of AxisAlignedBox objects.
+    @staticmethod
+    def fromBoxes(boxes: Iterable[AxisAlignedBox]) -> "AxisAlignedBoxArray":
+        data = numpy.array([numpy.concatenate((box._min._data, box._max._data)) for box in boxes], dtype = numpy.float64).reshape((-1, 6))
+        return _wrapArray(data)
+
+    ##  Get the numpy array with the data.
+    #
+    #   This is not a copy. The array is read-only.
+    #
+    #   \return An N x 6 array of 64-bit floats.
+    def getData(self) -> numpy.ndarray:
+        return self._data
+
+    ##  Get a box from this array.
+    def getBox(self, index: int) -> AxisAlignedBox:
+        return AxisAlignedBox(minimum = Vector(data = self._data[index, 0:3]), maximum = Vector(data = self._data[index, 3:6]))
+
+    def __len__(self):
+        return len(self._data)
+
+    ##  Get a box, or an AxisAlignedBoxArray for a slice or an array of
+    #   indices.
+    def __getitem__(self, index):
+        if isinstance(index, (int, numpy.integer)):
+            return self.getBox(index)
+        return _wrapArray(self._data[index])
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if type(other) is not AxisAlignedBoxArray:
+            return False
+        return numpy.array_equal(self._data, other._data)
+
+    def __repr__(self):
+        return "AxisAlignedBoxArray({0})".format(self._data.tolist())
+
+    ##  Get the minimum corners of all boxes.
+    def getMinimum(self) -> VectorArray:
+        return _wrapVectorArray(self._data[:, 0:3].copy())
+
+    ##  Get the maximum corners of all boxes.
+    def getMaximum(self) -> VectorArray:
+        return _wrapVectorArray(self._data[:, 3:6].copy())
+
+    ##  Intersect all boxes with a ray, with the slab test of
+    #   AxisAlignedBox.intersectsRay.
+    #
+    #   \param ray \type{Ray}
+    #   \return A tuple of an array with the indices of the boxes that are hit,
+    #   sorted by the distance along the ray where the ray enters them, and an
+    #   M x 2 array with for each of them the distances where the ray enters
+    #   and leaves the box.
+    def intersectsRay(self, ray: Ray) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        origin = numpy.tile(ray.origin._data, 2)
+        inverse_direction = numpy.tile(ray.inverseDirection._data, 2)
+
+        with numpy.errstate(invalid = "ignore"):  # Rays parallel to a side of a box give NaN, which is never a hit.
+            distances = (self._data - origin) * inverse_direction
+            near = numpy.minimum(distances[:, 0:3], distances[:, 3:6])
+            far = numpy.maximum(distances[:, 0:3], distances[:, 3:6])
+            # Reducing the three columns one by one is much faster than min() and max() over such a short axis.
+            largest_min = numpy.maximum(numpy.maximum(near[:, 0], near[:, 1]), near[:, 2])
+            smallest_max = numpy.minimum(numpy.minimum(far[:, 0], far[:, 1]), far[:, 2])
+            hits = numpy.flatnonzero(smallest_max > largest_min)
+
+        hits = hits[numpy.argsort(largest_min[hits], kind = "stable")]
+        return hits, numpy.stack((largest_min[hits], smallest_max[hits]), axis = 1)
+
+
+##  Create an AxisAlignedBoxArray that uses a new array without copying it.
+#
+#   The array is made read-only, so it must not be used for anything else.
+def _wrapArray(data: numpy.ndarray) -> AxisAlignedBoxArray:
+    data.flags.writeable = False
+    array = AxisAlignedBoxArray.__new__(AxisAlignedBoxArray)
+    array._data = data
+    return array
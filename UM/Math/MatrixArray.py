@@ -0,0 +1,186 @@
+# Copyright (c) 2018 Ultimaker B.V.
+# Uranium is released under the terms of the LGPLv3 or higher.
+
+from typing import Iterable, Union
+
+import numpy
+
+from UM.Math.Matrix import Matrix
+from UM.Math.Vector import Vector
+from UM.Math.VectorArray import VectorArray, _wrapArray as _wrapVectorArray
+
+
+##  An immutable array of 4x4 transformation matrices.
+#
+#   This is the bulk companion of Matrix. All matrices are stored in a single
+#   N x 4 x 4 numpy array, so multiplying, inverting or decomposing all of
+#   them is a single numpy operation.
+class MatrixArray:
+    ##  Creates an array of matrices.
+    #
+    #   \param data An N x 4 x 4 array-like of matrices. If it is a read-only
+    #   numpy array of 64-bit floats, it is used as it is, without copying.
+    def __init__(self, data = None):
+        if data is None:
+            data = numpy.zeros((0, 4, 4), dtype = numpy.float64)
+        data = numpy.asarray(data, dtype = numpy.float64).reshape((-1, 4, 4))
+        if data.flags.writeable:
+            data = data.copy()
+            data.flags.writeable = False
+        self._data = data
+
+    ##  Create an array from a sequence of matrices.
+    #
+    #   \param matrices An iterable of Matrix objects.
+    @staticmethod
+    def fromMatrices(matrices: Iterable[Matrix]) -> "MatrixArray":
+        return _wrapArray(numpy.array([matrix._data for matrix in matrices], dtype = numpy.float64).reshape((-1, 4, 4)))
+
+    ##  Get the numpy array with the data.
+    #
+    #   Unlike Matrix.getData, this is not a copy, and it has 64-bit floats.
+    #   The array is read-only.
+    #
+    #   \return An N x 4 x 4 array.
+    def getData(self) -> numpy.ndarray:
+        return self._data
+
+    ##  Get a matrix from this array.
+    #
+    #   Matrices can be changed, so this copies the 16 values of the matrix.
+    def getMatrix(self, index: int) -> Matrix:
+        return Matrix(self._data[index])
+
+    ##  Get all matrices of this array.
+    def toMatrices(self):
+        return [Matrix(data) for data in self._data]
+
+    def __len__(self):
+        return len(self._data)
+
+    def __iter__(self):
+        return iter(self.toMatrices())
+
+    ##  Get a matrix, or a MatrixArray for a slice or an array of indices.
+    def __getitem__(self, index):
+        if isinstance(index, (int, numpy.integer)):
+            return self.getMatrix(index)
+        return _wrapArray(self._data[index])
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if type(other) is not MatrixArray:
+            return False
+        return numpy.array_equal(self._data, other._data)
+
+    def __repr__(self):
+        return "MatrixArray({0})".format(self._data.tolist())
+
+    ##  Multiply all matrices by a matrix, or by the matrices of another array.
+    #
+    #   Like Matrix.multiply, the other matrix is on the right.
+    def multiply(self, other: Union[Matrix, "MatrixArray"]) -> "MatrixArray":
+        return _wrapArray(numpy.matmul(self._data, other._data))
+
+    ##  Multiply a matrix, or the matrices of another array, by all matrices.
+    #
+    #   Like Matrix.preMultiply, the other matrix is on the left.
+    def preMultiply(self, other: Union[Matrix, "MatrixArray"]) -> "MatrixArray":
+        return _wrapArray(numpy.matmul(other._data, self._data))
+
+    ##  Get the inverses of all matrices.
+    #
+    #   Like Matrix.getInverse, matrices that can't be inverted are returned
+    #   as they are.
+    def getInverse(self) -> "MatrixArray":
+        try:
+            return _wrapArray(numpy.linalg.inv(self._data))
+        except numpy.linalg.LinAlgError:  # At least one is singular. Invert the others one by one.
+            result = self._data.copy()
+            for index, data in enumerate(self._data):
+                try:
+                    result[index] = numpy.linalg.inv(data)
+                except numpy.linalg.LinAlgError:
+                    pass
+            return _wrapArray(result)
+
+    def getTransposed(self) -> "MatrixArray":
+        return _wrapArray(self._data.transpose((0, 2, 1)).copy())
+
+    ##  Get the translations of all matrices.
+    def getTranslations(self) -> VectorArray:
+        return _wrapVectorArray(self._data[:, 0:3, 3].copy())
+
+    ##  Transform points by the matrices.
+    #
+    #   Like Vector.preMultiply, the points are multiplied as column vectors
+    #   and the projective part of the result is dropped.
+    #
+    #   \param points A Vector to transform by every matrix, or a VectorArray
+    #   with a point for each matrix.
+    #   \return A VectorArray with the transformed points.
+    def transformPoints(self, points: Union[Vector, VectorArray]) -> VectorArray:
+        data = numpy.broadcast_to(points._data, (len(self._data), 3))
+        return _wrapVectorArray(numpy.einsum("nij,nj->ni", self._data[:, 0:3, 0:3], data) + self._data[:, 0:3, 3])
+
+    ##  Decompose all matrices, like Matrix.decompose.
+    #
+    #   \return A tuple of VectorArrays with the scale, shear, angles,
+    #   translation and mirror of each matrix.
+    #   It will raise a ValueError if any of the matrices is degenerate.
+    def decompose(self):
+        M = self._data.transpose((0, 2, 1)).copy()
+        if numpy.any(numpy.abs(M[:, 3, 3]) < Matrix._EPS):
+            raise ValueError("M[3, 3] is zero")
+        M /= M[:, 3, 3][:, numpy.newaxis, numpy.newaxis]
+        P = M.copy()
+        P[:, :, 3] = 0.0, 0.0, 0.0, 1.0
+        if not numpy.all(numpy.linalg.det(P)):
+            raise ValueError("matrix is singular")
+
+        count = len(M)
+        scale = numpy.zeros((count, 3))
+        shear = numpy.zeros((count, 3))
+        angles = numpy.zeros((count, 3))
+        translate = M[:, 3, 0:3].copy()
+
+        row = M[:, 0:3, 0:3].copy()
+        scale[:, 0] = numpy.sqrt(numpy.einsum("ij,ij->i", row[:, 0], row[:, 0]))
+        row[:, 0] /= scale[:, 0, numpy.newaxis]
+        shear[:, 0] = numpy.einsum("ij,ij->i", row[:, 0], row[:, 1])
+        row[:, 1] -= row[:, 0] * shear[:, 0, numpy.newaxis]
+        scale[:, 1] = numpy.sqrt(numpy.einsum("ij,ij->i", row[:, 1], row[:, 1]))
+        row[:, 1] /= scale[:, 1, numpy.newaxis]
+        shear[:, 0] /= scale[:, 1]
+        shear[:, 1] = numpy.einsum("ij,ij->i", row[:, 0], row[:, 2])
+        row[:, 2] -= row[:, 0] * shear[:, 1, numpy.newaxis]
+        shear[:, 2] = numpy.einsum("ij,ij->i", row[:, 1], row[:, 2])
+        row[:, 2] -= row[:, 1] * shear[:, 2, numpy.newaxis]
+        scale[:, 2] = numpy.sqrt(numpy.einsum("ij,ij->i", row[:, 2], row[:, 2]))
+        row[:, 2] /= scale[:, 2, numpy.newaxis]
+        shear[:, 1:] /= scale[:, 2, numpy.newaxis]
+
+        flipped = numpy.einsum("ij,ij->i", row[:, 0], numpy.cross(row[:, 1], row[:, 2])) < 0
+        scale[flipped] *= -1
+        row[flipped] *= -1
+
+        # If the scale was negative, we give back a seperate mirror vector to indicate this.
+        mirror = numpy.where(numpy.diagonal(M, axis1 = 1, axis2 = 2)[:, 0:3] < 0, -1.0, 1.0)
+
+        angles[:, 1] = numpy.arcsin(-row[:, 0, 2])
+        regular = numpy.cos(angles[:, 1]) != 0
+        angles[:, 0] = numpy.where(regular, numpy.arctan2(row[:, 1, 2], row[:, 2, 2]), numpy.arctan2(-row[:, 2, 1], row[:, 1, 1]))
+        angles[:, 2] = numpy.where(regular, numpy.arctan2(row[:, 0, 1], row[:, 0, 0]), 0.0)
+
+        return _wrapVectorArray(scale), _wrapVectorArray(shear), _wrapVectorArray(angles), _wrapVectorArray(translate), _wrapVectorArray(mirror)
+
+
+##  Create a MatrixArray that uses a new array without copying it.
+#
+#   The array is made read-only, so it must not be used for anything else.
+def _wrapArray(data: numpy.ndarray) -> MatrixArray:
+    data.flags.writeable = False
+    array = MatrixArray.__new__(MatrixArray)
+    array._data = data
+    return array
@@ -6,13 +6,21 @@ from copy import deepcopy
 
 ##  Creates an immutable copy of the given narray
 #
-#   If the array is already immutable then it just returns it.
+#   If the array is already immutable then it just returns it. Memory-mapped
+#   arrays are not copied either, so they stay backed by their file. Instead a
+#   read-only view on them is returned.
 #   \param nda \type{numpy.ndarray} the array to copy. May be a list
 #   \return \type{numpy.ndarray} an immutable narray
 def immutableNDArray(nda):
     if nda is None:
         return None
 
+    if isinstance(nda, numpy.memmap):
+        if nda.flags.writeable:
+            nda = nda.view()
+            nda.flags.writeable = False
+        return nda
+
     if type(nda) is list:
         nda = numpy.array(nda, numpy.float32)
         nda.flags.writeable = False
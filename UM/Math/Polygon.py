@@ -75,15 +75,8 @@ class Polygon:
     #   \return A tuple describing the line segment of this Polygon projected on to the infinite line described by normal.
     #           The first element is the minimum value, the second the maximum.
     def project(self, normal):
-        projection_min = numpy.dot(normal, self._points[0])
-
-        projection_max = projection_min
-        for point in self._points:
-            projection = numpy.dot(normal, point)
-            projection_min = min(projection_min, projection)
-            projection_max = max(projection_max, projection)
-
-        return (projection_min, projection_max)
+        projections = numpy.dot(self._points, normal)
+        return (projections.min(), projections.max())
 
     ##  Moves the polygon by a fixed offset.
     #
@@ -0,0 +1,135 @@
+# Copyright (c) 2018 Ultimaker B.V.
+# Uranium is released under the terms of the LGPLv3 or higher.
+
+from typing import Iterable, Optional, Tuple
+
+import numpy
+
+from UM.Math.Polygon import Polygon
+
+##  Maximum number of values in the temporary arrays of one chunk of pairs.
+#
+#   Pairs are processed in chunks so the projections of all points on all
+#   axes don't need to be in memory at once.
+CHUNK_ELEMENT_COUNT = 4 * 1024 * 1024
+
+
+##  A set of polygons, for finding collisions between all of them at once.
+#
+#   This is the bulk companion of Polygon.intersectsPolygon. The polygons are
+#   stored in one array, padded to the same number of points, so they can be
+#   projected on all separating axes with numpy broadcasting instead of a
+#   Python loop per pair of polygons and per axis.
+#
+#   Like Polygon.intersectsPolygon, the polygons are assumed to be convex.
+class PolygonArray:
+    ##  Creates an array of polygons.
+    #
+    #   \param polygons The polygons. Polygons with less than two points never
+    #   intersect anything.
+    def __init__(self, polygons: Iterable[Polygon]):
+        self._polygons = list(polygons)
+        point_lists = [polygon.getPoints() if polygon is not None and polygon.isValid() else numpy.zeros((0, 2)) for polygon in self._polygons]
+        self._polygon_count = len(point_lists)
+        self._point_counts = numpy.array([len(points) for points in point_lists], dtype = numpy.int64)
+        max_point_count = max(int(self._point_counts.max()) if self._polygon_count else 0, 1)
+
+        # Pad the polygons by repeating their last point. That doesn't change their projections.
+        self._points = numpy.zeros((self._polygon_count, max_point_count, 2), dtype = numpy.float64)
+        for index, points in enumerate(point_lists):
+            if len(points) > 0:
+                self._points[index, 0:len(points)] = points
+                self._points[index, len(points):] = points[-1]
+
+        # The separating axes are the normals of the edges, from the previous point to each point.
+        edges = self._points - numpy.roll(self._points, 1, axis = 1)
+        normals = numpy.stack((edges[:, :, 1], -edges[:, :, 0]), axis = 2)
+        lengths = numpy.sqrt(numpy.einsum("ijk,ijk->ij", normals, normals))
+        self._axis_valid = (lengths > 0) & (self._point_counts >= 2)[:, numpy.newaxis]  # Padding gives edges without length.
+        lengths[lengths == 0] = 1
+        self._axes = normals / lengths[:, :, numpy.newaxis]
+
+        self._minimum = numpy.where(self._point_counts[:, numpy.newaxis] > 0, self._points.min(axis = 1), numpy.inf)
+        self._maximum = numpy.where(self._point_counts[:, numpy.newaxis] > 0, self._points.max(axis = 1), -numpy.inf)
+
+    def __len__(self):
+        return self._polygon_count
+
+    ##  Find all pairs of polygons in this array that intersect.
+    #
+    #   \return A tuple of an M x 2 array with the indices of the intersecting
+    #   pairs, with the lowest index first, and an M x 2 array with for each
+    #   pair the translation of the first polygon that is returned by
+    #   Polygon.intersectsPolygon.
+    def findIntersections(self) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        first, second = self._findCandidatePairs(numpy.arange(self._polygon_count))
+        keep = first < second
+        return self._separatingAxisTest(first[keep], second[keep])
+
+    ##  Find the polygons in this array that intersect a polygon.
+    #
+    #   \param polygon The polygon to check against all polygons of this array.
+    #   \return A tuple of an array with the indices of the intersecting
+    #   polygons, and an M x 2 array with for each of them the translation of
+    #   the given polygon that is returned by Polygon.intersectsPolygon.
+    def findIntersectionsWith(self, polygon: Optional[Polygon]) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        combined = PolygonArray([polygon] + self._polygons)
+        first, second = combined._findCandidatePairs(numpy.array([0]))
+        pairs, translations = combined._separatingAxisTest(first, second)
+        return pairs[:, 1] - 1, translations
+
+    ##  Find the pairs of polygons with overlapping bounding boxes.
+    #
+    #   Only these can intersect, which saves testing all other pairs.
+    #
+    #   \param indices The polygons to find the overlapping polygons of.
+    #   \return A tuple of arrays with the first and second polygon of each
+    #   pair.
+    def _findCandidatePairs(self, indices: numpy.ndarray) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        overlapping = numpy.all(
+            (self._minimum[indices, numpy.newaxis] <= self._maximum[numpy.newaxis]) &
+            (self._maximum[indices, numpy.newaxis] >= self._minimum[numpy.newaxis]), axis = 2)
+        overlapping[numpy.arange(len(indices)), indices] = False  # Polygons don't collide with themselves.
+        first, second = numpy.nonzero(overlapping)
+        return indices[first], second
+
+    ##  Test pairs of polygons for intersection with the separating axis
+    #   theorem.
+    #
+    #   Both polygons of each pair are projected on the axes of both. The
+    #   pair intersects if the projections overlap on all axes. The axis with
+    #   the smallest overlap gives the translation to separate them, with the
+    #   same choice of axis as Polygon.intersectsPolygon.
+    def _separatingAxisTest(self, first: numpy.ndarray, second: numpy.ndarray) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        pairs = []
+        translations = []
+        point_count = self._points.shape[1]
+        chunk_size = max(CHUNK_ELEMENT_COUNT // (4 * point_count * point_count), 1)
+        for start in range(0, len(first), chunk_size):
+            a = first[start:start + chunk_size]
+            b = second[start:start + chunk_size]
+            axes = numpy.concatenate((self._axes[a], self._axes[b]), axis = 1)
+            valid = numpy.concatenate((self._axis_valid[a], self._axis_valid[b]), axis = 1)
+
+            projection_a = numpy.einsum("mpd,mad->mpa", self._points[a], axes)
+            projection_b = numpy.einsum("mpd,mad->mpa", self._points[b], axes)
+            minimum_a = projection_a.min(axis = 1)
+            maximum_a = projection_a.max(axis = 1)
+            minimum_b = projection_b.min(axis = 1)
+            maximum_b = projection_b.max(axis = 1)
+
+            overlap = numpy.minimum(maximum_a, maximum_b) - numpy.maximum(minimum_a, minimum_b)
+            overlap[~valid] = numpy.inf
+            smallest_axis = overlap.argmin(axis = 1)
+            rows = numpy.arange(len(a))
+            size = overlap[rows, smallest_axis]
+            intersecting = (size >= 0) & numpy.isfinite(size)
+
+            direction = numpy.where(minimum_a[rows, smallest_axis] < minimum_b[rows, smallest_axis], -size, size)
+            translation = axes[rows, smallest_axis] * direction[:, numpy.newaxis]
+            pairs.append(numpy.stack((a, b), axis = 1)[intersecting])
+            translations.append(translation[intersecting])
+
+        if not pairs:
+            return numpy.zeros((0, 2), dtype = numpy.int64), numpy.zeros((0, 2), dtype = numpy.float64)
+        return numpy.concatenate(pairs), numpy.concatenate(translations)
@@ -0,0 +1,253 @@
+# Copyright (c) 2018 Ultimaker B.V.
+# Uranium is released under the terms of the LGPLv3 or higher.
+
+import math
+from typing import Dict, Hashable, List, Optional, Set, Tuple
+
+import numpy
+
+from UM.Math.Polygon import Polygon
+from UM.Math.PolygonArray import PolygonArray
+
+##  Default size of the cells of a SpatialIndex, in scene units (millimetres).
+DEFAULT_CELL_SIZE = 20.0
+
+
+##  A spatial index of 2D polygons, like the footprints of objects on the
+#   build plate.
+#
+#   The polygons are stored in a uniform grid. Every polygon is registered in
+#   the cells that its bounding box covers, so queries only need to look at
+#   the polygons in the cells around the query instead of at all polygons.
+#   Polygons can be inserted, moved and removed one at a time, which only
+#   touches the cells they cover.
+#
+#   Polygons are stored under a key, which can be any hashable object, such
+#   as a SceneNode. Like PolygonArray, the polygons are assumed to be convex.
+class SpatialIndex:
+    ##  Creates an empty index.
+    #
+    #   \param cell_size The size of the cells of the grid. Ideally, this is
+    #   about the size of a typical polygon.
+    def __init__(self, cell_size: float = DEFAULT_CELL_SIZE):
+        self._cell_size = cell_size
+        self._cells = {}  # type: Dict[Tuple[int, int], Set[Hashable]]
+        self._polygons = {}  # type: Dict[Hashable, Polygon]
+        self._bounds = {}  # type: Dict[Hashable, numpy.ndarray]
+        self._cell_ranges = {}  # type: Dict[Hashable, Tuple[int, int, int, int]]
+
+    def getCellSize(self) -> float:
+        return self._cell_size
+
+    def __len__(self):
+        return len(self._polygons)
+
+    def __contains__(self, key):
+        return key in self._polygons
+
+    ##  Get the polygon that is stored under a key.
+    #
+    #   \return The polygon, or None if there is none.
+    def getPolygon(self, key: Hashable) -> Optional[Polygon]:
+        return self._polygons.get(key)
+
+    ##  Store a polygon under a key, or move the polygon of a key.
+    #
+    #   \param key The key to store the polygon under.
+    #   \param polygon The polygon. If it is not valid, the key is removed.
+    def insert(self, key: Hashable, polygon: Optional[Polygon]):
+        if polygon is None or not polygon.isValid():
+            self.remove(key)
+            return
+
+        points = polygon.getPoints()
+        bounds = numpy.concatenate((points.min(axis = 0), points.max(axis = 0))).astype(numpy.float64)
+        cell_range = self._getCellRange(bounds)
+        old_cell_range = self._cell_ranges.get(key)
+        if old_cell_range != cell_range:
+            if old_cell_range is not None:
+                self._removeFromCells(key, old_cell_range)
+            self._addToCells(key, cell_range)
+            self._cell_ranges[key] = cell_range
+        self._polygons[key] = polygon
+        self._bounds[key] = bounds
+
+    ##  Move the polygon of a key. This is the same as inserting it again.
+    def update(self, key: Hashable, polygon: Optional[Polygon]):
+        self.insert(key, polygon)
+
+    ##  Remove the polygon of a key, if there is one.
+    def remove(self, key: Hashable):
+        cell_range = self._cell_ranges.pop(key, None)
+        if cell_range is None:
+            return
+        self._removeFromCells(key, cell_range)
+        del self._polygons[key]
+        del self._bounds[key]
+
+    ##  Remove all polygons.
+    def clear(self):
+        self._cells.clear()
+        self._polygons.clear()
+        self._bounds.clear()
+        self._cell_ranges.clear()
+
+    ##  Find the polygons that overlap a rectangle.
+    #
+    #   \param minimum The X and Y coordinates of one corner of the rectangle.
+    #   \param maximum The X and Y coordinates of the opposite corner.
+    #   \return A list of keys.
+    def queryRange(self, minimum, maximum) -> List[Hashable]:
+        left, bottom = min(minimum[0], maximum[0]), min(minimum[1], maximum[1])
+        right, top = max(minimum[0], maximum[0]), max(minimum[1], maximum[1])
+        rectangle = Polygon(numpy.array([[left, bottom], [right, bottom], [right, top], [left, top]], dtype = numpy.float64))
+        return self.queryPolygon(rectangle)
+
+    ##  Find the polygons that intersect a polygon.
+    #
+    #   Touching polygons count as intersecting, as in
+    #   Polygon.intersectsPolygon.
+    #
+    #   \return A list of keys.
+    def queryPolygon(self, polygon: Polygon) -> List[Hashable]:
+        if polygon is None or not polygon.isValid():
+            return []
+        points = polygon.getPoints()
+        bounds = numpy.concatenate((points.min(axis = 0), points.max(axis = 0)))
+        candidates = [key for key in self._getKeysInCells(self._getCellRange(bounds)) if _boundsOverlap(self._bounds[key], bounds)]
+        if not candidates:
+            return []
+        indices, _ = PolygonArray([self._polygons[key] for key in candidates]).findIntersectionsWith(polygon)
+        return [candidates[index] for index in indices]
+
+    ##  Find the polygons that contain a point.
+    #
+    #   \return A list of keys.
+    def queryPoint(self, x: float, y: float) -> List[Hashable]:
+        cell = self._getCell(x, y)
+        keys = self._cells.get(cell, ())
+        return [key for key in keys if _boundsOverlap(self._bounds[key], (x, y, x, y)) and _distanceToPolygon(self._polygons[key].getPoints(), x, y) == 0]
+
+    ##  Find the polygons that are closest to a point.
+    #
+    #   The grid is searched in rings of cells around the point, until no
+    #   polygon outside the rings can be closer than the polygons that were
+    #   found.
+    #
+    #   \param x The X coordinate of the point.
+    #   \param y The Y coordinate of the point.
+    #   \param count The number of polygons to find.
+    #   \return A list of tuples of a key and its distance to the point,
+    #   closest first. The distance is 0 for polygons that contain the point.
+    def queryNearest(self, x: float, y: float, count: int = 1) -> List[Tuple[Hashable, float]]:
+        found = {}  # type: Dict[Hashable, float]
+        center_x, center_y = self._getCell(x, y)
+        ring = 0
+        while len(found) < len(self._polygons):
+            ring_cells = 1 if ring == 0 else 8 * ring
+            if ring_cells > len(self._polygons) - len(found):
+                # Searching further costs more than looking at everything that is left.
+                for key in self._polygons:
+                    if key not in found:
+                        found[key] = _distanceToPolygon(self._polygons[key].getPoints(), x, y)
+                break
+
+            for cell in _ringCells(center_x, center_y, ring):
+                for key in self._cells.get(cell, ()):
+                    if key not in found:
+                        found[key] = _distanceToPolygon(self._polygons[key].getPoints(), x, y)
+
+            # Everything outside these rings is at least this far away from the point.
+            if len(found) >= count and sorted(found.values())[count - 1] <= ring * self._cell_size:
+                break
+            ring += 1
+
+        return sorted(found.items(), key = lambda item: item[1])[0:count]
+
+    def _getCell(self, x: float, y: float) -> Tuple[int, int]:
+        return int(math.floor(x / self._cell_size)), int(math.floor(y / self._cell_size))
+
+    ##  Get the range of cells that a bounding box covers.
+    #
+    #   \param bounds The left, bottom, right and top of the bounding box.
+    #   \return The first and last column and row of the cells, inclusive.
+    def _getCellRange(self, bounds) -> Tuple[int, int, int, int]:
+        left, bottom = self._getCell(bounds[0], bounds[1])
+        right, top = self._getCell(bounds[2], bounds[3])
+        return left, bottom, right, top
+
+    def _getKeysInCells(self, cell_range: Tuple[int, int, int, int]) -> Set[Hashable]:
+        left, bottom, right, top = cell_range
+        keys = set()
+        if (right - left + 1) * (top - bottom + 1) > len(self._cells):
+            # The range covers more cells than there are in use, so look at the cells in use instead.
+            for (column, row), cell_keys in self._cells.items():
+                if left <= column <= right and bottom <= row <= top:
+                    keys.update(cell_keys)
+            return keys
+        for column in range(left, right + 1):
+            for row in range(bottom, top + 1):
+                keys.update(self._cells.get((column, row), ()))
+        return keys
+
+    def _addToCells(self, key: Hashable, cell_range: Tuple[int, int, int, int]):
+        left, bottom, right, top = cell_range
+        for column in range(left, right + 1):
+            for row in range(bottom, top + 1):
+                self._cells.setdefault((column, row), set()).add(key)
+
+    def _removeFromCells(self, key: Hashable, cell_range: Tuple[int, int, int, int]):
+        left, bottom, right, top = cell_range
+        for column in range(left, right + 1):
+            for row in range(bottom, top + 1):
+                cell = self._cells.get((column, row))
+                if cell is not None:
+                    cell.discard(key)
+                    if not cell:
+                        del self._cells[(column, row)]
+
+
+##  Check whether two bounding boxes overlap or touch.
+#
+#   \param first The left, bottom, right and top of a bounding box.
+#   \param second The left, bottom, right and top of another bounding box.
+def _boundsOverlap(first, second) -> bool:
+    return first[0] <= second[2] and second[0] <= first[2] and first[1] <= second[3] and second[1] <= first[3]
+
+
+##  Get the cells at a distance of exactly some number of cells from a cell.
+def _ringCells(center_x: int, center_y: int, ring: int):
+    if ring == 0:
+        yield center_x, center_y
+        return
+    for offset in range(-ring, ring + 1):
+        yield center_x + offset, center_y - ring
+        yield center_x + offset, center_y + ring
+    for offset in range(-ring + 1, ring):
+        yield center_x - ring, center_y + offset
+        yield center_x + ring, center_y + offset
+
+
+##  Compute the distance from a point to a convex polygon.
+#
+#   \param points The points of the polygon, in either winding order.
+#   \return The distance to the closest edge, or 0 if the point is inside.
+def _distanceToPolygon(points: numpy.ndarray, x: float, y: float) -> float:
+    points = numpy.asarray(points, dtype = numpy.float64)
+    point = numpy.array([x, y], dtype = numpy.float64)
+    if len(points) == 1:
+        return float(numpy.linalg.norm(points[0] - point))
+
+    starts = points
+    edges = numpy.roll(points, -1, axis = 0) - starts
+    to_point = point - starts
+    if len(points) >= 3:
+        cross = edges[:, 0] * to_point[:, 1] - edges[:, 1] * to_point[:, 0]
+        if numpy.all(cross >= 0) or numpy.all(cross <= 0):
+            return 0.0  # On the same side of all edges, so inside.
+
+    lengths = numpy.einsum("ij,ij->i", edges, edges)
+    lengths[lengths == 0] = 1
+    along = numpy.clip(numpy.einsum("ij,ij->i", to_point, edges) / lengths, 0, 1)
+    closest = starts + edges * along[:, numpy.newaxis]
+    return float(numpy.sqrt(((closest - point) ** 2).sum(axis = 1).min()))
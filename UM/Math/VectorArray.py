@@ -0,0 +1,191 @@
+# Copyright (c) 2018 Ultimaker B.V.
+# Uranium is released under the terms of the LGPLv3 or higher.
+
+from typing import Iterable, Union
+
+import numpy
+
+from UM.Math.AxisAlignedBox import AxisAlignedBox
+from UM.Math.Matrix import Matrix
+from UM.Math.Vector import Vector
+
+
+##  An immutable array of 3D vectors.
+#
+#   This is the bulk companion of Vector. All vectors are stored in a single
+#   N x 3 numpy array, so operations on all of them are a single numpy
+#   operation instead of one small allocation per vector.
+#
+#   Vectors that are taken out of the array share its memory. Since both are
+#   immutable, nothing is copied when converting from one to the other.
+class VectorArray:
+    ##  Creates an array of vectors.
+    #
+    #   \param data An N x 3 array-like of coordinates. If it is a read-only
+    #   numpy array of 64-bit floats, it is used as it is, without copying.
+    def __init__(self, data = None):
+        if data is None:
+            data = numpy.zeros((0, 3), dtype = numpy.float64)
+        data = numpy.asarray(data, dtype = numpy.float64).reshape((-1, 3))
+        if data.flags.writeable:
+            data = data.copy()
+            data.flags.writeable = False
+        self._data = data
+
+    ##  Create an array from a sequence of vectors.
+    #
+    #   \param vectors An iterable of Vector objects.
+    @staticmethod
+    def fromVectors(vectors: Iterable[Vector]) -> "VectorArray":
+        return _wrapArray(numpy.array([vector._data for vector in vectors], dtype = numpy.float64).reshape((-1, 3)))
+
+    ##  Get the numpy array with the data.
+    #
+    #   Unlike Vector.getData, this is not a copy. The array is read-only.
+    #
+    #   \return An N x 3 array of 64-bit floats.
+    def getData(self) -> numpy.ndarray:
+        return self._data
+
+    ##  Get a vector from this array, without copying it.
+    def getVector(self, index: int) -> Vector:
+        return _wrapVector(self._data[index])
+
+    ##  Get all vectors of this array, without copying them.
+    def toVectors(self):
+        return [_wrapVector(row) for row in self._data]
+
+    def __len__(self):
+        return len(self._data)
+
+    def __iter__(self):
+        return iter(self.toVectors())
+
+    ##  Get a vector, or a VectorArray for a slice or an array of indices.
+    def __getitem__(self, index):
+        if isinstance(index, (int, numpy.integer)):
+            return self.getVector(index)
+        return _wrapArray(self._data[index])
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if type(other) is not VectorArray:
+            return False
+        return numpy.array_equal(self._data, other._data)
+
+    def __repr__(self):
+        return "VectorArray({0})".format(self._data.tolist())
+
+    ##  Return the X, Y or Z components of all vectors.
+    @property
+    def x(self) -> numpy.ndarray:
+        return self._data[:, 0]
+
+    @property
+    def y(self) -> numpy.ndarray:
+        return self._data[:, 1]
+
+    @property
+    def z(self) -> numpy.ndarray:
+        return self._data[:, 2]
+
+    ##  Get the lengths of all vectors.
+    #
+    #   \return An array of N lengths.
+    def lengths(self) -> numpy.ndarray:
+        return numpy.sqrt(numpy.einsum("ij,ij->i", self._data, self._data))
+
+    ##  Get all vectors scaled to unit length.
+    #
+    #   Vectors with a length of 0 are kept as they are, like Vector.normalized.
+    def normalized(self) -> "VectorArray":
+        lengths = self.lengths()
+        lengths[lengths == 0] = 1
+        return _wrapArray(self._data / lengths[:, numpy.newaxis])
+
+    ##  Get the dot products with another vector or with each vector of another
+    #   array.
+    #
+    #   \return An array of N dot products.
+    def dot(self, other: Union[Vector, "VectorArray"]) -> numpy.ndarray:
+        return numpy.einsum("ij,ij->i", self._data, numpy.broadcast_to(_operand(other), self._data.shape))
+
+    def cross(self, other: Union[Vector, "VectorArray"]) -> "VectorArray":
+        return _wrapArray(numpy.cross(self._data, _operand(other)))
+
+    ##  Transform all vectors as points by a matrix.
+    #
+    #   This is Vector.preMultiply for all vectors at once.
+    #
+    #   \param matrix A Matrix to transform all vectors with.
+    def preMultiply(self, matrix: Matrix) -> "VectorArray":
+        data = matrix._data
+        return _wrapArray(self._data.dot(data[0:3, 0:3].T) + data[0:3, 3])
+
+    ##  Get the smallest X, Y and Z coordinates of all vectors.
+    def getMinimum(self) -> Vector:
+        return Vector(data = self._data.min(axis = 0))
+
+    ##  Get the largest X, Y and Z coordinates of all vectors.
+    def getMaximum(self) -> Vector:
+        return Vector(data = self._data.max(axis = 0))
+
+    ##  Get the bounding box around all vectors.
+    #
+    #   \return An AxisAlignedBox, or AxisAlignedBox.Null if the array is
+    #   empty.
+    def getBoundingBox(self) -> AxisAlignedBox:
+        if len(self._data) == 0:
+            return AxisAlignedBox.Null
+        return AxisAlignedBox(minimum = self.getMinimum(), maximum = self.getMaximum())
+
+    def __add__(self, other):
+        return _wrapArray(self._data + _operand(other))
+
+    def __sub__(self, other):
+        return _wrapArray(self._data - _operand(other))
+
+    def __mul__(self, other):
+        return _wrapArray(self._data * _operand(other))
+
+    def __rmul__(self, other):
+        return self * other
+
+    def __truediv__(self, other):
+        return _wrapArray(self._data / _operand(other))
+
+    def __neg__(self):
+        return _wrapArray(-self._data)
+
+
+##  Get the data to use for the other operand of an operation on an array.
+#
+#   Vectors are broadcast to all vectors of the array, and arrays are used per
+#   vector. Numbers and numpy arrays follow the broadcasting rules of numpy,
+#   so an N x 1 array gives a number per vector.
+def _operand(other):
+    if isinstance(other, (VectorArray, Vector)):
+        return other._data
+    return other
+
+
+##  Create a Vector that uses some data without copying it.
+#
+#   Vectors never change their data, so they can share it with a read-only
+#   array.
+def _wrapVector(data: numpy.ndarray) -> Vector:
+    vector = Vector.__new__(Vector)
+    vector._data = data
+    vector.round_digits = None
+    return vector
+
+
+##  Create a VectorArray that uses a new array without copying it.
+#
+#   The array is made read-only, so it must not be used for anything else.
+def _wrapArray(data: numpy.ndarray) -> VectorArray:
+    data.flags.writeable = False
+    array = VectorArray.__new__(VectorArray)
+    array._data = data
+    return array
@@ -0,0 +1,44 @@
+# Copyright (c) 2018 Ultimaker B.V.
+# Uranium is released under the terms of the LGPLv3 or higher.
+
+import time
+
+from UM.Job import Job
+from UM.Logger import Logger
+from UM.Scene.Iterator.DepthFirstIterator import DepthFirstIterator
+
+
+##  A Job that computes the convex hulls of meshes in the background.
+#
+#   Computing the convex hull of a large mesh takes a while. If it is first
+#   needed by something that runs on the main thread, like a collision check
+#   right after a file is loaded, the interface freezes in the meantime. This
+#   job is started as soon as meshes are read, so the hulls are usually ready
+#   before they are needed.
+#
+#   MeshData computes its hull while holding a lock, so anything that asks for
+#   a hull while this job is computing it waits for the result instead of
+#   computing it a second time.
+class ConvexHullJob(Job):
+    ##  Creates a job for the meshes of some nodes.
+    #
+    #   \param nodes The nodes to compute the convex hulls of. The meshes of
+    #   their children are included as well.
+    def __init__(self, nodes):
+        super().__init__()
+        self._meshes = []
+        for node in nodes:
+            for child in DepthFirstIterator(node):
+                mesh_data = child.getMeshData()
+                if mesh_data is not None and mesh_data.getVertices() is not None and mesh_data not in self._meshes:
+                    self._meshes.append(mesh_data)
+
+    def run(self):
+        start_time = time.time()
+        for mesh_data in self._meshes:
+            try:
+                mesh_data.getConvexHull()
+            except Exception:  # Whoever needs the hull will run into this too, and can handle it there.
+                Logger.logException("w", "Unable to compute the convex hull of a mesh in the background")
+            Job.yieldThread()
+        Logger.log("d", "Computing the convex hulls of %s meshes in the background took %s seconds.", len(self._meshes), time.time() - start_time)
@@ -0,0 +1,36 @@
+# Copyright (c) 2018 Ultimaker B.V.
+# Uranium is released under the terms of the LGPLv3 or higher.
+
+from UM.Job import Job
+from UM.Logger import Logger
+from UM.Mesh.MeshSimplifier import buildLevelsOfDetail
+from UM.Scene.Iterator.DepthFirstIterator import DepthFirstIterator
+
+
+##  A Job that builds simplified versions of meshes in the background.
+#
+#   Drawing a mesh with millions of faces is slow, even when it covers only a
+#   few pixels on the screen. The renderer draws one of the simplified
+#   versions instead when that looks the same. The meshes themselves are not
+#   changed, so everything else still gets the full resolution.
+class LevelOfDetailJob(Job):
+    ##  Creates a job for the meshes of some nodes.
+    #
+    #   \param nodes The nodes to simplify the meshes of. The meshes of their
+    #   children are included as well.
+    def __init__(self, nodes):
+        super().__init__()
+        self._meshes = []
+        for node in nodes:
+            for child in DepthFirstIterator(node):
+                mesh_data = child.getMeshData()
+                if mesh_data is not None and not mesh_data.getLevelsOfDetail() and mesh_data not in self._meshes:
+                    self._meshes.append(mesh_data)
+
+    def run(self):
+        for mesh_data in self._meshes:
+            try:
+                mesh_data.setLevelsOfDetail(buildLevelsOfDetail(mesh_data))
+            except Exception:  # The mesh can still be drawn at full resolution.
+                Logger.logException("w", "Unable to build levels of detail for a mesh")
+            Job.yieldThread()
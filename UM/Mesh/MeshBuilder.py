@@ -5,6 +5,7 @@ from UM.Mesh.MeshData import MeshData
 from UM.Mesh.MeshData import MeshType
 from UM.Mesh.MeshData import calculateNormalsFromVertices
 from UM.Mesh.MeshData import calculateNormalsFromIndexedVertices
+from UM.Mesh.MeshData import weldVertices
 from UM.Math.Vector import Vector
 from UM.Math.Matrix import Matrix
 from UM.Logger import Logger
@@ -37,10 +38,19 @@ class MeshBuilder:
 
     ##  Build a MeshData object.
     #
+    #   \param share Whether to share the arrays of this builder with the mesh
+    #   instead of copying them. The mesh gets read-only views on the arrays,
+    #   so this is fast and uses no extra memory. Data can still be added to
+    #   the builder afterwards, but data that it already has must not be
+    #   changed.
     #   \return A Mesh data.
-    def build(self):
-        return MeshData(vertices=self.getVertices(), normals=self.getNormals(), indices=self.getIndices(),
-                        colors=self.getColors(), uvs=self.getUVCoordinates(), file_name=self.getFileName(),
+    def build(self, share = False):
+        arrays = [self.getVertices(), self.getNormals(), self.getIndices(), self.getColors(), self.getUVCoordinates()]
+        if share:
+            arrays = [_readOnlyView(array) for array in arrays]
+        vertices, normals, indices, colors, uvs = arrays
+        return MeshData(vertices=vertices, normals=normals, indices=indices,
+                        colors=colors, uvs=uvs, file_name=self.getFileName(),
                         center_position=self.getCenterPosition())
 
     def setCenterPosition(self, position):
@@ -76,6 +86,12 @@ class MeshBuilder:
     def getVertexCount(self):
         return self._vertex_count
 
+    ##  Get the number of vertices for which memory is allocated.
+    #
+    #   This includes the vertices that were added already.
+    def getVertexCapacity(self):
+        return len(self._vertices) if self._vertices is not None else 0
+
     ##  Get a vertex by index
     def getVertex(self, index):
         try:
@@ -109,6 +125,12 @@ class MeshBuilder:
 
         return self._normals[0:self._vertex_count]
 
+    ##  Set the normals of all vertices at once.
+    #
+    #   \param normals A numpy array with one normal per vertex.
+    def setNormals(self, normals):
+        self._normals = normals
+
     ##  Return whether this mesh has indices.
     def hasIndices(self):
         return self._indices is not None
@@ -142,6 +164,12 @@ class MeshBuilder:
             return None
         return self._uvs[0 : self._vertex_count]
 
+    ##  Set the UV coordinates of all vertices at once.
+    #
+    #   \param uvs A numpy array with one pair of UV coordinates per vertex.
+    def setUVCoordinates(self, uvs):
+        self._uvs = uvs
+
     def getFileName(self):
         return self._file_name
 
@@ -210,11 +238,7 @@ class MeshBuilder:
     #   \param y y coordinate of vertex.
     #   \param z z coordinate of vertex.
     def addVertex(self, x, y, z):
-        if self._vertices is None:
-            self._vertices = numpy.zeros((10, 3), dtype=numpy.float32)
-
-        if len(self._vertices) == self._vertex_count:
-            self._vertices.resize((self._vertex_count * 2, 3))
+        self._reserveVertices(1)
 
         self._vertices[self._vertex_count, 0] = x
         self._vertices[self._vertex_count, 1] = y
@@ -229,19 +253,9 @@ class MeshBuilder:
     #   \param ny y part of normal.
     #   \param nz z part of normal.
     def addVertexWithNormal(self, x, y, z, nx, ny, nz):
-        if self._vertices is None:
-            self._vertices = numpy.zeros((10, 3), dtype=numpy.float32)
         if self._normals is None: #Specific case, reserve vert count does not reservere size for normals
-            self._normals = numpy.zeros((10, 3), dtype=numpy.float32)
-
-        if len(self._vertices) == self._vertex_count:
-            self._vertices.resize((self._vertex_count * 2, 3))
-
-        if self._normals is None:
-            self._normals = numpy.zeros((self._vertex_count, 3), dtype=numpy.float32)
-
-        if len(self._normals) == self._vertex_count:
-            self._normals.resize((self._vertex_count * 2, 3))
+            self._normals = numpy.zeros((len(self._vertices) if self._vertices is not None else 0, 3), dtype=numpy.float32)
+        self._reserveVertices(1)
 
         self._vertices[self._vertex_count, 0] = x
         self._vertices[self._vertex_count, 1] = y
@@ -262,11 +276,7 @@ class MeshBuilder:
     #   \param y2 y coordinate of third vertex.
     #   \param z2 z coordinate of third vertex.
     def addFaceByPoints(self, x0, y0, z0, x1, y1, z1, x2, y2, z2):
-        if self._indices is None:
-            self._indices = numpy.zeros((10, 3), dtype=numpy.int32)
-
-        if len(self._indices) == self._face_count:
-            self._indices.resize((self._face_count * 2, 3))
+        self._reserveFaces(1)
 
         self._indices[self._face_count, 0] = self._vertex_count
         self._indices[self._face_count, 1] = self._vertex_count + 1
@@ -300,11 +310,7 @@ class MeshBuilder:
     #   \param ny2 The Y coordinate of the normal of the third vertex.
     #   \param nz2 The Z coordinate of the normal of the third vertex.
     def addFaceWithNormals(self,x0, y0, z0, nx0, ny0, nz0, x1, y1, z1, nx1, ny1, nz1, x2, y2, z2, nx2, ny2, nz2):
-        if self._indices is None:
-            self._indices = numpy.zeros((10, 3), dtype=numpy.int32)
-
-        if len(self._indices) == self._face_count:
-            self._indices.resize((self._face_count * 2, 3))
+        self._reserveFaces(1)
 
         self._indices[self._face_count, 0] = self._vertex_count
         self._indices[self._face_count, 1] = self._vertex_count + 1
@@ -324,7 +330,7 @@ class MeshBuilder:
             self._colors = numpy.zeros((10, 4), dtype=numpy.float32)
 
         if len(self._colors) < len(self._vertices):
-            self._colors.resize((len(self._vertices), 4))
+            self._colors = _grownArray(self._colors, len(self._vertices))
 
         self._colors[index, 0] = color.r
         self._colors[index, 1] = color.g
@@ -336,26 +342,149 @@ class MeshBuilder:
             self._uvs = numpy.zeros((10, 2), dtype=numpy.float32)
 
         if len(self._uvs) < len(self._vertices):
-            self._uvs.resize((len(self._vertices), 2))
+            self._uvs = _grownArray(self._uvs, len(self._vertices))
 
         self._uvs[index, 0] = u
         self._uvs[index, 1] = v
 
+    ##  Add a number of vertices to the mesh at once.
+    #
+    #   \param vertices A numpy array with one row of X, Y and Z coordinates
+    #   per vertex.
     def addVertices(self, vertices):
         if self._vertices is None:
+            # Nothing to append to, so take the array as it is without copying it.
             self._vertices = vertices
             self._vertex_count = len(vertices)
         else:
-            self._vertices = numpy.concatenate((self._vertices[0:self._vertex_count], vertices))
-            self._vertex_count  += len(vertices)
+            self._appendVertices(vertices)
 
+    ##  Add a number of faces to the mesh at once.
+    #
+    #   \param indices A numpy array with one row of three vertex indices per
+    #   face. The indices are not offset by the current number of vertices.
     def addIndices(self, indices):
         if self._indices is None:
+            # Nothing to append to, so take the array as it is without copying it.
             self._indices = indices
             self._face_count = len(indices)
         else:
-            self._indices = numpy.concatenate((self._indices[0:self._face_count], indices))
-            self._face_count += len(indices)
+            self._appendFaces(indices)
+
+    ##  Add a number of vertices with normals to the mesh at once.
+    #
+    #   \param data A numpy array with one row of X, Y and Z coordinates
+    #   followed by the X, Y and Z components of the normal per vertex.
+    def addVerticesWithNormals(self, data):
+        data = numpy.asarray(data, dtype = numpy.float32)
+        self._appendVertices(data[:, 0:3], normals = data[:, 3:6])
+
+    ##  Add a number of faces to the mesh at once, each with three new vertices.
+    #
+    #   This is the bulk version of addFaceByPoints.
+    #
+    #   \param points A numpy array with one row of nine coordinates per face:
+    #   X, Y and Z of the first vertex, then of the second and of the third.
+    def addFacesByPointsArray(self, points):
+        points = numpy.asarray(points, dtype = numpy.float32)
+        indices = numpy.arange(len(points) * 3, dtype = numpy.int32).reshape((-1, 3))
+        self.addIndexedFaces(points.reshape((-1, 3)), indices)
+
+    ##  Add a number of vertices and faces between them to the mesh at once.
+    #
+    #   \param vertices A numpy array with one row of X, Y and Z coordinates
+    #   per vertex.
+    #   \param indices A numpy array with one row of three indices per face.
+    #   These index into \p vertices, so the first new vertex has index 0.
+    #   \param normals (Optional) A numpy array with a normal for each vertex.
+    #   \param colors (Optional) A numpy array with an RGBA colour for each
+    #   vertex.
+    #   \param uvs (Optional) A numpy array with UV coordinates for each
+    #   vertex.
+    def addIndexedFaces(self, vertices, indices, normals = None, colors = None, uvs = None):
+        start = self._vertex_count
+        self._appendVertices(vertices, normals = normals, colors = colors, uvs = uvs)
+        self._appendFaces(numpy.asarray(indices) + start)
+
+    ##  Add a chunk of a mesh that is read in chunks.
+    #
+    #   The first chunk that tells how large the whole mesh is expected to be
+    #   reserves memory for all of it, so that the arrays don't need to grow
+    #   while the rest of the chunks are added.
+    #
+    #   \param chunk The MeshChunk to add.
+    def addMeshChunk(self, chunk):
+        if chunk.getExpectedVertexCount() > self._vertex_count:
+            self._reserveVertices(chunk.getExpectedVertexCount() - self._vertex_count)
+        if chunk.getExpectedFaceCount() > self._face_count:
+            self._reserveFaces(chunk.getExpectedFaceCount() - self._face_count)
+
+        vertices = chunk.getVertices()
+        indices = chunk.getIndices()
+        if indices is None and self._indices is not None:  # The mesh is indexed, so the faces of this chunk need indices too.
+            indices = numpy.arange(len(vertices) - len(vertices) % 3, dtype = numpy.int32).reshape((-1, 3)) + self._vertex_count
+        self._appendVertices(vertices, normals = chunk.getNormals(), colors = chunk.getColors(), uvs = chunk.getUVCoordinates())
+        if indices is not None:
+            self._appendFaces(indices)
+
+    ##  Make sure there is room for a number of extra vertices.
+    #
+    #   The arrays grow to at least twice their size, so that adding vertices
+    #   one by one takes amortized constant time.
+    #
+    #   \param count The number of vertices that will be added.
+    def _reserveVertices(self, count):
+        needed = self._vertex_count + count
+        if self._vertices is None:
+            self._vertices = numpy.zeros((max(needed, 10), 3), dtype = numpy.float32)
+        elif len(self._vertices) < needed:
+            self._vertices = _grownArray(self._vertices, needed)
+        if self._normals is not None and len(self._normals) < needed:
+            self._normals = _grownArray(self._normals, needed)
+        if self._colors is not None and len(self._colors) < needed:
+            self._colors = _grownArray(self._colors, needed)
+        if self._uvs is not None and len(self._uvs) < needed:
+            self._uvs = _grownArray(self._uvs, needed)
+
+    ##  Make sure there is room for a number of extra faces.
+    #
+    #   \param count The number of faces that will be added.
+    def _reserveFaces(self, count):
+        needed = self._face_count + count
+        if self._indices is None:
+            self._indices = numpy.zeros((max(needed, 10), 3), dtype = numpy.int32)
+        elif len(self._indices) < needed:
+            self._indices = _grownArray(self._indices, needed)
+
+    ##  Copy a number of vertices and their attributes to the end of the mesh.
+    #
+    #   Attributes that the mesh did not have yet are created, with zeros for
+    #   the existing vertices. Vertices added without an attribute that the
+    #   mesh has get zeros for that attribute.
+    def _appendVertices(self, vertices, normals = None, colors = None, uvs = None):
+        count = len(vertices)
+        capacity = len(self._vertices) if self._vertices is not None else 0
+        if normals is not None and self._normals is None:
+            self._normals = numpy.zeros((capacity, 3), dtype = numpy.float32)
+        if colors is not None and self._colors is None:
+            self._colors = numpy.zeros((capacity, 4), dtype = numpy.float32)
+        if uvs is not None and self._uvs is None:
+            self._uvs = numpy.zeros((capacity, 2), dtype = numpy.float32)
+        self._reserveVertices(count)
+
+        start = self._vertex_count
+        end = start + count
+        self._vertices[start:end] = vertices
+        for attribute, values in ((self._normals, normals), (self._colors, colors), (self._uvs, uvs)):
+            if attribute is not None:
+                attribute[start:end] = values if values is not None else 0
+        self._vertex_count = end
+
+    ##  Copy a number of faces to the end of the mesh.
+    def _appendFaces(self, indices):
+        self._reserveFaces(len(indices))
+        self._indices[self._face_count:self._face_count + len(indices)] = indices
+        self._face_count += len(indices)
 
     def addColors(self, colors):
         if self._colors is None:
@@ -392,15 +521,58 @@ class MeshBuilder:
     #   Keyword arguments:
     #   - fast: A boolean indicating whether or not to use a fast method of normal calculation that assumes each triangle
     #           is stored as a set of three unique vertices.
-    def calculateNormals(self, fast=False):
+    #   - smooth: A boolean indicating whether to average the normals of the faces around each vertex, weighted by the
+    #             area of the faces. Only used for meshes with indices.
+    #   - angle_weighted: A boolean indicating whether smooth normals are weighted by the angle of the faces at each
+    #                     vertex instead of by their area.
+    def calculateNormals(self, fast=False, smooth=False, angle_weighted=False):
         if self._vertices is None:
             return
 
-        if self.hasIndices() and not fast:
-            self._normals = calculateNormalsFromIndexedVertices(self._vertices, self._indices, self._face_count)
+        if self.hasIndices() and (smooth or not fast):
+            self._normals = calculateNormalsFromIndexedVertices(self.getVertices(), self.getIndices(), self._face_count, smooth = smooth, angle_weighted = angle_weighted)
         else:
             self._normals = calculateNormalsFromVertices(self._vertices, self._vertex_count)
 
+    ##  Merge vertices that are at the same position and index the faces.
+    #
+    #   This turns a mesh with three unique vertices per face, like the ones
+    #   read from STL files, into an indexed mesh. That typically uses a third
+    #   of the memory. Colours and UV coordinates of merged vertices are taken
+    #   from the first of those vertices.
+    #
+    #   \param tolerance The distance below which vertices are merged. If 0,
+    #   only vertices with exactly the same coordinates are merged.
+    #   \param smooth_normals Whether to replace the normals with smooth
+    #   normals, weighted by the area of the faces around each vertex. If
+    #   False, the normal of the first of the merged vertices is kept.
+    def weldVertices(self, tolerance = 0.0, smooth_normals = True):
+        if self._vertices is None:
+            return
+
+        vertices = self.getVertices()
+        vertices, indices, vertex_map = weldVertices(vertices, self.getIndices(), tolerance)
+        # Merged vertices are numbered in order of first appearance, so a vertex is the first of its group where the numbering goes up.
+        highest_so_far = numpy.maximum.accumulate(vertex_map)
+        first_vertex = numpy.flatnonzero(numpy.concatenate(([True], highest_so_far[1:] > highest_so_far[:-1])))
+
+        if self._colors is not None:
+            self._colors = self.getColors()[first_vertex]
+        if self._uvs is not None:
+            self._uvs = self.getUVCoordinates()[first_vertex]
+        if self._normals is not None and not smooth_normals:
+            self._normals = self.getNormals()[first_vertex]
+        else:
+            self._normals = None
+
+        self._vertices = vertices
+        self._vertex_count = len(vertices)
+        self._indices = indices.astype(numpy.int32)
+        self._face_count = len(indices)
+
+        if smooth_normals:
+            self.calculateNormals(smooth = True)
+
     ##  Adds a 3-dimensional line to the mesh of this mesh builder.
     #
     #   \param v0 One endpoint of the line to add.
@@ -489,8 +661,6 @@ class MeshBuilder:
         minD = -depth / 2 + center.z
         maxD = depth / 2 + center.z
 
-        start = self.getVertexCount()
-
         verts = numpy.asarray([ #All 8 corners.
             [minW, minH, maxD],
             [minW, maxH, maxD],
@@ -501,33 +671,28 @@ class MeshBuilder:
             [maxW, maxH, minD],
             [maxW, minH, minD],
         ], dtype=numpy.float32)
-        self.addVertices(verts)
 
         indices = numpy.asarray([ #All 6 quads (12 triangles).
-            [start, start + 2, start + 1],
-            [start, start + 3, start + 2],
+            [0, 2, 1],
+            [0, 3, 2],
 
-            [start + 3, start + 7, start + 6],
-            [start + 3, start + 6, start + 2],
+            [3, 7, 6],
+            [3, 6, 2],
 
-            [start + 7, start + 5, start + 6],
-            [start + 7, start + 4, start + 5],
+            [7, 5, 6],
+            [7, 4, 5],
 
-            [start + 4, start + 1, start + 5],
-            [start + 4, start + 0, start + 1],
+            [4, 1, 5],
+            [4, 0, 1],
 
-            [start + 1, start + 6, start + 5],
-            [start + 1, start + 2, start + 6],
+            [1, 6, 5],
+            [1, 2, 6],
 
-            [start + 0, start + 7, start + 3],
-            [start + 0, start + 4, start + 7]
+            [0, 7, 3],
+            [0, 4, 7]
         ], dtype=numpy.int32)
-        self.addIndices(indices)
 
-        if color: #If we have a colour, add a colour to all of the vertices.
-            vertex_count = self.getVertexCount()
-            for i in range(1, 9):
-                self.setVertexColor(vertex_count - i, color)
+        self.addIndexedFaces(verts, indices, colors = _colorArray(color, len(verts)))
 
     ##  Add an arc to the mesh of this mesh builder.
     #
@@ -546,27 +711,23 @@ class MeshBuilder:
     #   provided, the colour is determined by the shader.
     def addArc(self, radius, axis, angle = math.pi * 2, center = Vector(0, 0, 0), sections = 32, color = None):
         #We'll compute the vertices of the arc by computing an initial point and
-        #rotating the initial point with a rotation matrix.
+        #rotating the initial point around the axis for each section at once.
         if axis == Vector.Unit_Y:
             start = axis.cross(Vector.Unit_X).normalized() * radius
         else:
             start = axis.cross(Vector.Unit_Y).normalized() * radius
 
-        angle_increment = angle / sections
-        current_angle = 0
+        k = axis.normalized().getData()
+        s = start.getData()
+        angles = numpy.linspace(0, angle, sections + 1)[:, numpy.newaxis]
+        #Rodrigues' rotation formula, rotating in the same direction as Vector.multiply with a rotation matrix.
+        points = s * numpy.cos(angles) - numpy.cross(k, s) * numpy.sin(angles) + k * k.dot(s) * (1 - numpy.cos(angles))
+        points += center.getData()
 
-        point = start + center
-        m = Matrix()
-        while current_angle <= angle: #Add each of the vertices.
-            self.addVertex(point.x, point.y, point.z)
-            current_angle += angle_increment
-            m.setByRotationAxis(current_angle, axis)
-            point = start.multiply(m) + center #Get the next vertex by rotating the start position with a matrix.
-            self.addVertex(point.x, point.y, point.z)
-
-            if color: #If we have a colour, add that colour to the new vertex.
-                self.setVertexColor(self.getVertexCount() - 2, color)
-                self.setVertexColor(self.getVertexCount() - 1, color)
+        #Each line segment gets its own pair of vertices.
+        segment_ends = numpy.repeat(numpy.arange(sections + 1), 2)[1:-1]
+        vertices = points[segment_ends].astype(numpy.float32)
+        self._appendVertices(vertices, colors = _colorArray(color, len(vertices)))
 
     ##  Adds a torus to the mesh of this mesh builder.
     #
@@ -593,59 +754,47 @@ class MeshBuilder:
     #   If no axis is provided and the angle of rotation is nonzero, the torus
     #   will be rotated around the Y-axis.
     def addDonut(self, inner_radius, outer_radius, width, center = Vector(0, 0, 0), sections = 32, color = None, angle = 0, axis = Vector.Unit_Y):
-        vertices = []
-        indices = []
-        colors = []
-
-        start = self.getVertexCount() #Starting index.
-
-        for i in range(sections):
-            v1 = start + i * 3 #Indices for each of the vertices we'll add for this section.
-            v2 = v1 + 1
-            v3 = v1 + 2
-            v4 = v1 + 3
-            v5 = v1 + 4
-            v6 = v1 + 5
-
-            if i+1 >= sections: # connect the end to the start
-                v4 = start
-                v5 = start + 1
-                v6 = start + 2
-
-            theta = i * math.pi / (sections / 2) #Angle of this piece around torus perimeter.
-            c = math.cos(theta) #X-coordinate around torus perimeter.
-            s = math.sin(theta) #Y-coordinate around torus perimeter.
-
-            #One vertex on the inside perimeter, two on the outside perimiter (up and down).
-            vertices.append( [inner_radius * c, inner_radius * s, 0] )
-            vertices.append( [outer_radius * c, outer_radius * s, width] )
-            vertices.append( [outer_radius * c, outer_radius * s, -width] )
-
-            #Connect the vertices to the next segment.
-            indices.append( [v1, v4, v5] )
-            indices.append( [v2, v1, v5] )
-
-            indices.append( [v2, v5, v6] )
-            indices.append( [v3, v2, v6] )
-
-            indices.append( [v3, v6, v4] )
-            indices.append( [v1, v3, v4] )
-
-            if color: #If we have a colour, add it to the vertices.
-                colors.append( [color.r, color.g, color.b, color.a] )
-                colors.append( [color.r, color.g, color.b, color.a] )
-                colors.append( [color.r, color.g, color.b, color.a] )
+        theta = numpy.arange(sections) * math.pi / (sections / 2) #Angle of each piece around torus perimeter.
+        c = numpy.cos(theta) #X-coordinate around torus perimeter.
+        s = numpy.sin(theta) #Y-coordinate around torus perimeter.
+
+        #One vertex on the inside perimeter, two on the outside perimiter (up and down).
+        vertices = numpy.zeros((sections, 3, 3), dtype = numpy.float32)
+        vertices[:, 0, 0] = inner_radius * c
+        vertices[:, 0, 1] = inner_radius * s
+        vertices[:, 1, 0] = outer_radius * c
+        vertices[:, 1, 1] = outer_radius * s
+        vertices[:, 1, 2] = width
+        vertices[:, 2, 0] = outer_radius * c
+        vertices[:, 2, 1] = outer_radius * s
+        vertices[:, 2, 2] = -width
+        vertices = vertices.reshape((-1, 3))
+
+        #Connect the vertices to the next segment. The last segment connects to the first.
+        v1 = numpy.arange(sections, dtype = numpy.int32) * 3
+        v2 = v1 + 1
+        v3 = v1 + 2
+        v4 = numpy.roll(v1, -1)
+        v5 = v4 + 1
+        v6 = v4 + 2
+        indices = numpy.stack([
+            numpy.stack([v1, v4, v5], axis = 1),
+            numpy.stack([v2, v1, v5], axis = 1),
+
+            numpy.stack([v2, v5, v6], axis = 1),
+            numpy.stack([v3, v2, v6], axis = 1),
+
+            numpy.stack([v3, v6, v4], axis = 1),
+            numpy.stack([v1, v3, v4], axis = 1)
+        ], axis = 1).reshape((-1, 3))
 
         #Rotate the resulting torus around the specified axis.
         matrix = Matrix()
         matrix.setByRotationAxis(angle, axis)
-        vertices = numpy.asarray(vertices, dtype = numpy.float32)
         vertices = vertices.dot(matrix.getData()[0:3, 0:3])
         vertices[:] += center.getData() #And translate to the desired position.
 
-        self.addVertices(vertices)
-        self.addIndices(numpy.asarray(indices, dtype = numpy.int32))
-        self.addColors(numpy.asarray(colors, dtype = numpy.float32))
+        self.addIndexedFaces(vertices, indices, colors = _colorArray(color, len(vertices)))
 
     ##  Adds a pyramid to the mesh of this mesh builder.
     #
@@ -670,8 +819,6 @@ class MeshBuilder:
         minD = -depth / 2
         maxD = depth / 2
 
-        start = self.getVertexCount() #Starting index.
-
         matrix = Matrix()
         matrix.setByRotationAxis(angle, axis)
         verts = numpy.asarray([ #All 5 vertices of the pyramid.
@@ -683,22 +830,17 @@ class MeshBuilder:
         ], dtype=numpy.float32)
         verts = verts.dot(matrix.getData()[0:3,0:3]) #Rotate the pyramid around the axis.
         verts[:] += center.getData()
-        self.addVertices(verts)
 
         indices = numpy.asarray([ #Connect the vertices to each other (6 triangles).
-            [start, start + 1, start + 4], #The four sides of the pyramid.
-            [start + 1, start + 3, start + 4],
-            [start + 3, start + 2, start + 4],
-            [start + 2, start, start + 4],
-            [start, start + 3, start + 1], #The base of the pyramid.
-            [start, start + 2, start + 3]
+            [0, 1, 4], #The four sides of the pyramid.
+            [1, 3, 4],
+            [3, 2, 4],
+            [2, 0, 4],
+            [0, 3, 1], #The base of the pyramid.
+            [0, 2, 3]
         ], dtype=numpy.int32)
-        self.addIndices(indices)
 
-        if color: #If we have a colour, add the colour to each of the vertices.
-            vertex_count = self.getVertexCount()
-            for i in range(1, 6):
-                self.setVertexColor(vertex_count - i, color)
+        self.addIndexedFaces(verts, indices, colors = _colorArray(color, len(verts)))
 
     ##  Create a mesh from points that represent a convex hull.
     #   \param hull_points list of xy values
@@ -759,3 +901,41 @@ class MeshBuilder:
         self.addQuad(v0, v1, v2, v3, color=color, normal = normal)
 
         return True
+
+
+##  Create a copy of an array with room for more rows.
+#
+#   The new array has at least twice as many rows as the old one, and the extra
+#   rows are filled with zeros.
+#
+#   \param array The numpy array to grow.
+#   \param minimum_size The minimum number of rows of the new array.
+#   \return The new array.
+def _grownArray(array, minimum_size):
+    grown = numpy.zeros((max(minimum_size, len(array) * 2), ) + array.shape[1:], dtype = array.dtype)
+    grown[0:len(array)] = array
+    return grown
+
+
+##  Create an array with the same colour for a number of vertices.
+#
+#   \param color The colour to repeat, or None.
+#   \param count The number of vertices.
+#   \return A numpy array with one RGBA row per vertex, or None if no colour
+#   was given.
+def _colorArray(color, count):
+    if not color:
+        return None
+    return numpy.tile(numpy.array([color.r, color.g, color.b, color.a], dtype = numpy.float32), (count, 1))
+
+
+##  Create a read-only view on an array, without copying it.
+#
+#   \param array The numpy array to view, or None.
+#   \return The read-only view, or None if no array was given.
+def _readOnlyView(array):
+    if array is None:
+        return None
+    view = array.view()
+    view.flags.writeable = False
+    return view
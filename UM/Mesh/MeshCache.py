@@ -0,0 +1,220 @@
+# Copyright (c) 2018 Ultimaker B.V.
+# Uranium is released under the terms of the LGPLv3 or higher.
+
+import hashlib
+import os
+import struct
+from typing import Optional
+
+from UM.LockFile import LockFile
+from UM.Logger import Logger
+from UM.Mesh.MeshData import MeshData, MeshType
+from UM.Mesh.MeshFormat import MeshFormatError, readMesh, writeMesh
+
+##  Version of the layout of the cache files.
+#
+#   This is part of every cache key, so changing the layout invalidates all
+#   cached meshes instead of misreading them.
+MESH_CACHE_VERSION = 2
+
+##  Extension of the cache files.
+MESH_CACHE_EXTENSION = ".mesh"
+
+##  Name of the lock file that guards the cache directory.
+MESH_CACHE_LOCK_FILENAME = "mesh_cache.lock"
+
+##  Default maximum total size of the cache files, in bytes.
+DEFAULT_MAX_CACHE_SIZE = 512 * 1024 * 1024
+
+##  Size of the samples of the file contents that are hashed for the key.
+CONTENT_SAMPLE_SIZE = 64 * 1024
+
+
+##  Cache of parsed meshes on disk.
+#
+#   Reading a large mesh file can take a long time. This cache stores the
+#   result of reading it in a binary layout that can be memory-mapped, so
+#   opening the same file again costs next to nothing. Entries are keyed by
+#   the path, size and modification time of the file and a hash of samples of
+#   its contents.
+#
+#   When the cache grows larger than its maximum size, the entries that were
+#   used least recently are removed. Access to the cache directory is guarded
+#   by a lock file, so multiple instances of the application can share it.
+class MeshCache:
+    ##  Creates a cache in a directory.
+    #
+    #   \param path The directory to store the cache files in. It is created
+    #   if it does not exist yet.
+    #   \param max_size The maximum total size of the cache files, in bytes.
+    def __init__(self, path: str, max_size: int = DEFAULT_MAX_CACHE_SIZE):
+        self._path = path
+        self._max_size = max_size
+        os.makedirs(self._path, exist_ok = True)
+
+    def getPath(self) -> str:
+        return self._path
+
+    def getMaxSize(self) -> int:
+        return self._max_size
+
+    def setMaxSize(self, max_size: int):
+        self._max_size = max_size
+
+    ##  Compute the key of the cache entry for a file.
+    #
+    #   \param file_name The path to the file that was read.
+    #   \param settings A string describing the settings of the reader that
+    #   affect the result, so that changing them results in a different key.
+    #   \return The key, or None if the file could not be accessed.
+    def getKey(self, file_name: str, settings: str = "") -> Optional[str]:
+        file_name = os.path.abspath(file_name)
+        try:
+            stat = os.stat(file_name)
+            content_hash = hashlib.sha1()
+            with open(file_name, "rb") as f:
+                # Hash samples at the start, the middle and the end, which is fast even for huge files.
+                for offset in (0, (stat.st_size - CONTENT_SAMPLE_SIZE) // 2, stat.st_size - CONTENT_SAMPLE_SIZE):
+                    f.seek(max(offset, 0))
+                    content_hash.update(f.read(CONTENT_SAMPLE_SIZE))
+        except OSError:
+            return None
+
+        key = hashlib.sha1()
+        key.update("{version}\n{path}\n{size}\n{mtime}\n{content}\n{settings}".format(
+            version = MESH_CACHE_VERSION,
+            path = file_name,
+            size = stat.st_size,
+            mtime = stat.st_mtime_ns,
+            content = content_hash.hexdigest(),
+            settings = settings
+        ).encode("utf-8"))
+        return key.hexdigest()
+
+    ##  Load a mesh from the cache.
+    #
+    #   The arrays of the mesh are memory-mapped from the cache file, so they
+    #   are only read from disk when they are used.
+    #
+    #   \param key The key of the cache entry, as given by getKey.
+    #   \return The cached mesh, or None if it is not in the cache.
+    def load(self, key: str) -> Optional[MeshData]:
+        file_name = self._getEntryFileName(key)
+        with self._lock():
+            if not os.path.exists(file_name):
+                return None
+            try:
+                mesh = self._readEntry(file_name)
+                os.utime(file_name)  # Mark as recently used.
+            except (OSError, ValueError, KeyError, struct.error, MeshFormatError):
+                Logger.logException("w", "Unable to read mesh cache file %s", file_name)
+                self._removeEntry(file_name)
+                return None
+        return mesh
+
+    ##  Check whether there is an entry for a key in the cache.
+    #
+    #   \param key The key of the cache entry, as given by getKey.
+    def contains(self, key: str) -> bool:
+        return os.path.exists(self._getEntryFileName(key))
+
+    ##  Store a mesh in the cache.
+    #
+    #   If the convex hull of the mesh is known, it is stored as well, so it
+    #   doesn't need to be computed again when the mesh is loaded. If the cache
+    #   becomes too large, the least recently used entries are removed.
+    #
+    #   \param key The key of the cache entry, as given by getKey.
+    #   \param mesh The mesh to store.
+    #   \param evict Whether to remove old entries if the cache becomes too
+    #   large. When storing many meshes at once, it can be better to call
+    #   evict afterwards.
+    #   \param compute_convex_hull Whether to compute the convex hull to store
+    #   it, if it isn't known yet. Computing it takes a while, so this is only
+    #   worth it when the mesh is not read on a thread that is waited for.
+    #   \return True if the mesh was stored, False otherwise.
+    def store(self, key: str, mesh: MeshData, evict: bool = True, compute_convex_hull: bool = False) -> bool:
+        if mesh.getVertices() is None or mesh.getType() != MeshType.faces:
+            return False
+
+        file_name = self._getEntryFileName(key)
+        temporary_file_name = "{0}.{1}.tmp".format(file_name, os.getpid())
+        with self._lock():
+            try:
+                with open(temporary_file_name, "wb") as f:
+                    writeMesh(f, mesh, quantize = False, compute_convex_hull = compute_convex_hull)
+                os.replace(temporary_file_name, file_name)  # Other processes never see a partially written file.
+            except OSError:
+                Logger.logException("w", "Unable to write mesh cache file %s", file_name)
+                self._removeEntry(temporary_file_name)
+                return False
+            if evict:
+                self._evict()
+        return True
+
+    ##  Remove the least recently used entries until the cache is small
+    #   enough.
+    def evict(self):
+        with self._lock():
+            self._evict()
+
+    ##  Remove all entries from the cache.
+    def clear(self):
+        with self._lock():
+            for entry in self._getEntries():
+                self._removeEntry(entry.path)
+
+    ##  Get the total size of all cache files, in bytes.
+    def getSize(self) -> int:
+        return sum(entry.stat().st_size for entry in self._getEntries())
+
+    def _getEntryFileName(self, key: str) -> str:
+        return os.path.join(self._path, key + MESH_CACHE_EXTENSION)
+
+    def _getEntries(self):
+        try:
+            return [entry for entry in os.scandir(self._path) if entry.name.endswith(MESH_CACHE_EXTENSION)]
+        except OSError:
+            return []
+
+    def _lock(self) -> LockFile:
+        return LockFile(
+            os.path.join(self._path, MESH_CACHE_LOCK_FILENAME),
+            timeout = 10,
+            wait_msg = "Waiting for lock file in mesh cache directory to disappear."
+        )
+
+    ##  Read a mesh from a cache file.
+    #
+    #   \param file_name The path to the cache file.
+    #   \return The mesh with its arrays memory-mapped from the file.
+    def _readEntry(self, file_name: str) -> MeshData:
+        mesh = readMesh(file_name)
+        if mesh is None:
+            raise MeshFormatError("The cache file contains no mesh.")
+        return mesh
+
+    def _removeEntry(self, file_name: str):
+        try:
+            os.remove(file_name)
+        except OSError:  # Still in use (on Windows) or already removed by another process.
+            pass
+
+    ##  Remove the least recently used entries until the cache is small
+    #   enough.
+    #
+    #   This must be called while holding the lock.
+    def _evict(self):
+        entries = []
+        for entry in self._getEntries():
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_size <= self._max_size:
+                break
+            self._removeEntry(path)
+            total_size -= size
@@ -0,0 +1,63 @@
+# Copyright (c) 2018 Ultimaker B.V.
+# Uranium is released under the terms of the LGPLv3 or higher.
+
+from typing import Optional
+
+import numpy
+
+
+##  A part of a mesh, as produced by a MeshReader that reads in chunks.
+#
+#   The chunks of a file are added to a MeshBuilder one after another. The
+#   vertices of a chunk are appended to the vertices of the earlier chunks.
+#   The indices of a chunk refer to all vertices read so far, so faces can use
+#   vertices of earlier chunks. If a chunk has no indices, every three
+#   consecutive vertices of the chunk form a face.
+class MeshChunk:
+    ##  Creates a chunk of mesh data.
+    #
+    #   \param vertices A numpy array with one row of X, Y and Z coordinates
+    #   per vertex.
+    #   \param normals (Optional) A numpy array with a normal for each vertex.
+    #   \param indices (Optional) A numpy array with one row of three vertex
+    #   indices per face.
+    #   \param colors (Optional) A numpy array with an RGBA colour for each
+    #   vertex.
+    #   \param uvs (Optional) A numpy array with UV coordinates for each
+    #   vertex.
+    #   \param expected_vertex_count (Optional) The number of vertices that the
+    #   whole mesh is expected to have, if the reader knows. This is used to
+    #   reserve memory for the complete mesh at once.
+    #   \param expected_face_count (Optional) The number of faces that the
+    #   whole mesh is expected to have, if the reader knows.
+    def __init__(self, vertices: numpy.ndarray, normals: Optional[numpy.ndarray] = None, indices: Optional[numpy.ndarray] = None,
+                 colors: Optional[numpy.ndarray] = None, uvs: Optional[numpy.ndarray] = None,
+                 expected_vertex_count: int = 0, expected_face_count: int = 0):
+        self._vertices = vertices
+        self._normals = normals
+        self._indices = indices
+        self._colors = colors
+        self._uvs = uvs
+        self._expected_vertex_count = expected_vertex_count
+        self._expected_face_count = expected_face_count
+
+    def getVertices(self) -> numpy.ndarray:
+        return self._vertices
+
+    def getNormals(self) -> Optional[numpy.ndarray]:
+        return self._normals
+
+    def getIndices(self) -> Optional[numpy.ndarray]:
+        return self._indices
+
+    def getColors(self) -> Optional[numpy.ndarray]:
+        return self._colors
+
+    def getUVCoordinates(self) -> Optional[numpy.ndarray]:
+        return self._uvs
+
+    def getExpectedVertexCount(self) -> int:
+        return self._expected_vertex_count
+
+    def getExpectedFaceCount(self) -> int:
+        return self._expected_face_count
@@ -6,19 +6,32 @@ from UM.Math.AxisAlignedBox import AxisAlignedBox
 from UM.Logger import Logger
 from UM.Math import NumPyUtil
 from UM.Math.Matrix import Matrix
+from UM.Math.Polygon import Polygon
 
 from enum import Enum
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 import threading
 import numpy
 import numpy.linalg
+import scipy.sparse
+import scipy.sparse.csgraph
 import scipy.spatial
 import hashlib
 from time import time
 numpy.seterr(all="ignore") # Ignore warnings (dev by zero)
 
 MAXIMUM_HULL_VERTICES_COUNT = 1024   # Maximum number of vertices to have in the convex hull.
+CHUNK_VERTEX_COUNT = 1048576   # Number of vertices that are processed at once by operations that work in chunks.
+
+##  Number of components and numpy type of each OpenGL type of vertex attributes.
+INTERLEAVED_ATTRIBUTE_TYPES = {
+    "int": (1, numpy.int32),
+    "float": (1, numpy.float32),
+    "vector2f": (2, numpy.float32),
+    "vector3f": (3, numpy.float32),
+    "vector4f": (4, numpy.float32)
+}
 
 class MeshType(Enum):
     faces = 1 # Start at one, as 0 is false (so if this is used in a if statement, it's always true)
@@ -40,9 +53,10 @@ Reuse = object()
 #   faces and the three columns being the indices that refer to the individual vertices.
 #
 #   attributes: a dict with {"value", "opengl_type", "opengl_name"} type in vector2f, vector3f, uniforms, ...
+#   convex_hull: (optional) a precomputed convex hull of the vertices, so it doesn't need to be computed again.
 class MeshData:
     def __init__(self, vertices=None, normals=None, indices=None, colors=None, uvs=None, file_name=None,
-                 center_position=None, zero_position=None, type = MeshType.faces, attributes=None):
+                 center_position=None, zero_position=None, type = MeshType.faces, attributes=None, convex_hull=None):
         self._vertices = NumPyUtil.immutableNDArray(vertices)
         self._normals = NumPyUtil.immutableNDArray(normals)
         self._indices = NumPyUtil.immutableNDArray(indices)
@@ -59,9 +73,18 @@ class MeshData:
             self._zero_position = zero_position
         else:
             self._zero_position = Vector(0, 0, 0) # type: Vector
-        self._convex_hull = None    # type: Optional[scipy.spatial.ConvexHull]
+        self._convex_hull = convex_hull    # type: Optional[scipy.spatial.ConvexHull]
         self._convex_hull_vertices = None  # type: Optional[numpy.ndarray]
         self._convex_hull_lock = threading.Lock()
+        self._hash = None  # type: Optional[str]
+        self._extents = None  # type: Optional[AxisAlignedBox]
+        self._levels_of_detail = []  # type: List[Tuple[float, MeshData]]
+        self._volume = None  # type: Optional[float]
+        self._surface_area = None  # type: Optional[float]
+        self._center_of_mass = None  # type: Optional[Vector]
+        self._center_of_mass_from_volume = False
+        self._footprint = None  # type: Optional[Polygon]
+        self._interleaved_vertex_layout = None  # type: Optional[Tuple[int, List[Dict[str, Any]]]]
 
         self._attributes = {}
         if attributes is not None:
@@ -91,10 +114,25 @@ class MeshData:
         return MeshData(vertices=vertices, normals=normals, indices=indices, colors=colors, uvs=uvs,
                         file_name=file_name, center_position=center_position, zero_position=zero_position, attributes=attributes)
 
-    def getHash(self):
-        m = hashlib.sha256()
-        m.update(self.getVerticesAsByteArray())
-        return m.hexdigest()
+    ##  Get a hash of the data of this mesh.
+    #
+    #   The hash covers all arrays and attributes, so meshes with the same hash
+    #   can be drawn with the same buffers. It is computed the first time it is
+    #   requested and then kept, since the data can't change. The arrays are
+    #   hashed in place, without copying them.
+    #
+    #   \return A hexadecimal string.
+    def getHash(self) -> str:
+        if self._hash is None:
+            m = hashlib.blake2b(digest_size = 32)
+            m.update(str(self._type).encode("utf-8"))
+            for array in (self._vertices, self._normals, self._indices, self._colors, self._uvs):
+                _updateHash(m, array)
+            for key in sorted(self._attributes):
+                m.update("{0}:{1}".format(key, self._attributes[key].get("opengl_type")).encode("utf-8"))
+                _updateHash(m, self._attributes[key].get("value"))
+            self._hash = m.hexdigest()
+        return self._hash
 
     def getCenterPosition(self) -> Vector:
         return self._center_position
@@ -149,6 +187,9 @@ class MeshData:
     def hasUVCoordinates(self) -> bool:
         return self._uvs is not None
 
+    def getUVCoordinates(self) -> numpy.ndarray:
+        return self._uvs
+
     def getFileName(self) -> str:
         return self._file_name
 
@@ -166,10 +207,92 @@ class MeshData:
                 center_position = Reuse
             zero_position = self._zero_position.multiply(transformation_matrix)
 
-            return self.set(vertices=transformed_vertices, normals=transformed_normals, center_position=center_position, zero_position=zero_position)
+            transformed = self.set(vertices=transformed_vertices, normals=transformed_normals, center_position=center_position, zero_position=zero_position)
+            # The convex hull of the transformed vertices is the transformed convex hull, so only the hull needs to be transformed.
+            with self._convex_hull_lock:
+                if self._convex_hull_vertices is None and self._convex_hull is not None:
+                    self._convex_hull_vertices = numpy.take(self._convex_hull.points, self._convex_hull.vertices, axis=0)
+                if self._convex_hull_vertices is not None:
+                    transformed._convex_hull_vertices = transformVertices(self._convex_hull_vertices, transformation)
+            self._transformMetrics(transformed, transformation)
+            return transformed
         else:
             return MeshData(vertices = self._vertices)
 
+    ##  Split this mesh into its connected components.
+    #
+    #   Faces are connected if they share a vertex. Vertices are welded for
+    #   this first, so meshes where every face has its own vertices, like
+    #   meshes read from STL files, are split as well. The components keep
+    #   the original vertices.
+    #
+    #   \param tolerance The distance below which vertices are considered the
+    #   same, as in weldVertices.
+    #   \return A list of meshes, one per component, in order of their first
+    #   face. The list only contains this mesh if it has a single component.
+    def splitConnectedComponents(self, tolerance: float = 0.0) -> List["MeshData"]:
+        if self._vertices is None or self._type != MeshType.faces:
+            return [self]
+        if self.hasIndices():
+            indices = self._indices[0:self.getFaceCount()]
+        else:
+            indices = numpy.arange(len(self._vertices) - len(self._vertices) % 3, dtype = numpy.int32).reshape((-1, 3))
+        if len(indices) == 0:
+            return [self]
+
+        start_time = time()
+        _, welded_indices, vertex_map = weldVertices(self._vertices, indices, tolerance)
+        component_count, welded_component = findConnectedComponents(welded_indices, len(vertex_map))
+        face_component = welded_component[welded_indices[:, 0]]
+        # Number the components in order of their first face.
+        labels, first_faces = numpy.unique(face_component, return_index = True)
+        if len(labels) <= 1:
+            return [self]
+        rank = numpy.empty(component_count, dtype = numpy.int64)
+        rank[labels[numpy.argsort(first_faces)]] = numpy.arange(len(labels))
+        face_component = rank[face_component]
+
+        # Group the faces by component, and number the vertices used by each component consecutively.
+        face_order = numpy.argsort(face_component, kind = "stable")
+        face_ends = numpy.cumsum(numpy.bincount(face_component))
+        component_faces = indices[face_order]
+        vertex_component = numpy.full(len(self._vertices), -1, dtype = numpy.int64)
+        vertex_component[component_faces.reshape(-1)] = numpy.repeat(face_component[face_order], 3)
+        used_vertices = numpy.flatnonzero(vertex_component >= 0)
+        vertex_order = used_vertices[numpy.argsort(vertex_component[used_vertices], kind = "stable")]
+        vertex_counts = numpy.bincount(vertex_component[vertex_order])
+        vertex_ends = numpy.cumsum(vertex_counts)
+        new_index = numpy.empty(len(self._vertices), dtype = numpy.int32)
+        new_index[vertex_order] = numpy.arange(len(vertex_order)) - (vertex_ends - vertex_counts)[vertex_component[vertex_order]]
+        component_faces = new_index[component_faces]
+
+        def select(array, vertices):
+            return array[vertices] if array is not None else None
+
+        components = []
+        face_start = vertex_start = 0
+        for face_end, vertex_end in zip(face_ends, vertex_ends):
+            vertices = vertex_order[vertex_start:vertex_end]
+            attributes = None
+            if self._attributes:
+                attributes = {key: {"value": attribute["value"][vertices], "opengl_name": attribute["opengl_name"], "opengl_type": attribute["opengl_type"]}
+                              for key, attribute in self._attributes.items()}
+            components.append(MeshData(
+                vertices = self._vertices[vertices],
+                normals = select(self._normals, vertices),
+                indices = component_faces[face_start:face_end] if self.hasIndices() else None,
+                colors = select(self._colors, vertices),
+                uvs = select(self._uvs, vertices),
+                file_name = self._file_name,
+                center_position = self._center_position,
+                zero_position = self._zero_position,
+                attributes = attributes
+            ))
+            face_start, vertex_start = face_end, vertex_end
+
+        Logger.log("d", "Splitting a mesh with %s faces into %s components took %s seconds", len(indices), len(components), time() - start_time)
+        return components
+
     ##  Get the extents of this mesh.
     #
     #   \param matrix The transformation matrix from model to world coordinates.
@@ -177,9 +300,14 @@ class MeshData:
         if self._vertices is None:
             return None
 
-        data = numpy.pad(self.getConvexHullVertices(), ((0, 0), (0, 1)), "constant", constant_values=(0.0, 1.0))
-
-        if matrix is not None:
+        if matrix is None:
+            if self._extents is not None:
+                return self._extents
+            # Without a transformation the extents of all vertices are the same as those of the hull. Finding them is
+            # much cheaper than computing the hull, so this doesn't have to wait for it.
+            data = self._convex_hull_vertices if self._convex_hull_vertices is not None else self._vertices
+        else:
+            data = numpy.pad(self.getConvexHullVertices(), ((0, 0), (0, 1)), "constant", constant_values=(0.0, 1.0))
             transposed = matrix.getTransposed().getData()
             data = data.dot(transposed)
             data += transposed[:, 3]
@@ -188,41 +316,276 @@ class MeshData:
         min = data.min(axis=0)
         max = data.max(axis=0)
 
-        return AxisAlignedBox(minimum=Vector(min[0], min[1], min[2]), maximum=Vector(max[0], max[1], max[2]))
+        extents = AxisAlignedBox(minimum=Vector(min[0], min[1], min[2]), maximum=Vector(max[0], max[1], max[2]))
+        if matrix is None:
+            self._extents = extents
+        return extents
 
     ##  Get all vertices of this mesh as a bytearray
     #
-    #   \return A bytearray object with 3 floats per vertex.
-    def getVerticesAsByteArray(self) -> Optional[bytes]:
-        if self._vertices is None:
-            return None
-        return self._vertices.tostring()
+    #   The bytes are not copied, so the result is a read-only view on the
+    #   vertices.
+    #
+    #   \return A memoryview with 3 floats per vertex.
+    def getVerticesAsByteArray(self) -> Optional[memoryview]:
+        return _byteView(self._vertices)
 
     ##  Get all normals of this mesh as a bytearray
     #
-    #   \return A bytearray object with 3 floats per normal.
-    def getNormalsAsByteArray(self) -> Optional[bytes]:
-        if self._normals is None:
-            return None
-        return self._normals.tostring()
+    #   \return A memoryview with 3 floats per normal.
+    def getNormalsAsByteArray(self) -> Optional[memoryview]:
+        return _byteView(self._normals)
 
     ##  Get all indices as a bytearray
     #
-    #   \return A bytearray object with 3 ints per face.
-    def getIndicesAsByteArray(self) -> Optional[bytes]:
-        if self._indices is None:
-            return None
-        return self._indices.tostring()
+    #   \return A memoryview with 3 ints per face.
+    def getIndicesAsByteArray(self) -> Optional[memoryview]:
+        return _byteView(self._indices)
+
+    def getColorsAsByteArray(self) -> Optional[memoryview]:
+        return _byteView(self._colors)
+
+    def getUVCoordinatesAsByteArray(self) -> Optional[memoryview]:
+        return _byteView(self._uvs)
+
+    def getAttributeAsByteArray(self, key: str) -> Optional[memoryview]:
+        return _byteView(self._attributes[key]["value"])
 
-    def getColorsAsByteArray(self) -> Optional[bytes]:
-        if self._colors is None:
+    ##  Get the layout of the interleaved vertex buffer of this mesh.
+    #
+    #   \return A tuple of the number of bytes per vertex and a list with a
+    #   dict for each vertex attribute in the buffer, with the keys
+    #   "opengl_name", "opengl_type" and "offset". The offset is in bytes from
+    #   the start of a vertex. Attributes of a type that can't be put in the
+    #   buffer are left out.
+    def getInterleavedVertexLayout(self):
+        # The layout is needed for every draw call, so it is only determined once.
+        if self._interleaved_vertex_layout is None:
+            layout = []
+            stride = 0
+            for opengl_name, opengl_type, _ in self._getVertexAttributes():
+                if opengl_type not in INTERLEAVED_ATTRIBUTE_TYPES:
+                    Logger.log("e", "Attribute with name [%s] uses non implemented type [%s]." % (opengl_name, opengl_type))
+                    continue
+                layout.append({"opengl_name": opengl_name, "opengl_type": opengl_type, "offset": stride})
+                components, dtype = INTERLEAVED_ATTRIBUTE_TYPES[opengl_type]
+                stride += components * numpy.dtype(dtype).itemsize
+            self._interleaved_vertex_layout = (stride, layout)
+        return self._interleaved_vertex_layout
+
+    ##  Get the data of all vertex attributes in a single buffer.
+    #
+    #   The position, normal, colour, UV coordinates and custom attributes of
+    #   each vertex are next to each other in the buffer, as described by
+    #   getInterleavedVertexLayout. The buffer is a new copy of the data, which
+    #   is not kept, so it only takes memory while it is being uploaded.
+    #
+    #   \param start The first vertex to put in the buffer.
+    #   \param end The vertex after the last vertex to put in the buffer, or
+    #   None for all vertices from the start. Uploading a large mesh in ranges
+    #   of vertices keeps the extra memory small.
+    #   \return A memoryview with the bytes of the buffer, or None if this
+    #   mesh has no vertices.
+    def getInterleavedVertexBuffer(self, start: int = 0, end: Optional[int] = None) -> Optional[memoryview]:
+        if self._vertices is None:
             return None
-        return self._colors.tostring()
+        end = self._vertex_count if end is None else min(end, self._vertex_count)
+        stride, layout = self.getInterleavedVertexLayout()
+        dtype = numpy.dtype({
+            "names": [attribute["opengl_name"] for attribute in layout],
+            "formats": [(INTERLEAVED_ATTRIBUTE_TYPES[attribute["opengl_type"]][1], (INTERLEAVED_ATTRIBUTE_TYPES[attribute["opengl_type"]][0], )) for attribute in layout],
+            "offsets": [attribute["offset"] for attribute in layout],
+            "itemsize": stride
+        })
+        data = numpy.zeros(max(end - start, 0), dtype = dtype)
+        arrays = {opengl_name: array for opengl_name, _, array in self._getVertexAttributes()}
+        for attribute in layout:
+            data[attribute["opengl_name"]] = arrays[attribute["opengl_name"]][start:end].reshape((len(data), -1))
+        return _byteView(data)
+
+    ##  Get the arrays that are part of the interleaved vertex buffer.
+    #
+    #   \return A generator of tuples of the OpenGL name, OpenGL type and
+    #   array of each vertex attribute.
+    def _getVertexAttributes(self):
+        yield "a_vertex", "vector3f", self._vertices
+        if self._normals is not None:
+            yield "a_normal", "vector3f", self._normals
+        if self._colors is not None:
+            yield "a_color", "vector4f", self._colors
+        if self._uvs is not None:
+            yield "a_uvs", "vector2f", self._uvs
+        for attribute_name in self.attributeNames():
+            attribute = self._attributes[attribute_name]
+            yield attribute["opengl_name"], attribute["opengl_type"], attribute["value"]
+
+    ##  Get the simplified versions of this mesh.
+    #
+    #   \return A list of tuples of the maximum distance that vertices were
+    #   moved by the simplification, and the simplified mesh, from fine to
+    #   coarse. The list is empty if there are none.
+    def getLevelsOfDetail(self) -> List[Tuple[float, "MeshData"]]:
+        return self._levels_of_detail
+
+    ##  Set the simplified versions of this mesh, for drawing it when it is
+    #   small on the screen.
+    #
+    #   These don't change the mesh itself, and are only used for displaying
+    #   it. They are usually made by MeshSimplifier.buildLevelsOfDetail.
+    #
+    #   \param levels A list of tuples of the maximum error and the simplified
+    #   mesh, from fine to coarse.
+    def setLevelsOfDetail(self, levels: List[Tuple[float, "MeshData"]]):
+        self._levels_of_detail = levels
+
+    ##  Get the coarsest simplified version of this mesh that is accurate
+    #   enough.
+    #
+    #   \param max_error The maximum distance, in the coordinates of the mesh,
+    #   that vertices may be moved by the simplification.
+    #   \return A simplified mesh, or this mesh if none is accurate enough.
+    def getLevelOfDetail(self, max_error: float) -> "MeshData":
+        result = self
+        for error, level in self._levels_of_detail:
+            if error > max_error:
+                break
+            result = level
+        return result
+
+    #######################################################################
+    # Metrics
+    #######################################################################
+
+    ##  Get the signed volume that is enclosed by this mesh.
+    #
+    #   The volume is positive if the faces are wound counter-clockwise when
+    #   seen from the outside. It is only meaningful for closed meshes. It is
+    #   computed the first time it is requested, and kept through
+    #   getTransformed.
+    #
+    #   \return \type{float} The volume, in cubed units of the vertices.
+    def getVolume(self) -> float:
+        if self._volume is None:
+            self._computeMetrics()
+        return self._volume
+
+    ##  Get the total area of the faces of this mesh.
+    #
+    #   \return \type{float} The area, in squared units of the vertices.
+    def getSurfaceArea(self) -> float:
+        if self._surface_area is None:
+            self._computeMetrics()
+        return self._surface_area
+
+    ##  Get the centre of mass of this mesh, assuming a uniform density.
+    #
+    #   For meshes that don't enclose a volume, this is the centre of their
+    #   surface instead, or the average of the vertices if they have no faces.
+    #
+    #   \return \type{Vector} The centre of mass, or None if there are no vertices.
+    def getCenterOfMass(self) -> Optional[Vector]:
+        if self._center_of_mass is None:
+            self._computeMetrics()
+        return self._center_of_mass
 
-    def getUVCoordinatesAsByteArray(self) -> Optional[bytes]:
-        if self._uvs is None:
+    ##  Get the area that this mesh covers on the build plate.
+    #
+    #   This is the convex hull of the mesh, projected on the X/Z plane.
+    #
+    #   \param matrix The transformation matrix from model to world coordinates.
+    #   \return \type{Polygon} The footprint, or None if there are no vertices.
+    def getFootprint(self, matrix: Optional[Matrix] = None) -> Optional[Polygon]:
+        if self._vertices is None:
             return None
-        return self._uvs.tostring()
+        if matrix is None and self._footprint is not None:
+            return self._footprint
+
+        if self.getConvexHull() is not None:
+            points = self.getConvexHullVertices()
+        else:
+            points = self._vertices  # Flat meshes have no 3D hull, but may well have a footprint.
+        if matrix is not None:
+            points = transformVertices(points, matrix)
+        footprint = Polygon(numpy.array(points[:, [0, 2]], dtype = numpy.float64)).getConvexHull()
+
+        if matrix is None:
+            self._footprint = footprint
+        return footprint
+
+    ##  Compute the volume, surface area and centre of mass in one pass over
+    #   the faces.
+    #
+    #   The faces are processed in chunks, relative to the first vertex to
+    #   keep the precision for meshes that are far away from the origin.
+    def _computeMetrics(self):
+        if self._vertices is None or len(self._vertices) == 0:
+            self._volume = 0.0
+            self._surface_area = 0.0
+            return
+
+        origin = self._vertices[0].astype(numpy.float64)
+        volume = 0.0
+        area = 0.0
+        volume_moment = numpy.zeros(3, dtype = numpy.float64)
+        area_moment = numpy.zeros(3, dtype = numpy.float64)
+        for triangles in self._getTriangleChunks():
+            triangles = triangles.astype(numpy.float64) - origin
+            # Every face forms a tetrahedron with the origin. Their signed volumes add up to the volume of the mesh.
+            face_volumes = numpy.einsum("ij,ij->i", triangles[:, 0], numpy.cross(triangles[:, 1], triangles[:, 2])) / 6
+            cross = numpy.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+            face_areas = numpy.sqrt(numpy.einsum("ij,ij->i", cross, cross)) / 2
+            corner_sums = triangles.sum(axis = 1)
+            volume += float(face_volumes.sum())
+            area += float(face_areas.sum())
+            volume_moment += face_volumes.dot(corner_sums) / 4  # The centroid of a tetrahedron with the origin is a quarter of the sum of its corners.
+            area_moment += face_areas.dot(corner_sums) / 3
+
+        self._volume = volume
+        self._surface_area = area
+        extents = self.getExtents()
+        size = max(extents.width, extents.height, extents.depth)
+        self._center_of_mass_from_volume = abs(volume) > 1e-9 * size ** 3
+        if self._center_of_mass_from_volume:
+            center = volume_moment / volume + origin
+        elif area > 0:
+            center = area_moment / area + origin
+        else:
+            center = self._vertices.mean(axis = 0, dtype = numpy.float64)
+        self._center_of_mass = Vector(center[0], center[1], center[2])
+
+    ##  Get the corners of the faces of this mesh, a chunk at a time.
+    #
+    #   \return A generator of arrays of faces by corners by coordinates.
+    def _getTriangleChunks(self):
+        if self._type != MeshType.faces:
+            return
+        chunk_face_count = CHUNK_VERTEX_COUNT // 3
+        if self.hasIndices():
+            indices = self._indices[0:self._face_count]
+            for start in range(0, len(indices), chunk_face_count):
+                yield self._vertices[indices[start:start + chunk_face_count]]
+        else:
+            triangles = self._vertices[0:self._vertex_count - self._vertex_count % 3].reshape((-1, 3, 3))
+            for start in range(0, len(triangles), chunk_face_count):
+                yield triangles[start:start + chunk_face_count]
+
+    ##  Give a transformed copy of this mesh the metrics that follow from the
+    #   metrics of this mesh.
+    #
+    #   The volume scales with the determinant of the transformation, and the
+    #   centre of mass of a volume is moved along with it. The surface area
+    #   is only known if the transformation keeps the shape.
+    def _transformMetrics(self, transformed: "MeshData", transformation: Matrix):
+        linear = transformation.getData()[0:3, 0:3]
+        if self._volume is not None:
+            transformed._volume = self._volume * float(numpy.linalg.det(linear))
+        gram = linear.T.dot(linear)
+        is_similarity = numpy.allclose(gram, numpy.identity(3) * gram[0, 0])
+        if self._surface_area is not None and is_similarity:
+            transformed._surface_area = self._surface_area * float(gram[0, 0])
+        if self._center_of_mass is not None and (self._center_of_mass_from_volume or is_similarity):
+            transformed._center_of_mass = self._center_of_mass.multiply(transformation.getTransposed())
+            transformed._center_of_mass_from_volume = self._center_of_mass_from_volume
 
     #######################################################################
     # Convex hull handling
@@ -231,8 +594,15 @@ class MeshData:
         points = self.getVertices()
         if points is None:
             return
+        if self._convex_hull_vertices is not None:
+            points = self._convex_hull_vertices  # Known from the mesh that this mesh was transformed from.
         self._convex_hull = approximateConvexHull(points, MAXIMUM_HULL_VERTICES_COUNT)
 
+    ##  Return whether the convex hull of this mesh has been computed already,
+    #   so that getConvexHull returns it right away.
+    def hasConvexHull(self) -> bool:
+        return self._convex_hull is not None
+
     ##  Gets the Convex Hull of this mesh
     #
     #    \return \type{scipy.spatial.ConvexHull}
@@ -248,7 +618,9 @@ class MeshData:
     def getConvexHullVertices(self) -> numpy.ndarray:
         if self._convex_hull_vertices is None:
             convex_hull = self.getConvexHull()
-            self._convex_hull_vertices = numpy.take(convex_hull.points, convex_hull.vertices, axis=0)
+            with self._convex_hull_lock:
+                if self._convex_hull_vertices is None:
+                    self._convex_hull_vertices = numpy.take(convex_hull.points, convex_hull.vertices, axis=0)
         return self._convex_hull_vertices
 
     ##  Gets transformed convex hull points
@@ -283,45 +655,119 @@ class MeshData:
 
 ##  Transform an array of vertices using a matrix
 #
+#   The vertices are transformed in chunks, straight into the result, so no
+#   temporary copies of the whole array are made.
+#
 #   \param vertices \type{numpy.ndarray} array of 3D vertices
 #   \param transformation a 4x4 matrix
+#   \param out \type{numpy.ndarray} (Optional) array to put the result in. It
+#   can be the vertices themselves to transform them in place. By default a
+#   new array of the same type as the vertices is created.
 #   \return \type{numpy.ndarray} the transformed vertices
-def transformVertices(vertices: numpy.ndarray, transformation: Matrix) -> numpy.ndarray:
-    data = numpy.pad(vertices, ((0, 0), (0, 1)), "constant", constant_values=(0.0, 0.0))
-    data = data.dot(transformation.getTransposed().getData())
-    data += transformation.getData()[:, 3]
-    data = data[:, 0:3]
-    return data
+def transformVertices(vertices: numpy.ndarray, transformation: Matrix, out: Optional[numpy.ndarray] = None) -> numpy.ndarray:
+    if out is None:
+        out = numpy.empty((len(vertices), 3), dtype = numpy.result_type(vertices.dtype, numpy.float32))
+    matrix = transformation.getData()
+    dtype = numpy.result_type(out.dtype, numpy.float32)  # Never truncate the matrix to integers.
+    rotation = matrix[0:3, 0:3].T.astype(dtype)
+    translation = matrix[0:3, 3].astype(dtype)
+
+    # Transform in chunks, so memory-mapped vertices are paged in one chunk at a time.
+    for start in range(0, len(vertices), CHUNK_VERTEX_COUNT):
+        end = start + CHUNK_VERTEX_COUNT
+        chunk = out[start:end]
+        numpy.matmul(vertices[start:end], rotation, out = chunk)
+        chunk += translation
+    return out
 
 
 ##  Transform an array of normals using a matrix
 #
+#   Normals are transformed with the inverse transpose of the matrix, so they
+#   stay perpendicular to the surface when it is scaled non-uniformly.
+#
 #   \param normals \type{numpy.ndarray} array of 3D normals
 #   \param transformation a 4x4 matrix
+#   \param out \type{numpy.ndarray} (Optional) array to put the result in. It
+#   can be the normals themselves to transform them in place.
 #   \return \type{numpy.ndarray} the transformed normals
 #
 #   \note This assumes the normals are untranslated unit normals, and returns the same.
-def transformNormals(normals: numpy.ndarray, transformation: Matrix) -> numpy.ndarray:
-    data = numpy.pad(normals, ((0, 0), (0, 1)), "constant", constant_values=(0.0, 0.0))
-
-    # Get the translation from the transformation so we can cancel it later.
-    translation = transformation.getTranslation()
-
-    # Transform the normals so they get the proper rotation
-    data = data.dot(transformation.getTransposed().getData())
-    data += transformation.getData()[:, 3]
-    data = data[:, 0:3]
-
-    # Cancel the translation since normals should always go from origin to a point on the unit sphere.
-    data[:] -= translation.getData()
+def transformNormals(normals: numpy.ndarray, transformation: Matrix, out: Optional[numpy.ndarray] = None) -> numpy.ndarray:
+    if out is None:
+        out = numpy.empty((len(normals), 3), dtype = numpy.result_type(normals.dtype, numpy.float32))
+    # For row vectors, multiplying by the inverse is the same as multiplying column vectors by the inverse transpose.
+    linear = transformation.getData()[0:3, 0:3]
+    try:
+        normal_matrix = numpy.linalg.inv(linear)
+    except numpy.linalg.LinAlgError:  # Flattened completely along some axis.
+        normal_matrix = numpy.linalg.pinv(linear)
+    normal_matrix = normal_matrix.astype(numpy.result_type(out.dtype, numpy.float32))
+
+    for start in range(0, len(normals), CHUNK_VERTEX_COUNT):
+        end = start + CHUNK_VERTEX_COUNT
+        chunk = out[start:end]
+        numpy.matmul(normals[start:end], normal_matrix, out = chunk)
+
+        # Re-normalize the normals, since the transformation can contain scaling.
+        lengths = numpy.sqrt(numpy.einsum("ij,ij->i", chunk, chunk))
+        lengths[lengths == 0] = 1
+        chunk /= lengths[:, numpy.newaxis]
+    return out
+
+
+##  Transform a number of arrays of vertices into a single array.
+#
+#   This is the same as concatenating the results of transformVertices for
+#   each array, but the result is allocated once and filled in place.
+#
+#   \param vertex_arrays A list of arrays of 3D vertices.
+#   \param transformations A list with a 4x4 matrix for each array.
+#   \param out \type{numpy.ndarray} (Optional) array to put the result in.
+#   \return \type{numpy.ndarray} the transformed vertices of all arrays
+def transformVerticesBatch(vertex_arrays: List[numpy.ndarray], transformations: List[Matrix], out: Optional[numpy.ndarray] = None) -> numpy.ndarray:
+    return _transformBatch(transformVertices, vertex_arrays, transformations, out)
 
-    # Re-normalize the normals, since the transformation can contain scaling.
-    lengths = numpy.linalg.norm(data, axis = 1)
-    data[:, 0] /= lengths
-    data[:, 1] /= lengths
-    data[:, 2] /= lengths
 
-    return data
+##  Transform a number of arrays of normals into a single array.
+#
+#   \param normal_arrays A list of arrays of 3D normals.
+#   \param transformations A list with a 4x4 matrix for each array.
+#   \param out \type{numpy.ndarray} (Optional) array to put the result in.
+#   \return \type{numpy.ndarray} the transformed normals of all arrays
+def transformNormalsBatch(normal_arrays: List[numpy.ndarray], transformations: List[Matrix], out: Optional[numpy.ndarray] = None) -> numpy.ndarray:
+    return _transformBatch(transformNormals, normal_arrays, transformations, out)
+
+
+##  Apply transformVertices or transformNormals to a number of arrays, with
+#   the results next to each other in one array.
+def _transformBatch(transform, arrays, transformations, out):
+    if out is None:
+        dtype = numpy.result_type(numpy.float32, *arrays)
+        out = numpy.empty((sum(len(array) for array in arrays), 3), dtype = dtype)
+    offset = 0
+    for array, transformation in zip(arrays, transformations):
+        transform(array, transformation, out = out[offset:offset + len(array)])
+        offset += len(array)
+    return out
+
+
+##  Store an array in a file and map it into memory.
+#
+#   The file is in the .npy format. Other processes can map the same file with
+#   numpy.load(file_name, mmap_mode = "r") to share the data without copying
+#   it. The result can be passed to MeshData as vertices, normals or indices.
+#
+#   \param array \type{numpy.ndarray} the array to store
+#   \param file_name \type{str} the path to the file to create
+#   \return \type{numpy.memmap} the array, read-only and backed by the file
+def createMemoryMappedArray(array: numpy.ndarray, file_name: str) -> numpy.memmap:
+    mapped = numpy.lib.format.open_memmap(file_name, mode = "w+", dtype = array.dtype, shape = array.shape)
+    for start in range(0, len(array), CHUNK_VERTEX_COUNT):
+        mapped[start:start + CHUNK_VERTEX_COUNT] = array[start:start + CHUNK_VERTEX_COUNT]
+    mapped.flush()
+    del mapped
+    return numpy.load(file_name, mmap_mode = "r")
 
 
 ##  Round an array of vertices off to the nearest multiple of unit
@@ -346,6 +792,28 @@ def uniqueVertices(vertices: numpy.ndarray) -> numpy.ndarray:
     return vertices[idx]  # Select the unique rows by index.
 
 
+##  Get the bytes of an array without copying them.
+#
+#   \param array The numpy array, or None.
+#   \return A memoryview of the bytes, or None if there is no array.
+def _byteView(array: Optional[numpy.ndarray]) -> Optional[memoryview]:
+    if array is None:
+        return None
+    return memoryview(numpy.ascontiguousarray(array)).cast("B")  # Only copies if the array is not contiguous.
+
+
+##  Add an array to a hash, including its type and shape.
+#
+#   \param m The hash object to update.
+#   \param array The numpy array, or None.
+def _updateHash(m, array: Optional[numpy.ndarray]):
+    if array is None:
+        m.update(b"None")
+        return
+    m.update("{0}{1}".format(array.dtype.str, array.shape).encode("utf-8"))
+    m.update(_byteView(array))
+
+
 ##  Compute an approximation of the convex hull of an array of vertices
 #
 #   \param vertices \type{numpy.ndarray} the source array of vertices
@@ -353,12 +821,16 @@ def uniqueVertices(vertices: numpy.ndarray) -> numpy.ndarray:
 #   \return \type{scipy.spatial.ConvexHull} the convex hull or None if the input was degenerate
 def approximateConvexHull(vertex_data: numpy.ndarray, target_count: int) -> Optional[scipy.spatial.ConvexHull]:
     start_time = time()
+    input_count = len(vertex_data)
 
     input_max = target_count * 50   # Maximum number of vertices we want to feed to the convex hull algorithm.
 
     unit_size = 0.0125             # Initial rounding interval. i.e. round to 0.125.
     max_unit_size = 0.01
 
+    if len(vertex_data) > CHUNK_VERTEX_COUNT:
+        vertex_data = _reduceToChunkHulls(vertex_data)
+
     # Round off vertices and extract the uniques until the number of vertices is below the input_max.
     while len(vertex_data) > input_max and unit_size <= max_unit_size:
         new_vertex_data = uniqueVertices(roundVertexArray(vertex_data, unit_size))
@@ -374,6 +846,8 @@ def approximateConvexHull(vertex_data: numpy.ndarray, target_count: int) -> Opti
     if len(vertex_data) < 4:
         return None
 
+    reduce_time = time()
+
     # Take the convex hull and keep on rounding it off until the number of vertices is below the target_count.
     hull_result = scipy.spatial.ConvexHull(vertex_data)
     vertex_data = numpy.take(hull_result.points, hull_result.vertices, axis=0)
@@ -385,11 +859,95 @@ def approximateConvexHull(vertex_data: numpy.ndarray, target_count: int) -> Opti
         unit_size *= 2
 
     end_time = time()
-    Logger.log("d", "approximateConvexHull(target_count=%s) Calculating 3D convex hull took %s seconds. %s input vertices. %s output vertices.",
-               target_count, end_time - start_time, len(vertex_data), len(hull_result.vertices))
+    Logger.log("d", "approximateConvexHull(target_count=%s) Calculating 3D convex hull took %s seconds (reducing %s, hull %s) on thread %s. %s input vertices. %s output vertices.",
+               target_count, end_time - start_time, reduce_time - start_time, end_time - reduce_time, threading.current_thread().name, input_count, len(hull_result.vertices))
     return hull_result
 
 
+##  Reduce a large array of vertices to the vertices of the convex hulls of
+#   chunks of it.
+#
+#   The convex hull of these vertices is the same as the convex hull of all
+#   vertices, but the chunks can be computed with little memory. This keeps
+#   memory-mapped vertices from being paged in all at once.
+#
+#   \param vertex_data \type{numpy.ndarray} the source array of vertices
+#   \return \type{numpy.ndarray} the vertices of the convex hulls of the chunks
+def _reduceToChunkHulls(vertex_data: numpy.ndarray) -> numpy.ndarray:
+    hull_vertices = []
+    for start in range(0, len(vertex_data), CHUNK_VERTEX_COUNT):
+        chunk = numpy.array(vertex_data[start:start + CHUNK_VERTEX_COUNT])
+        try:
+            chunk_hull = scipy.spatial.ConvexHull(chunk)
+            hull_vertices.append(numpy.take(chunk_hull.points, chunk_hull.vertices, axis = 0))
+        except (RuntimeError, ValueError):  # A flat chunk has no 3D hull, so keep all of its vertices.
+            hull_vertices.append(uniqueVertices(chunk))
+    return numpy.concatenate(hull_vertices)
+
+
+##  Find the connected components of a mesh.
+#
+#   Vertices are connected if they are part of the same face. The components
+#   are found by scipy's connected_components on the graph of the edges of
+#   the faces, which takes linear time.
+#
+#   \param indices \type{numpy.ndarray} array of faces with three vertex indices each
+#   \param vertex_count \type{int} the number of vertices
+#   \return \type{tuple} the number of components, and for each vertex the index of its component
+def findConnectedComponents(indices: numpy.ndarray, vertex_count: int) -> Tuple[int, numpy.ndarray]:
+    # Two edges per face are enough to connect its three vertices.
+    sources = numpy.concatenate((indices[:, 0], indices[:, 1]))
+    targets = numpy.concatenate((indices[:, 1], indices[:, 2]))
+    graph = scipy.sparse.coo_matrix((numpy.ones(len(sources), dtype = numpy.int8), (sources, targets)), shape = (vertex_count, vertex_count))
+    return scipy.sparse.csgraph.connected_components(graph, directed = False)
+
+
+##  Merge vertices that are at the same position.
+#
+#   Every vertex gets a key of three integers: the bits of its coordinates, or
+#   with a tolerance, its cell in a grid of that size. The keys are sorted with
+#   a lexicographic sort on all three of them, so identical keys end up next to
+#   each other. This runs in O(n log n) in numpy without comparing every pair of
+#   vertices. With a tolerance, vertices that are closer than the tolerance are
+#   merged unless a grid line lies between them.
+#
+#   \param vertices \type{numpy.ndarray} array of 3D vertices
+#   \param indices \type{numpy.ndarray} array of faces with three vertex indices each, or None if every three
+#   consecutive vertices form a face
+#   \param tolerance \type{float} the distance below which vertices are merged, 0 to merge only identical vertices
+#   \return \type{tuple} the merged vertices, the faces re-indexed to the merged vertices, and for each original
+#   vertex the index of the vertex it was merged into
+def weldVertices(vertices: numpy.ndarray, indices: Optional[numpy.ndarray] = None, tolerance: float = 0.0):
+    vertex_count = len(vertices)
+    if indices is None:
+        indices = numpy.arange(vertex_count - vertex_count % 3, dtype = numpy.int32).reshape((-1, 3))
+    if vertex_count == 0:
+        return vertices, indices, numpy.zeros(0, dtype = numpy.int32)
+
+    if tolerance > 0:
+        keys = numpy.floor(vertices / tolerance + 0.5).astype(numpy.int64)
+    else:
+        keys = (numpy.ascontiguousarray(vertices, dtype = numpy.float32) + 0).view(numpy.uint32)  # Adding 0 turns -0 into 0.
+
+    # Sort by all three coordinates, so identical vertices end up next to each other.
+    order = numpy.lexsort((keys[:, 2], keys[:, 1], keys[:, 0]))
+    sorted_keys = keys[order]
+    is_first = numpy.empty(vertex_count, dtype = bool)
+    is_first[0] = True
+    is_first[1:] = (sorted_keys[1:] != sorted_keys[:-1]).any(axis = 1)
+    group = numpy.cumsum(is_first) - 1
+
+    # Number the merged vertices in order of first appearance, which keeps the vertex order close to the original.
+    first_index = order[is_first]
+    appearance = numpy.argsort(first_index)
+    rank = numpy.empty_like(appearance)
+    rank[appearance] = numpy.arange(len(appearance))
+    vertex_map = numpy.empty(vertex_count, dtype = numpy.int32)
+    vertex_map[order] = rank[group]
+
+    return vertices[first_index[appearance]], vertex_map[indices], vertex_map
+
+
 ##  Calculate the normals of this mesh, assuming it was created by using addFace (eg; the verts are connected)
 #
 #   \param vertices \type{narray} list of vertices as a 1D list of float triples
@@ -423,24 +981,60 @@ def calculateNormalsFromVertices(vertices: numpy.ndarray, vertex_count: int) ->
     return normals
 
 
-## Calculate the normals of this mesh of triagles using indexes.
+##  Calculate the normals of a mesh of triangles using indexes.
+#
+#   The normals of all faces are computed with a single cross product. In flat
+#   mode, every vertex gets the normal of a face it belongs to. In smooth mode,
+#   the face normals are accumulated on their vertices, weighted by the area of
+#   the face or by the angle of the face at that vertex.
 #
 #   \param vertices \type{narray} list of vertices as a 1D list of float triples
 #   \param indices \type{narray} list of indices as a 1D list of integers
 #   \param face_count \type{integer} the number of triangles defined by the indices array
+#   \param smooth \type{bool} whether to average the normals of all faces around each vertex
+#   \param angle_weighted \type{bool} in smooth mode, whether to weigh the faces by their angle at the vertex
+#   instead of by their area
 #   \return \type{narray} list normals as a 1D array of floats, each group of 3 floats is a vector
-def calculateNormalsFromIndexedVertices(vertices: numpy.ndarray, indices: numpy.ndarray, face_count: int) -> numpy.ndarray:
+def calculateNormalsFromIndexedVertices(vertices: numpy.ndarray, indices: numpy.ndarray, face_count: int, smooth: bool = False, angle_weighted: bool = False) -> numpy.ndarray:
     start_time = time()
-    # Numpy magic!
-    # First, reset the normals
-    normals = numpy.zeros((face_count*3, 3), dtype=numpy.float32)
-
-    for face in indices[0:face_count]:
-        normals[face[0]] = numpy.cross(vertices[face[0]] - vertices[face[1]], vertices[face[0]] - vertices[face[2]])
-        length = numpy.linalg.norm(normals[face[0]])
-        normals[face[0]] /= length
-        normals[face[1]] = normals[face[0]]
-        normals[face[2]] = normals[face[0]]
+    indices = indices[0:face_count]
+    triangles = vertices[indices]
+    edge_1 = triangles[:, 1] - triangles[:, 0]
+    edge_2 = triangles[:, 2] - triangles[:, 0]
+    # The length of the cross product is twice the area of the face, so these are weighted by area.
+    face_normals = numpy.cross(edge_1, edge_2)
+
+    normals = numpy.zeros((len(vertices), 3), dtype = numpy.float32)
+    if not smooth:
+        # Every vertex gets the normal of (one of) the faces it belongs to.
+        for corner in range(3):
+            normals[indices[:, corner]] = face_normals
+    elif not angle_weighted:
+        for corner in range(3):
+            numpy.add.at(normals, indices[:, corner], face_normals)
+    else:
+        face_normals = _normalized(face_normals)
+        edge_3 = triangles[:, 2] - triangles[:, 1]
+        # The angle at each corner, between the two edges that meet there.
+        corner_edges = ((edge_1, edge_2), (-edge_1, edge_3), (-edge_2, -edge_3))
+        for corner, (edge_a, edge_b) in enumerate(corner_edges):
+            cosine = numpy.einsum("ij,ij->i", _normalized(edge_a), _normalized(edge_b))
+            angles = numpy.arccos(numpy.clip(cosine, -1, 1))
+            numpy.add.at(normals, indices[:, corner], face_normals * angles[:, numpy.newaxis])
+
+    normals = _normalized(normals)
     end_time = time()
     Logger.log("d", "Calculating normals took %s seconds", end_time - start_time)
     return normals
+
+
+##  Scale a list of vectors to unit length.
+#
+#   Vectors with a length of zero are left at zero.
+#
+#   \param vectors \type{narray} list of vectors as a 1D list of float triples
+#   \return \type{narray} list of unit vectors
+def _normalized(vectors: numpy.ndarray) -> numpy.ndarray:
+    lengths = numpy.linalg.norm(vectors, axis = 1)
+    lengths[lengths == 0] = 1
+    return vectors / lengths[:, numpy.newaxis]
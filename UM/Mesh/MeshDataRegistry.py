@@ -0,0 +1,63 @@
+# Copyright (c) 2018 Ultimaker B.V.
+# Uranium is released under the terms of the LGPLv3 or higher.
+
+import threading
+import weakref
+
+from UM.Mesh.MeshData import MeshData
+
+
+##  Keeps track of meshes by their contents, so identical meshes can be shared.
+#
+#   Loading the same file many times results in as many copies of the same
+#   mesh. The registry returns the mesh that was registered first for each of
+#   them instead, so they share their arrays. Since the renderer keeps its
+#   buffers with the mesh, they also share their buffers on the GPU.
+#
+#   Meshes are only kept in the registry for as long as they are used
+#   elsewhere.
+class MeshDataRegistry:
+    def __init__(self):
+        self._meshes = weakref.WeakValueDictionary()  # type: weakref.WeakValueDictionary[tuple, MeshData]
+        self._lock = threading.Lock()  # Meshes are read in jobs, so this can be used from multiple threads.
+
+    ##  Get the registered mesh that is identical to a mesh.
+    #
+    #   \param mesh The mesh to look up.
+    #   \return An identical mesh that was registered earlier, or the mesh
+    #   itself if there was none. In that case the mesh is registered.
+    def deduplicate(self, mesh: MeshData) -> MeshData:
+        key = self._getKey(mesh)
+        with self._lock:
+            registered = self._meshes.get(key)
+            if registered is not None:
+                return registered
+            self._meshes[key] = mesh
+        return mesh
+
+    ##  Get the number of distinct meshes that are registered.
+    def getMeshCount(self) -> int:
+        return len(self._meshes)
+
+    ##  Compute the key of a mesh in the registry.
+    #
+    #   Besides the data of the mesh, this includes the properties that are not
+    #   part of its hash, so only completely identical meshes are shared.
+    def _getKey(self, mesh: MeshData) -> tuple:
+        center_position = mesh.getCenterPosition()
+        zero_position = mesh.getZeroPosition()
+        return (
+            mesh.getHash(),
+            mesh.getFileName(),
+            (center_position.x, center_position.y, center_position.z) if center_position is not None else None,
+            (zero_position.x, zero_position.y, zero_position.z) if zero_position is not None else None
+        )
+
+    ##  Get the registry of the application.
+    @classmethod
+    def getInstance(cls) -> "MeshDataRegistry":
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    _instance = None  # type: MeshDataRegistry
@@ -2,12 +2,24 @@
 # Uranium is released under the terms of the LGPLv3 or higher.
 
 from UM.Logger import Logger
+from UM.Preferences import Preferences
+from UM.Resources import Resources
 from UM.Scene.Scene import SceneNode
 from UM.Math.Matrix import Matrix
 from UM.Math.Vector import Vector
 from UM.FileHandler.FileHandler import FileHandler
+from UM.Mesh.MeshCache import MeshCache
+from UM.Mesh.MeshReader import MeshReader
+from UM.Mesh.MeshDataRegistry import MeshDataRegistry
+from UM.Mesh.MeshReadWorker import initializeWorker, readIntoCache
 
+import io
+import multiprocessing
+import os
 import os.path
+import shutil
+import sys
+import tempfile
 
 
 ##  Central class for reading and writing meshes.
@@ -16,37 +28,43 @@ class MeshFileHandler(FileHandler):
     def __init__(self):
         super().__init__("mesh_writer", "mesh_reader")
 
+        self._mesh_cache = None  # Created when it is first needed, since the storage paths may not be known yet.
+        Preferences.getInstance().addPreference("mesh/use_cache", True)
+        Preferences.getInstance().addPreference("mesh/cache_size", 512)  # In MiB.
+        Preferences.getInstance().addPreference("mesh/split_components", False)
+
+    ##  Get the cache of meshes that were read before.
+    #
+    #   \return The mesh cache, or None if the cache is disabled.
+    def getMeshCache(self):
+        if not Preferences.getInstance().getValue("mesh/use_cache"):
+            return None
+        max_size = int(Preferences.getInstance().getValue("mesh/cache_size")) * 1024 * 1024
+        if self._mesh_cache is None:
+            self._mesh_cache = MeshCache(Resources.getStoragePath(Resources.Cache, "meshes"), max_size)
+        else:
+            self._mesh_cache.setMaxSize(max_size)
+        return self._mesh_cache
+
     # Try to read the mesh_data from a file using a specified MeshReader.
     # \param reader the MeshReader to read the file with.
     # \param file_name The name of the mesh to load.
     # \param kwargs Keyword arguments.
     #               Possible values are:
     #               - Center: True if the model should be centered around (0,0,0), False if it should be loaded as-is. Defaults to True.
+    #               - split_components: True if every connected part of a mesh should become a separate node. Defaults to
+    #                 the mesh/split_components preference.
+    #               - progress_callback, chunk_callback: Callbacks for this read, as for MeshReader.read. Readers that
+    #                 implement their own read method don't call them.
+    # If the reader supports it, the result is taken from the mesh cache when the same file was read before.
     # \returns MeshData if it was able to read the file, None otherwise.
     def readerRead(self, reader, file_name, **kwargs):
+        progress_callback = kwargs.pop("progress_callback", None)
+        chunk_callback = kwargs.pop("chunk_callback", None)
         try:
-            results = reader.read(file_name)
+            results = self._readCached(reader, file_name, progress_callback, chunk_callback)
             if results is not None:
-                if type(results) is not list:
-                    results = [results]
-
-                for result in results:
-                    if kwargs.get("center", True):
-                        # If the result has a mesh and no children it needs to be centered
-                        if result.getMeshData() and len(result.getChildren()) == 0:
-                            extents = result.getMeshData().getExtents()
-                            move_vector = Vector(extents.center.x, extents.center.y, extents.center.z)
-                            result.setCenterPosition(move_vector)
-
-                        # Move all the meshes of children so that toolhandles are shown in the correct place.
-                        for node in result.getChildren():
-                            if node.getMeshData():
-                                extents = node.getMeshData().getExtents()
-                                m = Matrix()
-                                m.translate(-extents.center)
-                                node.setMeshData(node.getMeshData().getTransformed(m))
-                                node.translate(extents.center)
-                return results
+                return self._processResults(results, **kwargs)
 
         except OSError as e:
             Logger.log("e", str(e))
@@ -54,6 +72,162 @@ class MeshFileHandler(FileHandler):
         Logger.log("w", "Unable to read file %s", file_name)
         return None  # unable to read
 
+    ##  Read a number of files at once, in parallel.
+    #
+    #   Files with a reader that supports the mesh cache are read in a pool of
+    #   worker processes, which also compute the normals and convex hulls. The
+    #   workers store the meshes in the mesh cache (or in a temporary one, if
+    #   the cache is disabled), from where they are memory-mapped instead of
+    #   being sent back through a pipe. Other files are read in this process.
+    #
+    #   Stop iterating over the results to cancel the remaining files. Since
+    #   the worker processes are spawned, the main script of the application
+    #   must only start the application if its __name__ is "__main__".
+    #
+    #   \param file_names The names of the mesh files to read.
+    #   \param process_count The number of worker processes. By default, one
+    #   per processor core.
+    #   \param kwargs Keyword arguments, as for readerRead.
+    #   \return A generator of a tuple for each file, in the order of the file
+    #   names: the file name and a list of nodes, or None if the file could not
+    #   be read.
+    def readerReadBatch(self, file_names, process_count = None, **kwargs):
+        mesh_cache = self.getMeshCache()
+        temporary_directory = None
+        if mesh_cache is None:
+            temporary_directory = tempfile.mkdtemp(prefix = "mesh_batch_")
+            mesh_cache = MeshCache(temporary_directory, sys.maxsize)
+
+        readers = [self.getReaderForFile(file_name) for file_name in file_names]
+        process_count = min(process_count or os.cpu_count() or 1, len(file_names))
+        tasks = []
+        for file_name, reader in zip(file_names, readers):
+            if process_count < 2:
+                break  # Starting a single worker process is only overhead.
+            key = self._getCacheKey(mesh_cache, reader, file_name) if reader is not None else None
+            if key is not None:
+                tasks.append((file_name, type(reader).__module__, type(reader).__name__, mesh_cache.getPath(), key))
+
+        pool = None
+        try:
+            if tasks:
+                preferences = io.StringIO()
+                Preferences.getInstance().writeToFile(preferences)
+                context = multiprocessing.get_context("spawn")  # Forking a process with running threads is not safe.
+                pool = context.Pool(min(process_count, len(tasks)), initializer = initializeWorker, initargs = (preferences.getvalue(), _getImportPaths(readers)))
+            task_results = pool.imap(readIntoCache, tasks) if pool else iter([])
+            next_task = 0
+
+            for file_name, reader in zip(file_names, readers):
+                results = None
+                if reader is None:
+                    Logger.log("w", "No reader found for file %s", file_name)
+                elif next_task < len(tasks) and tasks[next_task][0] == file_name:
+                    key = tasks[next_task][4]
+                    next_task += 1
+                    _, in_cache = next(task_results)
+                    mesh_data = mesh_cache.load(key) if in_cache else None
+                    if mesh_data is not None:
+                        node = SceneNode()
+                        node.setMeshData(mesh_data)
+                        results = self._processResults(node, **kwargs)
+                    else:  # The worker could not read it, so try again here to get the same behaviour as readerRead.
+                        results = self.readerRead(reader, file_name, **kwargs)
+                else:
+                    results = self.readerRead(reader, file_name, **kwargs)
+                yield file_name, results
+        finally:
+            if pool is not None:
+                pool.terminate()
+            if temporary_directory is None:
+                mesh_cache.evict()
+            else:
+                shutil.rmtree(temporary_directory, ignore_errors = True)  # Meshes that are still memory-mapped keep their data.
+
+    ##  Make a list of nodes of the result of a reader and center them.
+    #
+    #   Meshes that are identical to meshes that were read before are replaced
+    #   by those.
+    #
+    #   \param results The SceneNode or list of SceneNodes that was read.
+    #   \param kwargs Keyword arguments, as for readerRead.
+    #   \return The list of nodes.
+    def _processResults(self, results, **kwargs):
+        if type(results) is not list:
+            results = [results]
+
+        for result in results:
+            if kwargs.get("center", True):
+                # If the result has a mesh and no children it needs to be centered
+                if result.getMeshData() and len(result.getChildren()) == 0:
+                    extents = result.getMeshData().getExtents()
+                    move_vector = Vector(extents.center.x, extents.center.y, extents.center.z)
+                    result.setCenterPosition(move_vector)
+
+                # Move all the meshes of children so that toolhandles are shown in the correct place.
+                for node in result.getChildren():
+                    if node.getMeshData():
+                        extents = node.getMeshData().getExtents()
+                        m = Matrix()
+                        m.translate(-extents.center)
+                        node.setMeshData(node.getMeshData().getTransformed(m))
+                        node.translate(extents.center)
+
+        # Files with many separate bodies can be loaded as a node per body.
+        if kwargs.get("split_components", Preferences.getInstance().getValue("mesh/split_components")):
+            results = [node for result in results for node in result.splitConnectedComponents()]
+
+        for result in results:
+            # Files that are read more than once share their meshes, and with that their buffers for rendering.
+            for node in [result] + result.getChildren():
+                if node.getMeshData():
+                    node.setMeshData(MeshDataRegistry.getInstance().deduplicate(node.getMeshData()))
+        return results
+
+    ##  Compute the key of a file in the mesh cache.
+    #
+    #   \return The key, or None if the reader doesn't support the cache or
+    #   the file can't be accessed.
+    def _getCacheKey(self, mesh_cache, reader, file_name):
+        settings = reader.getCacheSettings()
+        if settings is None:
+            return None
+        return mesh_cache.getKey(file_name, "{0}\n{1}".format(reader.getPluginId(), settings))
+
+    ##  Read a file, using the mesh cache if possible.
+    #
+    #   \param reader The MeshReader to read the file with if it is not in the
+    #   cache.
+    #   \param file_name The name of the mesh file to read.
+    #   \return The result of the reader.
+    def _readCached(self, reader, file_name, progress_callback = None, chunk_callback = None):
+        mesh_cache = self.getMeshCache()
+        key = self._getCacheKey(mesh_cache, reader, file_name) if mesh_cache is not None else None
+        if key is None:
+            return self._read(reader, file_name, progress_callback, chunk_callback)
+
+        mesh_data = mesh_cache.load(key)
+        if mesh_data is not None:
+            Logger.log("d", "Loaded %s from the mesh cache.", file_name)
+            node = SceneNode()
+            node.setMeshData(mesh_data)
+            return node
+
+        results = self._read(reader, file_name, progress_callback, chunk_callback)
+        # Only single nodes with just a mesh can be restored from the cache.
+        if isinstance(results, SceneNode) and results.getMeshData() is not None and not results.getChildren():
+            mesh_cache.store(key, results.getMeshData())
+        return results
+
+    ##  Read a file with a reader, passing the callbacks on if the reader
+    #   reads in chunks.
+    #
+    #   Readers that implement their own read method only take the file name.
+    def _read(self, reader, file_name, progress_callback, chunk_callback):
+        if isinstance(reader, MeshReader) and type(reader).read is MeshReader.read:
+            return reader.read(file_name, progress_callback = progress_callback, chunk_callback = chunk_callback)
+        return reader.read(file_name)
+
     def _readLocalFile(self, file):
         # We need to prevent circular dependency, so do some just in time importing.
         from UM.Mesh.ReadMeshJob import ReadMeshJob
@@ -61,13 +235,56 @@ class MeshFileHandler(FileHandler):
         job.finished.connect(self._readMeshFinished)
         job.start()
 
+    ##  Read a number of local files in parallel and add them to the scene.
+    #
+    #   A single file is read like by readLocalFile, since starting worker
+    #   processes for it is only overhead.
+    #
+    #   \param files A list of valid QUrls of the files to read.
+    def _readLocalFiles(self, files):
+        if len(files) < 2:
+            super()._readLocalFiles(files)
+            return
+
+        # We need to prevent circular dependency, so do some just in time importing.
+        from UM.Mesh.ReadMeshBatchJob import ReadMeshBatchJob
+        job = ReadMeshBatchJob([file.toLocalFile() for file in files])
+        job.fileRead.connect(self._readBatchFileFinished)
+        job.start()
+
     def _readMeshFinished(self, job):
-        nodes = job.getResult()
+        self._addNodes(job.getFileName(), job.getResult())
+
+    def _readBatchFileFinished(self, job, file_name, nodes):
+        self._addNodes(file_name, nodes)
+
+    def _addNodes(self, file_name, nodes):
         for node in nodes:
             node.setSelectable(True)
-            node.setName(os.path.basename(job.getFileName()))
+            node.setName(os.path.basename(file_name))
             # We need to prevent circular dependency, so do some just in time importing.
             from UM.Operations.AddSceneNodeOperation import AddSceneNodeOperation
             op = AddSceneNodeOperation(node, self._application.getController().getScene().getRoot())
             op.push()
-            self._application.getController().getScene().sceneChanged.emit(node)
\ No newline at end of file
+            self._application.getController().getScene().sceneChanged.emit(node)
+
+
+##  Find the paths from which the modules of some readers can be imported.
+#
+#   Reader plugins are not on the module search path, so worker processes need
+#   these to import them.
+#
+#   \param readers The readers, or None for files without a reader.
+#   \return A list of directories.
+def _getImportPaths(readers):
+    paths = []
+    for reader in readers:
+        if reader is None:
+            continue
+        module_name = type(reader).__module__
+        path = sys.modules[module_name].__file__
+        for _ in range(module_name.count(".") + 1):  # Go up one directory for every level of the module name.
+            path = os.path.dirname(path)
+        if path not in paths:
+            paths.append(path)
+    return paths
@@ -0,0 +1,347 @@
+# Copyright (c) 2018 Ultimaker B.V.
+# Uranium is released under the terms of the LGPLv3 or higher.
+
+##  Uranium's own binary mesh format.
+#
+#   A file starts with MESH_FORMAT_MAGIC, the version of the format and the
+#   length of a JSON header, followed by the header and the data sections. The
+#   header describes the meshes in the file, their precomputed extents and
+#   where their arrays are. Nodes refer to the meshes, so a mesh that is used
+#   by many nodes is stored only once.
+#
+#   Every data section starts at a multiple of SECTION_ALIGNMENT bytes. Arrays
+#   that are stored as they are in memory can therefore be memory-mapped, so
+#   loading them takes no time until they are used. To make files smaller,
+#   arrays can also be encoded:
+#   - "quantized": positions as 16-bit integers relative to the bounding box.
+#   - "delta_varint": integers as the differences between consecutive values,
+#     zigzag-coded into variable-length bytes. Indices of neighbouring faces
+#     are close together, so most differences fit in a single byte.
+#   - "snorm16": unit vectors as 16-bit signed integers.
+#   - "unorm8": colours as 8-bit unsigned integers.
+
+import json
+import struct
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
+import numpy
+import scipy.spatial
+
+from UM.Logger import Logger
+from UM.Math.AxisAlignedBox import AxisAlignedBox
+from UM.Math.Matrix import Matrix
+from UM.Math.Vector import Vector
+from UM.Mesh.MeshData import MeshData, MeshType
+from UM.MimeTypeDatabase import MimeTypeDatabase, MimeType
+
+MimeTypeDatabase.addMimeType(
+    MimeType(
+        name = "application/x-uranium-mesh",
+        comment = "Uranium Mesh File",
+        suffixes = ["umesh"],
+        preferred_suffix = "umesh"
+    )
+)
+
+##  The first bytes of every mesh file.
+MESH_FORMAT_MAGIC = b"UMSH"
+
+##  Version of the layout of the files.
+MESH_FORMAT_VERSION = 1
+
+##  Alignment of the data sections, so they can be memory-mapped.
+SECTION_ALIGNMENT = 64
+
+##  Largest value of a quantized position.
+QUANTIZATION_MAXIMUM = 65535
+
+
+##  Raised when a file is not a valid mesh file.
+class MeshFormatError(Exception):
+    pass
+
+
+##  Write meshes to a stream.
+#
+#   The stream is written front to back, so it doesn't need to be seekable.
+#
+#   \param stream The binary stream to write to.
+#   \param nodes A list of tuples of a name, a MeshData and a transformation
+#   Matrix (or None). Nodes with the same MeshData object share the data in
+#   the file.
+#   \param quantize Whether to encode the arrays to make the file smaller. If
+#   False, all arrays are stored as they are, so they can be memory-mapped
+#   and read back exactly.
+#   \param compute_convex_hull Whether to compute the convex hulls of the
+#   meshes to store them. If False, only hulls that were computed already are
+#   stored.
+def writeMeshes(stream: BinaryIO, nodes: List[Tuple[str, MeshData, Optional[Matrix]]], quantize: bool = True, compute_convex_hull: bool = True) -> None:
+    meshes = []  # type: List[MeshData]
+    header = {"meshes": [], "nodes": []}
+    sections = []  # type: List[memoryview]
+    offset = 0
+    for name, mesh, transformation in nodes:
+        if not any(mesh is other for other in meshes):
+            meshes.append(mesh)
+            description, mesh_sections = _encodeMesh(mesh, quantize, compute_convex_hull)
+            for section_description, data in zip(description["sections"].values(), mesh_sections):
+                section_description["offset"] = offset
+                section_description["length"] = len(data)
+                offset = _aligned(offset + len(data))
+            sections.extend(mesh_sections)
+            header["meshes"].append(description)
+        header["nodes"].append({
+            "name": name,
+            "mesh": next(index for index, other in enumerate(meshes) if mesh is other),
+            "transformation": transformation.getData().reshape(-1).tolist() if transformation is not None else None
+        })
+
+    header_data = json.dumps(header).encode("utf-8")
+    stream.write(MESH_FORMAT_MAGIC)
+    stream.write(struct.pack("<II", MESH_FORMAT_VERSION, len(header_data)))
+    stream.write(header_data)
+    position = len(MESH_FORMAT_MAGIC) + 8 + len(header_data)
+    for data in sections:
+        padding = _aligned(position) - position
+        stream.write(b"\0" * padding)
+        stream.write(data)
+        position += padding + len(data)
+
+
+##  Write a single mesh to a stream.
+#
+#   \param stream The binary stream to write to.
+#   \param mesh The mesh to write.
+#   \param quantize Whether to encode the arrays to make the file smaller.
+#   \param compute_convex_hull Whether to compute the convex hull of the mesh
+#   to store it.
+def writeMesh(stream: BinaryIO, mesh: MeshData, quantize: bool = True, compute_convex_hull: bool = True) -> None:
+    writeMeshes(stream, [("", mesh, None)], quantize, compute_convex_hull)
+
+
+##  Read the meshes in a file.
+#
+#   Arrays that are stored as they are in memory are memory-mapped from the
+#   file. Others are decoded.
+#
+#   \param file_name The path to the file.
+#   \return A list of tuples of the name, MeshData and transformation Matrix
+#   (or None) of each node in the file.
+def readMeshes(file_name: str) -> List[Tuple[str, MeshData, Optional[Matrix]]]:
+    with open(file_name, "rb") as f:
+        if f.read(len(MESH_FORMAT_MAGIC)) != MESH_FORMAT_MAGIC:
+            raise MeshFormatError("Not a mesh file.")
+        version, header_length = struct.unpack("<II", f.read(8))
+        if version != MESH_FORMAT_VERSION:
+            raise MeshFormatError("Unsupported mesh file version {0}.".format(version))
+        try:
+            header = json.loads(f.read(header_length).decode("utf-8"))
+        except ValueError as e:
+            raise MeshFormatError("Invalid header: {0}".format(e))
+    data_start = _aligned(len(MESH_FORMAT_MAGIC) + 8 + header_length)
+
+    try:
+        meshes = [_decodeMesh(file_name, data_start, description) for description in header["meshes"]]
+        nodes = []
+        for node in header["nodes"]:
+            transformation = None
+            if node["transformation"] is not None:
+                transformation = Matrix(numpy.array(node["transformation"], dtype = numpy.float64).reshape((4, 4)))
+            nodes.append((node["name"], meshes[node["mesh"]], transformation))
+    except (KeyError, IndexError, TypeError, ValueError) as e:
+        raise MeshFormatError("Invalid mesh description: {0}".format(e))
+    return nodes
+
+
+##  Read the first mesh in a file.
+#
+#   \param file_name The path to the file.
+#   \return The mesh, or None if the file contains no meshes.
+def readMesh(file_name: str) -> Optional[MeshData]:
+    nodes = readMeshes(file_name)
+    return nodes[0][1] if nodes else None
+
+
+##  Encode the arrays of a mesh.
+#
+#   \return A tuple of the description of the mesh for the header, without
+#   the offsets of the sections yet, and the data of each section in the same
+#   order as the sections in the description.
+def _encodeMesh(mesh: MeshData, quantize: bool, compute_convex_hull: bool) -> Tuple[Dict, List[memoryview]]:
+    sections = {}
+    data = []
+
+    def addSection(name, description, array):
+        array = numpy.ascontiguousarray(array)
+        description["dtype"] = array.dtype.str
+        description["shape"] = array.shape
+        sections[name] = description
+        data.append(memoryview(array).cast("B"))
+
+    vertices = mesh.getVertices()
+    extents = mesh.getExtents()
+    if vertices is not None:
+        if quantize and len(vertices) > 0:
+            minimum = vertices.min(axis = 0).astype(numpy.float64)
+            scale = (vertices.max(axis = 0) - minimum) / QUANTIZATION_MAXIMUM
+            scale[scale == 0] = 1  # Flat along this axis.
+            quantized = numpy.rint((vertices - minimum) / scale).astype(numpy.uint16)
+            addSection("vertices", {"encoding": "quantized", "minimum": minimum.tolist(), "scale": scale.tolist(), "decoded_dtype": vertices.dtype.str}, quantized)
+        else:
+            addSection("vertices", {"encoding": "raw"}, vertices)
+
+    if mesh.hasNormals():
+        normals = mesh.getNormals()
+        if quantize:
+            addSection("normals", {"encoding": "snorm16", "decoded_dtype": normals.dtype.str}, numpy.rint(numpy.clip(normals, -1, 1) * 32767).astype(numpy.int16))
+        else:
+            addSection("normals", {"encoding": "raw"}, normals)
+
+    if mesh.hasIndices():
+        indices = mesh.getIndices()
+        if quantize:
+            addSection("indices", {"encoding": "delta_varint", "decoded_dtype": indices.dtype.str, "decoded_shape": indices.shape}, _encodeDeltaVarint(indices.reshape(-1)))
+        else:
+            addSection("indices", {"encoding": "raw"}, indices)
+
+    if mesh.hasColors():
+        colors = mesh.getColors()
+        if quantize:
+            addSection("colors", {"encoding": "unorm8", "decoded_dtype": colors.dtype.str}, numpy.rint(numpy.clip(colors, 0, 1) * 255).astype(numpy.uint8))
+        else:
+            addSection("colors", {"encoding": "raw"}, colors)
+
+    if mesh.hasUVCoordinates():
+        addSection("uvs", {"encoding": "raw"}, mesh.getUVCoordinates())
+
+    for attribute_name in mesh.attributeNames():
+        attribute = mesh.getAttribute(attribute_name)
+        addSection("attribute:" + attribute_name, {"encoding": "raw", "opengl_name": attribute["opengl_name"], "opengl_type": attribute["opengl_type"]}, attribute["value"])
+
+    if vertices is not None and mesh.getType() == MeshType.faces and (compute_convex_hull or mesh.hasConvexHull()) and mesh.getConvexHull() is not None:  # Flat meshes have no hull.
+        addSection("convex_hull", {"encoding": "raw"}, mesh.getConvexHullVertices().astype(numpy.float32))
+
+    center_position = mesh.getCenterPosition()
+    zero_position = mesh.getZeroPosition()
+    description = {
+        "type": mesh.getType().name,
+        "file_name": mesh.getFileName(),
+        "center_position": [center_position.x, center_position.y, center_position.z] if center_position is not None else None,
+        "zero_position": [zero_position.x, zero_position.y, zero_position.z] if zero_position is not None else None,
+        "extents": [[extents.left, extents.bottom, extents.back], [extents.right, extents.top, extents.front]] if extents is not None else None,
+        "vertex_count": mesh.getVertexCount(),
+        "face_count": mesh.getFaceCount(),
+        "sections": sections
+    }
+    return description, data
+
+
+##  Load the arrays of a mesh and decode them.
+#
+#   \param file_name The path to the file.
+#   \param data_start Where the data sections start in the file.
+#   \param description The description of the mesh from the header.
+#   \return The mesh.
+def _decodeMesh(file_name: str, data_start: int, description: Dict) -> MeshData:
+    arrays = {}
+    attributes = {}
+    for name, section in description["sections"].items():
+        shape = tuple(section["shape"])
+        if 0 in shape:  # Empty arrays can't be memory-mapped.
+            array = numpy.zeros(shape, dtype = section["dtype"])
+        else:
+            array = numpy.memmap(file_name, dtype = section["dtype"], mode = "r", offset = data_start + section["offset"], shape = shape)
+
+        encoding = section["encoding"]
+        if encoding == "quantized":
+            array = (array * numpy.array(section["scale"]) + numpy.array(section["minimum"])).astype(section["decoded_dtype"])
+        elif encoding == "snorm16":
+            array = (array / 32767.0).astype(section["decoded_dtype"])
+        elif encoding == "unorm8":
+            array = (array / 255.0).astype(section["decoded_dtype"])
+        elif encoding == "delta_varint":
+            array = _decodeDeltaVarint(array).astype(section["decoded_dtype"]).reshape(section["decoded_shape"])
+        elif encoding != "raw":
+            raise MeshFormatError("Unknown encoding {0}.".format(encoding))
+
+        if name.startswith("attribute:"):
+            attributes[name[len("attribute:"):]] = {"value": array, "opengl_name": section["opengl_name"], "opengl_type": section["opengl_type"]}
+        else:
+            arrays[name] = array
+
+    convex_hull = None
+    if "convex_hull" in arrays:
+        try:
+            convex_hull = scipy.spatial.ConvexHull(arrays["convex_hull"])
+        except (RuntimeError, ValueError):
+            Logger.log("w", "Unable to restore the convex hull of a mesh from %s", file_name)
+    center_position = description["center_position"]
+    zero_position = description["zero_position"]
+    mesh = MeshData(
+        vertices = arrays.get("vertices"),
+        normals = arrays.get("normals"),
+        indices = arrays.get("indices"),
+        colors = arrays.get("colors"),
+        uvs = arrays.get("uvs"),
+        file_name = description["file_name"],
+        center_position = Vector(*center_position) if center_position is not None else None,
+        zero_position = Vector(*zero_position) if zero_position is not None else None,
+        type = MeshType[description["type"]],
+        attributes = attributes if attributes else None,
+        convex_hull = convex_hull
+    )
+
+    # Restore the extents that were computed before writing, so they don't have to be found again.
+    extents = description.get("extents")
+    if extents is not None and mesh.getVertices() is not None:
+        mesh._extents = AxisAlignedBox(minimum = Vector(*extents[0]), maximum = Vector(*extents[1]))
+    return mesh
+
+
+##  Encode integers as zigzag-coded variable-length differences.
+#
+#   Each difference takes one byte per 7 bits, with the highest bit set on all
+#   bytes but the last.
+#
+#   \param values A one-dimensional array of integers.
+#   \return A numpy array of bytes.
+def _encodeDeltaVarint(values: numpy.ndarray) -> numpy.ndarray:
+    deltas = numpy.diff(values.astype(numpy.int64), prepend = 0)
+    zigzag = ((deltas << 1) ^ (deltas >> 63)).astype(numpy.uint64)  # Small negative numbers become small positive numbers.
+
+    lengths = numpy.ones(len(zigzag), dtype = numpy.int64)
+    remaining = zigzag >> numpy.uint64(7)
+    while remaining.any():
+        lengths += remaining > 0
+        remaining >>= numpy.uint64(7)
+
+    starts = numpy.cumsum(lengths) - lengths
+    result = numpy.empty(int(lengths.sum()), dtype = numpy.uint8)
+    for byte in range(int(lengths.max()) if len(lengths) else 0):
+        has_byte = lengths > byte
+        bits = (zigzag[has_byte] >> numpy.uint64(7 * byte)) & numpy.uint64(0x7f)
+        more = (lengths[has_byte] > byte + 1).astype(numpy.uint64) << numpy.uint64(7)
+        result[starts[has_byte] + byte] = bits | more
+    return result
+
+
+##  Decode integers that were encoded by _encodeDeltaVarint.
+#
+#   \param data A numpy array of bytes.
+#   \return A one-dimensional array of the integers.
+def _decodeDeltaVarint(data: numpy.ndarray) -> numpy.ndarray:
+    if len(data) == 0:
+        return numpy.zeros(0, dtype = numpy.int64)
+    ends = numpy.flatnonzero((data & 0x80) == 0)
+    starts = numpy.concatenate(([0], ends[:-1] + 1))
+    group = numpy.repeat(numpy.arange(len(ends)), ends - starts + 1)
+    shifts = ((numpy.arange(len(data)) - starts[group]) * 7).astype(numpy.uint64)
+    parts = (data & 0x7f).astype(numpy.uint64) << shifts
+    zigzag = numpy.add.reduceat(parts, starts)
+    deltas = (zigzag >> numpy.uint64(1)).astype(numpy.int64) ^ -(zigzag & numpy.uint64(1)).astype(numpy.int64)
+    return numpy.cumsum(deltas)
+
+
+##  Round an offset up to the alignment of the data sections.
+def _aligned(offset: int) -> int:
+    return (offset + SECTION_ALIGNMENT - 1) // SECTION_ALIGNMENT * SECTION_ALIGNMENT
@@ -0,0 +1,75 @@
+# Copyright (c) 2018 Ultimaker B.V.
+# Uranium is released under the terms of the LGPLv3 or higher.
+
+##  Functions that run in the worker processes of a parallel batch import.
+#
+#   This module only imports what is needed to read meshes, since every worker
+#   process imports it when it starts. Workers put their results in a mesh
+#   cache, which the main process then memory-maps, so the arrays are shared
+#   through the file system cache instead of being pickled.
+
+import configparser
+import importlib
+import sys
+
+from UM.Logger import Logger
+from UM.Mesh.MeshCache import MeshCache
+from UM.Preferences import Preferences
+from UM.Scene.SceneNode import SceneNode
+
+##  The reader instances of this worker process, by module and class name.
+_readers = {}
+
+
+##  Prepare a worker process for reading meshes.
+#
+#   \param preferences The preferences of the main process, as written by
+#   Preferences.writeToFile, so that the readers behave the same way.
+#   \param import_paths Paths from which the reader modules can be imported.
+def initializeWorker(preferences: str, import_paths):
+    for path in import_paths:
+        if path not in sys.path:
+            sys.path.append(path)
+
+    parser = configparser.ConfigParser(interpolation = None)
+    parser.read_string(preferences)
+    for group in parser.sections():
+        for key, value in parser[group].items():
+            if group == "general" and key == "version":
+                continue
+            Preferences.getInstance().addPreference("{0}/{1}".format(group, key), value)
+
+
+##  Read a mesh file and store the result in a mesh cache.
+#
+#   \param task A tuple of the file name, the module and class name of the
+#   reader to use, the path of the mesh cache and the key to store the result
+#   under.
+#   \return A tuple of the file name and whether the mesh is now in the cache.
+#   If it isn't, the main process has to read the file itself.
+def readIntoCache(task):
+    file_name, reader_module, reader_class, cache_path, key = task
+    mesh_cache = MeshCache(cache_path, sys.maxsize)  # Size limits are enforced by the main process.
+    if mesh_cache.contains(key):
+        return file_name, True
+
+    try:
+        reader = _getReader(reader_module, reader_class)
+        result = reader.read(file_name)
+    except Exception:
+        Logger.logException("e", "Exception occurred while reading file %s in a worker process", file_name)
+        return file_name, False
+
+    # Only single nodes with just a mesh can be restored from the cache.
+    if not isinstance(result, SceneNode) or result.getMeshData() is None or result.getChildren():
+        return file_name, False
+    # The worker runs in its own process, so the main process doesn't have to compute the hull later.
+    return file_name, mesh_cache.store(key, result.getMeshData(), evict = False, compute_convex_hull = True)
+
+
+##  Get the reader of this worker process for a reader class.
+def _getReader(reader_module, reader_class):
+    if (reader_module, reader_class) not in _readers:
+        module = importlib.import_module(reader_module)
+        _readers[(reader_module, reader_class)] = getattr(module, reader_class)()
+    return _readers[(reader_module, reader_class)]
@@ -3,7 +3,12 @@
 
 import os
 from enum import Enum
+from typing import Optional
+
 from UM.FileHandler.FileReader import FileReader
+from UM.Logger import Logger
+from UM.Mesh.MeshBuilder import MeshBuilder
+from UM.Scene.SceneNode import SceneNode
 
 
 class MeshReader(FileReader):
@@ -13,6 +18,69 @@ class MeshReader(FileReader):
     ##  Read mesh data from file and returns a node that contains the data 
     #   Note that in some cases you can get an entire scene of nodes in this way (eg; 3MF)
     #
+    #   Readers that implement readChunks don't need to implement this. The
+    #   chunks are then put together into a single mesh.
+    #
+    #   The callbacks are passed per read instead of through signals, since
+    #   the same reader can read several files at the same time.
+    #
+    #   \param progress_callback A function that is called with the progress
+    #   made, from 0 to 100, or None.
+    #   \param chunk_callback A function that is called after each chunk with
+    #   the \type{MeshBuilder} that holds everything that was read so far, or
+    #   None. It is called in the thread that reads, while the builder doesn't
+    #   change, so it can create a preview with MeshBuilder.build(share = True).
     #   \return node \type{SceneNode} or \type{list(SceneNode)} The SceneNode or SceneNodes read from file.
-    def read(self, file_name):
+    def read(self, file_name, progress_callback = None, chunk_callback = None):
+        mesh_builder = MeshBuilder()
+        mesh_builder.setFileName(file_name)
+        for chunk in self.readChunks(file_name, progress_callback = progress_callback):
+            mesh_builder.addMeshChunk(chunk)
+            if chunk_callback is not None:
+                chunk_callback(mesh_builder)
+
+        if mesh_builder.getVertexCount() == 0:
+            Logger.log("d", "File did not contain valid data, unable to read.")
+            return None  # We didn't load anything.
+        self._finishMesh(mesh_builder)
+
+        # Memory that was reserved for exactly this mesh is shared with it instead of copied.
+        mesh = mesh_builder.build(share = mesh_builder.getVertexCapacity() == mesh_builder.getVertexCount())
+        scene_node = SceneNode()
+        scene_node.setMeshData(mesh)
+        Logger.log("d", "Loaded a mesh with %s vertices", mesh.getVertexCount())
+        return scene_node
+
+    ##  Read mesh data from a file in chunks.
+    #
+    #   Reading in chunks keeps the memory that is needed while reading small,
+    #   and allows showing a preview of the part that was read so far.
+    #
+    #   \param progress_callback A function that is called with the progress
+    #   made, from 0 to 100, or None.
+    #   \return A generator of \type{MeshChunk} objects, in the order in
+    #   which they have to be put together.
+    def readChunks(self, file_name, progress_callback = None):
         raise NotImplementedError("MeshReader plugin was not correctly implemented, no read was specified")
+
+    ##  Finish the mesh after all chunks have been read.
+    #
+    #   By default, this computes the normals if the chunks had none.
+    #
+    #   \param mesh_builder The builder with all chunks of the mesh.
+    def _finishMesh(self, mesh_builder):
+        if not mesh_builder.hasNormals():
+            mesh_builder.calculateNormals()
+
+    ##  Describe the settings of this reader that affect the result of reading
+    #   a file.
+    #
+    #   Readers that return a single node with a mesh, and nothing else that
+    #   needs to be restored, can have their results stored in the mesh cache
+    #   by returning a string here. The string becomes part of the cache key,
+    #   so changing the settings means that the file is read again.
+    #
+    #   \return A string describing the settings, or None if the results of
+    #   this reader must not be cached.
+    def getCacheSettings(self) -> Optional[str]:
+        return None
@@ -0,0 +1,131 @@
+# Copyright (c) 2018 Ultimaker B.V.
+# Uranium is released under the terms of the LGPLv3 or higher.
+
+from time import time
+from typing import List, Optional, Tuple
+
+import numpy
+
+from UM.Logger import Logger
+from UM.Mesh.MeshData import MeshData, MeshType, calculateNormalsFromIndexedVertices
+
+##  Meshes with fewer faces than this are drawn at full resolution only.
+LOD_MINIMUM_FACE_COUNT = 100000
+
+##  Each level of detail has about this many times fewer faces than the last.
+LOD_REDUCTION_FACTOR = 4
+
+##  No levels of detail are made with fewer faces than this.
+LOD_SMALLEST_FACE_COUNT = 5000
+
+
+##  Simplify a mesh by clustering its vertices in a grid.
+#
+#   All vertices in a cell of the grid are merged into one vertex at their
+#   average position. Faces that end up with less than three different
+#   vertices are removed. This is fast, since it is a few numpy operations on
+#   the whole mesh, but it doesn't preserve the topology of the mesh. That is
+#   fine for displaying a model from a distance.
+#
+#   \param mesh_data The mesh to simplify.
+#   \param cell_size The size of the cells of the grid. No vertex moves by
+#   more than the diagonal of a cell.
+#   \return The simplified mesh, with indices and smooth normals, or None if
+#   the mesh has no faces.
+def simplifyByClustering(mesh_data: MeshData, cell_size: float) -> Optional[MeshData]:
+    vertices = mesh_data.getVertices()
+    if vertices is None or len(vertices) < 3:
+        return None
+    if mesh_data.hasIndices():
+        indices = mesh_data.getIndices()[0:mesh_data.getFaceCount()]
+    else:
+        indices = numpy.arange(len(vertices) - len(vertices) % 3, dtype = numpy.int32).reshape((-1, 3))
+
+    # Number the cells of the grid, and find out which cell each vertex is in.
+    minimum = vertices.min(axis = 0)
+    cells = numpy.floor((vertices - minimum) / cell_size).astype(numpy.int64)
+    dimensions = cells.max(axis = 0) + 1
+    cell_keys = (cells[:, 0] * dimensions[1] + cells[:, 1]) * dimensions[2] + cells[:, 2]
+    _, vertex_cell = numpy.unique(cell_keys, return_inverse = True)
+    vertex_cell = vertex_cell.reshape(-1)
+    cell_count = int(vertex_cell.max()) + 1
+
+    faces = vertex_cell[indices]
+    faces = faces[(faces[:, 0] != faces[:, 1]) & (faces[:, 1] != faces[:, 2]) & (faces[:, 2] != faces[:, 0])]
+    if len(faces) == 0:
+        return None
+    # Several faces can collapse onto the same three cells. Keep one of them, with its original winding.
+    sorted_faces = numpy.sort(faces, axis = 1)
+    face_keys = (sorted_faces[:, 0] * cell_count + sorted_faces[:, 1]) * cell_count + sorted_faces[:, 2]
+    _, first_faces = numpy.unique(face_keys, return_index = True)
+    faces = faces[numpy.sort(first_faces)]
+
+    # Only keep the cells that are still used by a face, numbered consecutively.
+    used = numpy.zeros(cell_count, dtype = numpy.bool_)
+    used[faces] = True
+    new_index = numpy.cumsum(used) - 1
+    faces = new_index[faces].astype(numpy.int32)
+    new_vertex_count = int(used.sum())
+    in_use = used[vertex_cell]
+    vertex_cell = new_index[vertex_cell]
+
+    counts = numpy.bincount(vertex_cell[in_use], minlength = new_vertex_count)[:, numpy.newaxis]
+    new_vertices = _clusterMean(vertices[in_use], vertex_cell[in_use], counts, new_vertex_count)
+    new_colors = None
+    if mesh_data.hasColors():
+        new_colors = _clusterMean(mesh_data.getColors()[in_use], vertex_cell[in_use], counts, new_vertex_count)
+
+    normals = calculateNormalsFromIndexedVertices(new_vertices, faces, len(faces), smooth = True)
+    return MeshData(vertices = new_vertices, normals = normals, indices = faces, colors = new_colors,
+                    file_name = mesh_data.getFileName(), center_position = mesh_data.getCenterPosition(),
+                    zero_position = mesh_data.getZeroPosition())
+
+
+##  Build levels of detail for a mesh.
+#
+#   Every level has about LOD_REDUCTION_FACTOR times fewer faces than the one
+#   before it. The levels are made by clustering vertices, with cells that are
+#   sized to get about the desired number of faces on the surface of the mesh.
+#
+#   \param mesh_data The mesh to build the levels of detail of.
+#   \return A list of tuples of the maximum error and the mesh of each level,
+#   from fine to coarse, as used by MeshData.setLevelsOfDetail. No vertex is
+#   moved further than the error, which is the sum of the diagonals of the
+#   cells of this level and the levels before it. The list is empty if the mesh is small enough to always be
+#   drawn at full resolution, or if it can't be simplified.
+def buildLevelsOfDetail(mesh_data: MeshData) -> List[Tuple[float, MeshData]]:
+    if mesh_data.getVertices() is None or mesh_data.getType() != MeshType.faces or mesh_data.attributeNames():
+        return []  # Custom attributes can't be merged, so these meshes are always drawn as they are.
+    face_count = mesh_data.getFaceCount() if mesh_data.hasIndices() else mesh_data.getVertexCount() // 3
+    if face_count < LOD_MINIMUM_FACE_COUNT:
+        return []
+
+    start_time = time()
+    area = mesh_data.getSurfaceArea()
+    levels = []
+    level = mesh_data
+    error = 0.0
+    target_count = face_count // LOD_REDUCTION_FACTOR
+    while target_count >= LOD_SMALLEST_FACE_COUNT and area > 0:
+        # A surface in a grid has about two faces per cell it passes through.
+        cell_size = float(numpy.sqrt(2 * area / target_count))
+        level = simplifyByClustering(level, cell_size)  # Simplifying the previous level is cheaper, and close enough.
+        if level is None:
+            break
+        error += cell_size * float(numpy.sqrt(3))
+        levels.append((error, level))
+        target_count = level.getFaceCount() // LOD_REDUCTION_FACTOR
+
+    Logger.log("d", "Building %s levels of detail for a mesh with %s faces took %s seconds. Face counts: %s",
+               len(levels), face_count, time() - start_time, [level.getFaceCount() for _, level in levels])
+    return levels
+
+
+##  Average some property of the vertices in each cluster.
+def _clusterMean(data: numpy.ndarray, vertex_cluster: numpy.ndarray, counts: numpy.ndarray, cluster_count: int) -> numpy.ndarray:
+    result = numpy.empty((cluster_count, data.shape[1]), dtype = numpy.float32)
+    for column in range(data.shape[1]):
+        result[:, column] = numpy.bincount(vertex_cluster, weights = data[:, column], minlength = cluster_count)
+    result /= counts
+    return result
+
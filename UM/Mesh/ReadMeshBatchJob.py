@@ -0,0 +1,63 @@
+# Copyright (c) 2018 Ultimaker B.V.
+# Uranium is released under the terms of the LGPLv3 or higher.
+
+from UM.Job import Job
+from UM.Application import Application
+from UM.Mesh.ConvexHullJob import ConvexHullJob
+from UM.Mesh.LevelOfDetailJob import LevelOfDetailJob
+from UM.Mesh.ReadMeshJob import scaleToFit
+from UM.Signal import Signal, signalemitter
+
+
+##  A Job that reads a number of mesh files at once.
+#
+#   The files are read in parallel by MeshFileHandler.readerReadBatch. Every
+#   file is reported with the fileRead signal as soon as it is done, so the
+#   first meshes can be shown while the others are still being read.
+#
+#   The result of this Job is a list of tuples of a file name and the list of
+#   nodes that were read from it.
+@signalemitter
+class ReadMeshBatchJob(Job):
+    def __init__(self, file_names):
+        super().__init__()
+        self._file_names = file_names
+        self._handler = Application.getInstance().getMeshFileHandler()
+        self._cancelled = False
+
+    ##  Emitted when a file has been read.
+    #
+    #   \param job \type{ReadMeshBatchJob} This job.
+    #   \param file_name \type{string} The file that was read.
+    #   \param nodes \type{list} The nodes that were read from the file.
+    fileRead = Signal()
+
+    def getFileNames(self):
+        return self._file_names
+
+    ##  Stop reading the files that haven't been read yet.
+    def cancel(self):
+        self._cancelled = True
+        super().cancel()
+
+    def run(self):
+        results = []
+        batch = self._handler.readerReadBatch(self._file_names)
+        try:
+            for file_name, nodes in batch:
+                if self._cancelled:
+                    break
+                if not nodes:
+                    nodes = []
+                else:
+                    ConvexHullJob(nodes).start()
+                    LevelOfDetailJob(nodes).start()
+                for node in nodes:
+                    scaleToFit(node)
+                results.append((file_name, nodes))
+                self.fileRead.emit(self, file_name, nodes)
+                Job.yieldThread()
+        finally:
+            batch.close()  # Stops the worker processes.
+
+        self.setResult(results)
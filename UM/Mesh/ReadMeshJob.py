@@ -5,25 +5,43 @@ from UM.Job import Job
 from UM.Application import Application
 from UM.Message import Message
 from UM.Math.Vector import Vector
+from UM.Math.VectorArray import VectorArray
 from UM.Preferences import Preferences
 from UM.Logger import Logger
+from UM.Mesh.ConvexHullJob import ConvexHullJob
+from UM.Mesh.LevelOfDetailJob import LevelOfDetailJob
 from UM.Mesh.MeshReader import MeshReader
+from UM.Scene.Iterator.DepthFirstIterator import DepthFirstIterator
+from UM.Signal import Signal, signalemitter
 
 from UM.FileHandler.ReadFileJob import ReadFileJob
 
+import itertools
 import time
 import math
 
 from UM.i18n import i18nCatalog
 i18n_catalog = i18nCatalog("uranium")
 
+##  Minimum time between two previews of a mesh that is being read, in seconds.
+PREVIEW_INTERVAL = 0.5
+
 ##  A Job subclass that performs mesh loading.
 #
 #   The result of this Job is a MeshData object.
+@signalemitter
 class ReadMeshJob(ReadFileJob):
     def __init__(self, filename):
         super().__init__(filename)
         self._handler = Application.getInstance().getMeshFileHandler()
+        self._last_preview_time = 0
+
+    ##  Emitted while a reader that reads in chunks is reading the file.
+    #
+    #   \param job \type{ReadMeshJob} This job.
+    #   \param mesh_data \type{MeshData} A mesh with the part of the file that
+    #   was read so far. It shares its memory with the mesh that is being read.
+    preview = Signal()
 
     def run(self):
         super().run()
@@ -31,43 +49,97 @@ class ReadMeshJob(ReadFileJob):
         if not self._result:
             self._result = []
 
-        # Scale down to maximum bounds size if that is available
-        if hasattr(Application.getInstance().getController().getScene(), "_maximum_bounds"):
-            for node in self._result:
-                max_bounds = Application.getInstance().getController().getScene()._maximum_bounds
-                node._resetAABB()
-                build_bounds = node.getBoundingBox()
-
-                if Preferences.getInstance().getValue("mesh/scale_to_fit") == True or Preferences.getInstance().getValue("mesh/scale_tiny_meshes") == True:
-                    scale_factor_width = max_bounds.width / build_bounds.width
-                    scale_factor_height = max_bounds.height / build_bounds.height
-                    scale_factor_depth = max_bounds.depth / build_bounds.depth
-                    scale_factor = min(scale_factor_width, scale_factor_depth, scale_factor_height)
-                    if Preferences.getInstance().getValue("mesh/scale_to_fit") == True and (scale_factor_width < 1 or scale_factor_height < 1 or scale_factor_depth < 1): # Use scale factor to scale large object down
-                        # Ignore scaling on models which are less than 1.25 times bigger than the build volume
-                        ignore_factor = 1.25
-                        if 1 / scale_factor < ignore_factor:
-                            Logger.log("i", "Ignoring auto-scaling, because %.3d < %.3d" % (1 / scale_factor, ignore_factor))
-                            scale_factor = 1
-                        pass
-                    elif Preferences.getInstance().getValue("mesh/scale_tiny_meshes") == True and (scale_factor_width > 100 and scale_factor_height > 100 and scale_factor_depth > 100):
-                        # Round scale factor to lower factor of 10 to scale tiny object up (eg convert m to mm units)
-                        try:
-                            scale_factor = math.pow(10, math.floor(math.log(scale_factor) / math.log(10)))
-                        except:
-                            # In certain cases the scale_factor can be inf which can make this fail. Just use 1 instead.
-                            scale_factor = 1
-                    else:
-                        scale_factor = 1
-
-                    if scale_factor != 1:
-                        scale_vector = Vector(scale_factor, scale_factor, scale_factor)
-                        display_scale_factor = scale_factor * 100
-
-                        scale_message = Message(i18n_catalog.i18nc("@info:status", "Auto scaled object to {0}% of original size", ("%i" % display_scale_factor)), title = i18n_catalog.i18nc("@info:title", "Scaling Object"))
-
-                        try:
-                            node.scale(scale_vector)
-                            scale_message.show()
-                        except Exception:
-                            Logger.logException("e", "While auto-scaling an exception has been raised")
+        # Compute the convex hulls and simplified meshes in the background now, so they are ready when something needs them.
+        if self._result:
+            ConvexHullJob(self._result).start()
+            LevelOfDetailJob(self._result).start()
+
+        for node in self._result:
+            scaleToFit(node)
+
+    ##  Read the file, with previews of what was read so far.
+    def _read(self, reader):
+        return self._handler.readerRead(reader, self._filename, progress_callback = self._onReaderProgress, chunk_callback = self._onChunkRead)
+
+    ##  Turn what was read so far into a partial mesh for previewing.
+    #
+    #   \param mesh_builder The builder that the chunks are added to.
+    def _onChunkRead(self, mesh_builder):
+        now = time.time()
+        if now - self._last_preview_time < PREVIEW_INTERVAL:
+            return
+        self._last_preview_time = now
+        self.preview.emit(self, mesh_builder.build(share = True))
+
+
+##  Scale a node that was read to fit in the build volume, or scale it up if
+#   it is tiny, depending on the preferences.
+#
+#   \param node The node to scale.
+def scaleToFit(node):
+    # Scale down to maximum bounds size if that is available
+    if not hasattr(Application.getInstance().getController().getScene(), "_maximum_bounds"):
+        return
+
+    max_bounds = Application.getInstance().getController().getScene()._maximum_bounds
+    node._resetAABB()
+    build_bounds = _getBoundingBoxWithoutHull(node)
+    if build_bounds is None:
+        return
+
+    if Preferences.getInstance().getValue("mesh/scale_to_fit") == True or Preferences.getInstance().getValue("mesh/scale_tiny_meshes") == True:
+        scale_factor_width = max_bounds.width / build_bounds.width
+        scale_factor_height = max_bounds.height / build_bounds.height
+        scale_factor_depth = max_bounds.depth / build_bounds.depth
+        scale_factor = min(scale_factor_width, scale_factor_depth, scale_factor_height)
+        if Preferences.getInstance().getValue("mesh/scale_to_fit") == True and (scale_factor_width < 1 or scale_factor_height < 1 or scale_factor_depth < 1): # Use scale factor to scale large object down
+            # Ignore scaling on models which are less than 1.25 times bigger than the build volume
+            ignore_factor = 1.25
+            if 1 / scale_factor < ignore_factor:
+                Logger.log("i", "Ignoring auto-scaling, because %.3d < %.3d" % (1 / scale_factor, ignore_factor))
+                scale_factor = 1
+            pass
+        elif Preferences.getInstance().getValue("mesh/scale_tiny_meshes") == True and (scale_factor_width > 100 and scale_factor_height > 100 and scale_factor_depth > 100):
+            # Round scale factor to lower factor of 10 to scale tiny object up (eg convert m to mm units)
+            try:
+                scale_factor = math.pow(10, math.floor(math.log(scale_factor) / math.log(10)))
+            except:
+                # In certain cases the scale_factor can be inf which can make this fail. Just use 1 instead.
+                scale_factor = 1
+        else:
+            scale_factor = 1
+
+        if scale_factor != 1:
+            scale_vector = Vector(scale_factor, scale_factor, scale_factor)
+            display_scale_factor = scale_factor * 100
+
+            scale_message = Message(i18n_catalog.i18nc("@info:status", "Auto scaled object to {0}% of original size", ("%i" % display_scale_factor)), title = i18n_catalog.i18nc("@info:title", "Scaling Object"))
+
+            try:
+                node.scale(scale_vector)
+                scale_message.show()
+            except Exception:
+                Logger.logException("e", "While auto-scaling an exception has been raised")
+
+
+##  Get the bounding box of a node that was just read, without computing the
+#   convex hulls of its meshes.
+#
+#   SceneNode.getBoundingBox transforms the convex hull, which would compute
+#   the hull here instead of in the ConvexHullJob. The extents of the vertices
+#   themselves are cheap to find. Their corners are transformed instead, which
+#   gives the same box as long as the meshes are not rotated.
+#
+#   \param node The node to get the bounding box of, including its children.
+#   \return An AxisAlignedBox, or None if there are no meshes.
+def _getBoundingBoxWithoutHull(node):
+    bounding_box = None
+    for child in DepthFirstIterator(node):
+        mesh_data = child.getMeshData()
+        extents = mesh_data.getExtents() if mesh_data is not None else None
+        if extents is None:
+            continue
+        corners = VectorArray(list(itertools.product(*zip(extents.minimum.getData(), extents.maximum.getData()))))
+        box = corners.preMultiply(child.getWorldTransformation()).getBoundingBox()
+        bounding_box = box if bounding_box is None else bounding_box + box
+    return bounding_box
@@ -0,0 +1,41 @@
+# Copyright (c) 2018 Ultimaker B.V.
+# Uranium is released under the terms of the LGPLv3 or higher.
+
+from typing import List
+
+from UM.Operations.AddSceneNodeOperation import AddSceneNodeOperation
+from UM.Operations.GroupedOperation import GroupedOperation
+from UM.Operations.RemoveSceneNodeOperation import RemoveSceneNodeOperation
+from UM.Scene.SceneNode import SceneNode
+
+
+##  An operation that splits the mesh of a node into its connected components.
+#
+#   The node is replaced by a node for every component, with the same parent,
+#   transformation and decorators. If the mesh has a single component, or the
+#   node has children, the operation does nothing.
+class SplitMeshOperation(GroupedOperation):
+    ##  Creates the operation.
+    #
+    #   The mesh is split right away, so the operation can be undone and
+    #   redone without splitting it again.
+    #
+    #   \param node The node to split.
+    def __init__(self, node: SceneNode):
+        super().__init__()
+        self._new_nodes = node.splitConnectedComponents()
+        if len(self._new_nodes) <= 1:
+            self._new_nodes = []
+            return
+
+        parent = node.getParent()
+        self.addOperation(RemoveSceneNodeOperation(node))
+        for new_node in self._new_nodes:
+            self.addOperation(AddSceneNodeOperation(new_node, parent))
+
+    ##  Get the nodes that replace the node that is split.
+    #
+    #   \return A list of nodes, or an empty list if the node isn't split.
+    def getNewNodes(self) -> List[SceneNode]:
+        return self._new_nodes
+
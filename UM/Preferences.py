@@ -119,6 +119,8 @@ class Preferences:
                 if pref.getValue() != pref.getDefault():
                     parser[group][key] = str(pref.getValue())
 
+        if "general" not in parser:
+            parser["general"] = {}
         parser["general"]["version"] = str(Preferences.Version)
 
         try:
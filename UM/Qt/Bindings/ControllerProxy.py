@@ -7,6 +7,7 @@ from UM.Application import Application
 from UM.Scene.Selection import Selection
 from UM.Operations.RemoveSceneNodeOperation import RemoveSceneNodeOperation
 from UM.Operations.GroupedOperation import GroupedOperation
+from UM.Operations.SplitMeshOperation import SplitMeshOperation
 
 class ControllerProxy(QObject):
     def __init__(self, parent = None):
@@ -55,6 +56,27 @@ class ControllerProxy(QObject):
         op.push()
         Selection.clear()
 
+    ##  Split the selected nodes into a node for every separate part of their
+    #   meshes.
+    @pyqtSlot()
+    def splitSelection(self):
+        if not Selection.hasSelection():
+            return
+
+        op = GroupedOperation()
+        new_nodes = []
+        for node in Selection.getAllSelectedObjects():
+            split_operation = SplitMeshOperation(node)
+            if split_operation.getNewNodes():
+                op.addOperation(split_operation)
+                new_nodes.extend(split_operation.getNewNodes())
+        if not new_nodes:
+            return
+        op.push()
+        Selection.clear()
+        for node in new_nodes:
+            Selection.add(node)
+
     @pyqtSlot()
     def enableModelRendering(self):
         self._controller.enableModelRendering()
@@ -31,6 +31,7 @@ import UM.Settings.ContainerStack  # For version upgrade to know the version num
 import UM.Preferences  # For version upgrade to know the version number.
 import UM.VersionUpgradeManager
 from UM.Mesh.ReadMeshJob import ReadMeshJob
+from UM.Mesh.ReadMeshBatchJob import ReadMeshBatchJob
 
 import UM.Qt.Bindings.Theme
 from UM.PluginRegistry import PluginRegistry
@@ -168,16 +169,21 @@ class QtApplication(QApplication, Application):
         return self._recent_files
 
     def _onJobFinished(self, job):
-        if (not isinstance(job, ReadMeshJob) and not isinstance(job, ReadFileJob)) or not job.getResult():
+        if (not isinstance(job, ReadMeshJob) and not isinstance(job, ReadFileJob) and not isinstance(job, ReadMeshBatchJob)) or not job.getResult():
             return
 
-        f = QUrl.fromLocalFile(job.getFileName())
-        if f in self._recent_files:
-            self._recent_files.remove(f)
+        if isinstance(job, ReadMeshBatchJob):
+            file_names = [file_name for file_name, nodes in job.getResult() if nodes]
+        else:
+            file_names = [job.getFileName()]
+
+        for file_name in file_names:
+            f = QUrl.fromLocalFile(file_name)
+            if f in self._recent_files:
+                self._recent_files.remove(f)
 
-        self._recent_files.insert(0, f)
-        if len(self._recent_files) > 10:
-            del self._recent_files[10]
+            self._recent_files.insert(0, f)
+        del self._recent_files[10:]
 
         pref = ""
         for path in self._recent_files:
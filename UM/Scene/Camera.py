@@ -6,6 +6,7 @@ from . import SceneNode
 from UM.Math.Matrix import Matrix
 from UM.Math.Ray import Ray
 from UM.Math.Vector import Vector
+from UM.Math.VectorArray import VectorArray
 
 from typing import Optional
 
@@ -124,3 +125,12 @@ class Camera(SceneNode.SceneNode):
         position = position.preMultiply(projection)
 
         return position.x / position.z / 2.0, position.y / position.z / 2.0
+
+    ##  Project many 3D positions onto the 2D view plane at once.
+    #
+    #   \param positions \type{VectorArray} The positions to project.
+    #   \return \type{numpy.ndarray} An N x 2 array with the projected positions, as given by project.
+    def projectPositions(self, positions: VectorArray) -> numpy.ndarray:
+        view = self.getWorldTransformation().getInverse()
+        projected = positions.preMultiply(view).preMultiply(self._projection_matrix).getData()
+        return projected[:, 0:2] / projected[:, 2, numpy.newaxis] / 2.0
@@ -0,0 +1,74 @@
+# Copyright (c) 2018 Ultimaker B.V.
+# Uranium is released under the terms of the LGPLv3 or higher.
+
+from typing import List, Optional
+
+from UM.Math.Polygon import Polygon
+from UM.Math.SpatialIndex import SpatialIndex, DEFAULT_CELL_SIZE
+from UM.Scene.SceneNode import SceneNode
+
+
+##  A spatial index of the footprints of scene nodes on the build plate.
+#
+#   The footprint of a node is the projection of the convex hull of its mesh
+#   on the X/Z plane, in world coordinates. The index listens to the nodes
+#   that are added to it and moves their footprints when they are
+#   transformed or get a different mesh, so it is always up to date without
+#   rebuilding it.
+#
+#   Uranium itself doesn't check nodes for overlap. This is meant for the
+#   placement and collision checks of applications, so they can look up the
+#   nearby nodes instead of testing every pair of nodes.
+class FootprintIndex(SpatialIndex):
+    def __init__(self, cell_size: float = DEFAULT_CELL_SIZE):
+        super().__init__(cell_size)
+        self._nodes = set()
+
+    ##  Start tracking the footprint of a node.
+    #
+    #   Nodes without mesh data are tracked, but have no footprint until they
+    #   get mesh data.
+    def addNode(self, node: SceneNode):
+        if node in self._nodes:
+            return
+        self._nodes.add(node)
+        node.transformationChanged.connect(self._onNodeChanged)
+        node.meshDataChanged.connect(self._onNodeChanged)
+        self._updateNode(node)
+
+    ##  Stop tracking the footprint of a node.
+    def removeNode(self, node: SceneNode):
+        if node not in self._nodes:
+            return
+        self._nodes.remove(node)
+        node.transformationChanged.disconnect(self._onNodeChanged)
+        node.meshDataChanged.disconnect(self._onNodeChanged)
+        self.remove(node)
+
+    ##  Get all nodes that are tracked, with or without footprint.
+    def getNodes(self) -> List[SceneNode]:
+        return list(self._nodes)
+
+    ##  Get the footprint of a node, as it is in the index.
+    def getFootprint(self, node: SceneNode) -> Optional[Polygon]:
+        return self.getPolygon(node)
+
+    ##  Stop tracking all nodes.
+    def clear(self):
+        for node in list(self._nodes):
+            self.removeNode(node)
+        super().clear()
+
+    def _updateNode(self, node: SceneNode):
+        mesh_data = node.getMeshData()
+        if mesh_data is None:
+            self.remove(node)
+            return
+        self.insert(node, mesh_data.getFootprint(node.getWorldTransformation()))
+
+    ##  Children forward their signals to their parents, so this is also
+    #   called for the descendants of the tracked nodes. Only the footprint of
+    #   the node that changed is updated.
+    def _onNodeChanged(self, node: SceneNode):
+        if node in self._nodes:
+            self._updateNode(node)
@@ -1,12 +1,12 @@
 # Copyright (c) 2015 Ultimaker B.V.
 # Uranium is released under the terms of the LGPLv3 or higher.
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 from UM.Math.Matrix import Matrix
 from UM.Math.Vector import Vector
 from UM.Math.Quaternion import Quaternion
 from UM.Math.AxisAlignedBox import AxisAlignedBox
-from UM.Mesh.MeshData import MeshData
+from UM.Mesh.MeshData import MeshData, transformNormalsBatch, transformVerticesBatch
 
 from UM.Signal import Signal, signalemitter
 from UM.Mesh.MeshBuilder import MeshBuilder
@@ -308,33 +308,33 @@ class SceneNode:
     #          If this node is a group, it will recursively concatenate all child nodes/objects.
     #   \return numpy.ndarray
     def getMeshDataTransformedVertices(self) -> numpy.ndarray:
-        transformed_vertices = None
-        if self.callDecoration("isGroup"):
-            for child in self._children:
-                tv = child.getMeshDataTransformedVertices()
-                if transformed_vertices is None:
-                    transformed_vertices = tv
-                else:
-                    transformed_vertices = numpy.concatenate((transformed_vertices, tv), axis = 0)
-        else:
-            transformed_vertices = self._mesh_data.getTransformed(self.getWorldTransformation()).getVertices()
-        return transformed_vertices
+        meshes = self._getMeshesWithTransformations()
+        if not meshes:
+            return None
+        return transformVerticesBatch([mesh_data.getVertices() for mesh_data, _ in meshes], [transformation for _, transformation in meshes])
 
     ##  \brief Get the transformed normals from this scene node/object, based on the transformation of scene nodes wrt root.
     #          If this node is a group, it will recursively concatenate all child nodes/objects.
     #   \return numpy.ndarray
     def getMeshDataTransformedNormals(self) -> numpy.ndarray:
-        transformed_normals = None
+        meshes = self._getMeshesWithTransformations()
+        if not meshes or any(not mesh_data.hasNormals() for mesh_data, _ in meshes):
+            return None
+        return transformNormalsBatch([mesh_data.getNormals() for mesh_data, _ in meshes], [transformation for _, transformation in meshes])
+
+    ##  Get the meshes that make up the transformed mesh data of this node.
+    #
+    #   \return A list of tuples of the mesh data and world transformation of
+    #   this node, or of all nodes in it if this node is a group.
+    def _getMeshesWithTransformations(self) -> List[Tuple[MeshData, Matrix]]:
         if self.callDecoration("isGroup"):
+            meshes = []
             for child in self._children:
-                tv = child.getMeshDataTransformedNormals()
-                if transformed_normals is None:
-                    transformed_normals = tv
-                else:
-                    transformed_normals = numpy.concatenate((transformed_normals, tv), axis = 0)
-        else:
-            transformed_normals = self._mesh_data.getTransformed(self.getWorldTransformation()).getNormals()
-        return transformed_normals
+                meshes.extend(child._getMeshesWithTransformations())
+            return meshes
+        if self._mesh_data is None or self._mesh_data.getVertices() is None:
+            return []
+        return [(self._mesh_data, self.getWorldTransformation())]
 
     ##  \brief Set the mesh of this node/object
     #   \param mesh_data MeshData object
@@ -343,6 +343,34 @@ class SceneNode:
         self._resetAABB()
         self.meshDataChanged.emit(self)
 
+    ##  Create a node for every connected component of the mesh of this node.
+    #
+    #   The new nodes are copies of this node, with the same transformation
+    #   and decorators. The mesh of each new node is centered on its
+    #   component, and the node is moved so the component stays where it was.
+    #   This node is not changed.
+    #
+    #   \return A list of nodes, or a list with only this node if it has no
+    #   mesh, a mesh with a single component, or children.
+    def splitConnectedComponents(self) -> List["SceneNode"]:
+        if self._mesh_data is None or self._children:
+            return [self]
+        components = self._mesh_data.splitConnectedComponents()
+        if len(components) <= 1:
+            return [self]
+
+        new_nodes = []
+        for index, component in enumerate(components):
+            center = component.getExtents().center
+            centering = Matrix()
+            centering.setByTranslation(-center)
+            new_node = deepcopy(self)
+            new_node.setMeshData(component.getTransformed(centering))
+            new_node.translate(center, SceneNode.TransformSpace.Local)
+            new_node.setName("{0} ({1})".format(self._name, index + 1) if self._name else str(index + 1))
+            new_nodes.append(new_node)
+        return new_nodes
+
     ##  Emitted whenever the attached mesh data object changes.
     meshDataChanged = Signal()
 
@@ -2,12 +2,12 @@
 # Uranium is released under the terms of the LGPLv3 or higher.
 
 import sys
-import ctypes   # type: ignore
 
 from PyQt5.QtGui import QOpenGLVersionProfile, QOpenGLContext, QOpenGLFramebufferObject, QOpenGLBuffer, QSurfaceFormat
 from PyQt5.QtWidgets import QMessageBox
 
 from UM.Logger import Logger
+from UM.Mesh.MeshData import CHUNK_VERTEX_COUNT
 
 from UM.View.GL import FrameBufferObject
 from UM.View.GL import ShaderProgram
@@ -30,6 +30,7 @@ if MYPY:
 #   as possible so that any calls to getInstance() return a proper object.
 class OpenGL:
     VertexBufferProperty = "__vertex_buffer"
+    InterleavedVertexBufferProperty = "__interleaved_vertex_buffer"
     IndexBufferProperty = "__index_buffer"
 
     ##  Different OpenGL chipset vendors.
@@ -172,75 +173,48 @@ class OpenGL:
     #
     #   By default, the associated vertex buffer should be cached using a
     #   custom property on the mesh. This should use the VertexBufferProperty
-    #   property name.
+    #   property name, or InterleavedVertexBufferProperty for interleaved
+    #   buffers.
     #
     #   \param mesh The mesh to create a vertex buffer for.
     #   \param kwargs Keyword arguments.
     #                 Possible values:
     #                 - force_recreate: Ignore the cached value if set and always create a new buffer.
+    #                 - interleaved: Fill the buffer with the interleaved vertex data of the mesh, as
+    #                   described by MeshData.getInterleavedVertexLayout. By default, the buffer holds
+    #                   all vertices, then all normals, colours, UV coordinates and custom attributes.
     def createVertexBuffer(self, mesh: "MeshData", **kwargs) -> QOpenGLBuffer:
-        if not kwargs.get("force_recreate", False) and hasattr(mesh, OpenGL.VertexBufferProperty):
-            return getattr(mesh, OpenGL.VertexBufferProperty)
+        interleaved = kwargs.get("interleaved", False)
+        buffer_property = OpenGL.InterleavedVertexBufferProperty if interleaved else OpenGL.VertexBufferProperty
+        if not kwargs.get("force_recreate", False) and hasattr(mesh, buffer_property):
+            return getattr(mesh, buffer_property)
 
         buffer = QOpenGLBuffer(QOpenGLBuffer.VertexBuffer)
         buffer.create()
         buffer.bind()
 
-        float_size = ctypes.sizeof(ctypes.c_float)
-        int_size = ctypes.sizeof(ctypes.c_int)
-
-        buffer_size = mesh.getVertexCount() * 3 * float_size # Vertex count * number of components * sizeof(float32)
-        if mesh.hasNormals():
-            buffer_size += mesh.getVertexCount() * 3 * float_size # Vertex count * number of components * sizeof(float32)
-        if mesh.hasColors():
-            buffer_size += mesh.getVertexCount() * 4 * float_size # Vertex count * number of components * sizeof(float32)
-        if mesh.hasUVCoordinates():
-            buffer_size += mesh.getVertexCount() * 2 * float_size # Vertex count * number of components * sizeof(float32)
-        for attribute_name in mesh.attributeNames():
-            attribute = mesh.getAttribute(attribute_name)
-            if attribute["opengl_type"] == "vector2f":
-                buffer_size += mesh.getVertexCount() * 2 * float_size
-            elif attribute["opengl_type"] == "vector4f":
-                buffer_size += mesh.getVertexCount() * 4 * float_size
-            elif attribute["opengl_type"] == "int":
-                buffer_size += mesh.getVertexCount() * int_size
-            elif attribute["opengl_type"] == "float":
-                buffer_size += mesh.getVertexCount() * float_size
-            else:
-                Logger.log(
-                    "e", "Could not determine buffer size for attribute [%s] with type [%s]" % (attribute_name, attribute["opengl_type"]))
-        buffer.allocate(buffer_size)
-
-        offset = 0
-        vertices = mesh.getVerticesAsByteArray()
-        if vertices is not None:
-            buffer.write(0, vertices, len(vertices))
-            offset += len(vertices)
-
-        if mesh.hasNormals():
-            normals = mesh.getNormalsAsByteArray()
-            buffer.write(offset, normals, len(normals))
-            offset += len(normals)
-
-        if mesh.hasColors():
-            colors = mesh.getColorsAsByteArray()
-            buffer.write(offset, colors, len(colors))
-            offset += len(colors)
-
-        if mesh.hasUVCoordinates():
-            uvs = mesh.getUVCoordinatesAsByteArray()
-            buffer.write(offset, uvs, len(uvs))
-            offset += len(uvs)
-
-        for attribute_name in mesh.attributeNames():
-            attribute = mesh.getAttribute(attribute_name)
-            attribute_byte_array = attribute["value"].tostring()
-            buffer.write(offset, attribute_byte_array, len(attribute_byte_array))
-            offset += len(attribute_byte_array)
+        if interleaved:
+            # The interleaved data is a copy, so it is built and uploaded in parts to keep the extra memory small.
+            stride, _ = mesh.getInterleavedVertexLayout()
+            vertex_count = mesh.getVertexCount()
+            buffer.allocate(stride * vertex_count)
+            for start in range(0, vertex_count, CHUNK_VERTEX_COUNT):
+                data = mesh.getInterleavedVertexBuffer(start, start + CHUNK_VERTEX_COUNT)
+                buffer.write(start * stride, data, len(data))
+        else:
+            arrays = [mesh.getVerticesAsByteArray(), mesh.getNormalsAsByteArray(), mesh.getColorsAsByteArray(), mesh.getUVCoordinatesAsByteArray()]
+            arrays += [mesh.getAttributeAsByteArray(attribute_name) for attribute_name in mesh.attributeNames()]
+            arrays = [array for array in arrays if array is not None]
+            buffer.allocate(sum(len(array) for array in arrays))
+
+            offset = 0
+            for array in arrays:
+                buffer.write(offset, array, len(array))
+                offset += len(array)
 
         buffer.release()
 
-        setattr(mesh, OpenGL.VertexBufferProperty, buffer)
+        setattr(mesh, buffer_property, buffer)
         return buffer
 
     ##  Create an index buffer for a mesh.
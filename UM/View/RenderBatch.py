@@ -3,6 +3,8 @@
 
 import copy
 
+import numpy
+
 from UM.Logger import Logger
 
 from UM.Math.Vector import Vector
@@ -15,6 +17,10 @@ from PyQt5.QtGui import QOpenGLVertexArrayObject
 vertexBufferProperty = "__gl_vertex_buffer"
 indexBufferProperty = "__gl_index_buffer"
 
+##  How far, in pixels on the screen, a simplified mesh may deviate from the
+#   real mesh for it to be drawn instead.
+LEVEL_OF_DETAIL_PIXEL_ERROR = 0.5
+
 
 ##  The RenderBatch class represent a batch of objects that should be rendered.
 #
@@ -88,6 +94,8 @@ class RenderBatch():
         self._view_matrix = None
         self._projection_matrix = None
         self._view_projection_matrix = None
+        self._viewport_height = 0
+        self._perspective = True
 
         self._gl = OpenGL.getInstance().getBindingsObject()
 
@@ -196,6 +204,8 @@ class RenderBatch():
         self._view_matrix = camera.getWorldTransformation().getInverse()
         self._projection_matrix = camera.getProjectionMatrix()
         self._view_projection_matrix = camera.getProjectionMatrix().multiply(self._view_matrix)
+        self._viewport_height = camera.getViewportHeight()
+        self._perspective = camera.isPerspective()
 
         self._shader.updateBindings(
             view_matrix = self._view_matrix,
@@ -226,6 +236,8 @@ class RenderBatch():
     def _renderItem(self, item):
         transformation = item["transformation"]
         mesh = item["mesh"]
+        if self._render_range is None:  # Ranges refer to the faces of the mesh itself.
+            mesh = self._getLevelOfDetail(transformation, mesh)
 
         normal_matrix = None
         if mesh.hasNormals():
@@ -247,7 +259,7 @@ class RenderBatch():
         if item["uniforms"] is not None:
             self._shader.updateBindings(**item["uniforms"])
 
-        vertex_buffer = OpenGL.getInstance().createVertexBuffer(mesh)
+        vertex_buffer = OpenGL.getInstance().createVertexBuffer(mesh, interleaved = True)
         vertex_buffer.bind()
 
         if self._render_range is None:
@@ -260,35 +272,9 @@ class RenderBatch():
         if index_buffer is not None:
             index_buffer.bind()
 
-        self._shader.enableAttribute("a_vertex", "vector3f", 0)
-        offset = mesh.getVertexCount() * 3 * 4
-
-        if mesh.hasNormals():
-            self._shader.enableAttribute("a_normal", "vector3f", offset)
-            offset += mesh.getVertexCount() * 3 * 4
-
-        if mesh.hasColors():
-            self._shader.enableAttribute("a_color", "vector4f", offset)
-            offset += mesh.getVertexCount() * 4 * 4
-
-        if mesh.hasUVCoordinates():
-            self._shader.enableAttribute("a_uvs", "vector2f", offset)
-            offset += mesh.getVertexCount() * 2 * 4
-
-        for attribute_name in mesh.attributeNames():
-            attribute = mesh.getAttribute(attribute_name)
-            self._shader.enableAttribute(attribute["opengl_name"], attribute["opengl_type"], offset)
-            if attribute["opengl_type"] == "vector2f":
-                offset += mesh.getVertexCount() * 2 * 4
-            elif attribute["opengl_type"] == "vector4f":
-                offset += mesh.getVertexCount() * 4 * 4
-            elif attribute["opengl_type"] == "int":
-                offset += mesh.getVertexCount() * 4
-            elif attribute["opengl_type"] == "float":
-                offset += mesh.getVertexCount() * 4
-            else:
-                Logger.log("e", "Attribute with name [%s] uses non implemented type [%s]." % (attribute["opengl_name"], attribute["opengl_type"]))
-                self._shader.disableAttribute(attribute["opengl_name"])
+        stride, layout = mesh.getInterleavedVertexLayout()
+        for attribute in layout:
+            self._shader.enableAttribute(attribute["opengl_name"], attribute["opengl_type"], attribute["offset"], stride)
 
         if mesh.hasIndices():
             if self._render_range is None:
@@ -315,3 +301,27 @@ class RenderBatch():
 
         if index_buffer is not None:
             index_buffer.release()
+
+    ##  Get the simplified version of a mesh that looks the same as the mesh
+    #   itself at its size on the screen.
+    #
+    #   \param transformation The transformation of the mesh.
+    #   \param mesh The mesh to draw.
+    #   \return The mesh to draw instead.
+    def _getLevelOfDetail(self, transformation, mesh):
+        if not mesh.getLevelsOfDetail() or not self._viewport_height:
+            return mesh
+
+        extents = mesh.getExtents()
+        matrix = transformation.getData()
+        scale = numpy.linalg.norm(matrix[0:3, 0:3], axis = 0).max()
+        center = matrix.dot(numpy.append(extents.center.getData(), 1.0))
+        # The distance from the camera, or 1 for orthographic cameras where the distance doesn't matter.
+        distance = self._view_projection_matrix.getData()[3].dot(center)
+        if self._perspective:
+            distance -= numpy.linalg.norm(extents.maximum.getData() - extents.minimum.getData()) / 2 * scale  # The nearest part of the mesh is what matters.
+        if distance <= 0:
+            return mesh  # The camera is inside the bounding sphere of the mesh.
+
+        pixels_per_unit = self._projection_matrix.getData()[1, 1] * self._viewport_height / (2 * distance) * scale
+        return mesh.getLevelOfDetail(LEVEL_OF_DETAIL_PIXEL_ERROR / pixels_per_unit)
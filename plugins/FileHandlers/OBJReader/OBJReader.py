@@ -3,12 +3,29 @@
 # Uranium is released under the terms of the LGPLv3 or higher.
 
 import os
+import re
+
+import numpy
 
 from UM.Job import Job
-from UM.Logger import Logger
+from UM.Mesh.MeshChunk import MeshChunk
 from UM.Mesh.MeshReader import MeshReader
-from UM.Mesh.MeshBuilder import MeshBuilder
-from UM.Scene.SceneNode import SceneNode
+
+##  Patterns that extract the data of each record type from the whole file.
+#
+#   Every pattern captures the values of one line as a single string, so the
+#   strings of a record type can be joined and converted by numpy in one go.
+VERTEX_PATTERN = re.compile(r"^[ \t]*v[ \t]+(\S+[ \t]+\S+[ \t]+\S+)", re.MULTILINE)
+NORMAL_PATTERN = re.compile(r"^[ \t]*vn[ \t]+(\S+[ \t]+\S+[ \t]+\S+)", re.MULTILINE)
+UV_PATTERN = re.compile(r"^[ \t]*vt[ \t]+(\S+)(?:[ \t]+(\S+))?", re.MULTILINE)
+FACE_PATTERN = re.compile(r"^[ \t]*f[ \t]+([^\r\n]*)", re.MULTILINE)
+
+##  Patterns that match the data of all face lines if every corner is
+#   written with the same number of indices, by that number of indices.
+CORNER_FORM_PATTERNS = {width: re.compile(r"(?:\s*[-+]?\d+" + r"/[-+]?\d+" * (width - 1) + r"(?=\s|$))*\s*") for width in (1, 2, 3)}
+
+##  Number of characters that are parsed in one go.
+TEXT_CHUNK_SIZE = 16 * 1024 * 1024
 
 
 class OBJReader(MeshReader):
@@ -16,101 +33,192 @@ class OBJReader(MeshReader):
         super(OBJReader, self).__init__()
         self._supported_extensions = [".obj"]
 
-    def read(self, file_name):
-        scene_node = None
-
+    ##  The result doesn't depend on any settings, so it can always be cached.
+    def getCacheSettings(self):
+        return ""
+
+    ##  Read the file in chunks.
+    #
+    #   The text is parsed in chunks of TEXT_CHUNK_SIZE characters, so the
+    #   whole text never needs to be in memory at once. Faces can refer to
+    #   any vertex in the file though, so the mesh can only be put together
+    #   after everything has been parsed. It is passed on as a single chunk.
+    #
+    #   \param progress_callback A function that is called with the progress
+    #   made, from 0 to 100, or None.
+    #   \return A generator of MeshChunk objects.
+    def readChunks(self, file_name, progress_callback = None):
         extension = os.path.splitext(file_name)[1]
-        if extension.lower() in self._supported_extensions:
-            vertex_list = []
-            normal_list = []
-            uv_list = []
-            face_list = []
-            scene_node = SceneNode()
-
-            mesh_builder = MeshBuilder()
-            mesh_builder.setFileName(file_name)
-            f = open(file_name, "rt")
-            for line in f:
-                parts = line.split()
-                if len(parts) < 1:
-                    continue
-                if parts[0] == "v":
-                    vertex_list.append([float(parts[1]), float(parts[3]), -float(parts[2])])
-                if parts[0] == "vn":
-                    normal_list.append([float(parts[1]), float(parts[3]), -float(parts[2])])
-                if parts[0] == "vt":
-                    uv_list.append([float(parts[1]), float(parts[2])])
-                if parts[0] == "f":
-                    parts = [i for i in map(lambda p: p.split("/"), parts)]
-                    for idx in range(1, len(parts)-2):
-                        data = [int(parts[1][0]), int(parts[idx+1][0]), int(parts[idx+2][0])]
-                        if len(parts[1]) > 2:
-                            data += [int(parts[1][2]), int(parts[idx+1][2]), int(parts[idx+2][2])]
-
-                            if parts[1][1] and parts[idx+1][1] and parts[idx+2][1]:
-                                data += [int(parts[1][1]), int(parts[idx+1][1]), int(parts[idx+2][1])]
-                        face_list.append(data)
+        if extension.lower() not in self._supported_extensions:
+            return
+
+        vertices = []
+        normals = []
+        uvs = []
+        corners = []
+        face_counts = []
+        defined_count = numpy.zeros(3, dtype = numpy.int64)  # The number of vertices, UVs and normals in earlier chunks.
+        with open(file_name, "rt") as f:
+            file_size = os.fstat(f.fileno()).st_size
+            bytes_read = 0
+            remainder = ""  # Incomplete last line of the previous chunk.
+            while True:
+                chunk = f.read(TEXT_CHUNK_SIZE)
+                bytes_read += len(chunk)
+                text = remainder + chunk
+                if chunk:
+                    # Only parse complete lines, the rest is prepended to the next chunk.
+                    end = max(text.rfind("\n"), text.rfind("\r")) + 1
+                    remainder = text[end:]
+                    text = text[:end]
+
+                chunk_vertices = self._parseFloats(VERTEX_PATTERN.findall(text), 3)
+                chunk_normals = self._parseFloats(NORMAL_PATTERN.findall(text), 3)
+                chunk_uvs = self._parseFloats(["{0} {1}".format(u, v if v else "0") for u, v in UV_PATTERN.findall(text)], 2)
+                chunk_corners, chunk_face_counts = self._parseFaces(FACE_PATTERN.findall(text))
+
+                if (chunk_corners < 0).any():  # Negative indices are relative to the elements defined before the face.
+                    face_positions = self._matchPositions(FACE_PATTERN, text)
+                    corner_positions = numpy.repeat(face_positions, chunk_face_counts)
+                    for column, pattern in enumerate((VERTEX_PATTERN, UV_PATTERN, NORMAL_PATTERN)):
+                        relative = chunk_corners[:, column] < 0
+                        if relative.any():
+                            defined_before = numpy.searchsorted(self._matchPositions(pattern, text), corner_positions[relative]) + defined_count[column]
+                            chunk_corners[relative, column] += defined_before + 1  # +1 to make them one-based like the others.
+
+                vertices.append(chunk_vertices)
+                normals.append(chunk_normals)
+                uvs.append(chunk_uvs)
+                corners.append(chunk_corners)
+                face_counts.append(chunk_face_counts)
+                defined_count += [len(chunk_vertices), len(chunk_uvs), len(chunk_normals)]
+
+                if not chunk:
+                    break
+                if file_size and progress_callback is not None:
+                    progress_callback(min(50, int(50 * bytes_read / file_size)))
                 Job.yieldThread()
-            f.close()
-
-            mesh_builder.reserveVertexCount(3 * len(face_list))
-            num_vertices = len(vertex_list)
-            num_normals = len(normal_list)
-
-            for face in face_list:
-                # Substract 1 from index, as obj starts counting at 1 instead of 0
-                i = face[0] - 1
-                j = face[1] - 1
-                k = face[2] - 1
-
-                if len(face) > 3:
-                    ni = face[3] - 1
-                    nj = face[4] - 1
-                    nk = face[5] - 1
-                else:
-                    ni = -1
-                    nj = -1
-                    nk = -1
-
-                if len(face) > 6:
-                    ui = face[6] - 1
-                    uj = face[7] - 1
-                    uk = face[8] - 1
-                else:
-                    ui = -1
-                    uj = -1
-                    uk = -1
-
-                #TODO: improve this handling, this can cause weird errors (negative indexes are relative indexes, and are not properly handled)
-                if i < 0 or i >= num_vertices:
-                    i = 0
-                if j < 0 or j >= num_vertices:
-                    j = 0
-                if k < 0 or k >= num_vertices:
-                    k = 0
-                if ni != -1 and nj != -1 and nk != -1:
-                    mesh_builder.addFaceWithNormals(vertex_list[i][0], vertex_list[i][1], vertex_list[i][2], normal_list[ni][0], normal_list[ni][1], normal_list[ni][2], vertex_list[j][0], vertex_list[j][1], vertex_list[j][2], normal_list[nj][0], normal_list[nj][1], normal_list[nj][2], vertex_list[k][0], vertex_list[k][1], vertex_list[k][2],normal_list[nk][0], normal_list[nk][1], normal_list[nk][2])
-                else:
-                    mesh_builder.addFaceByPoints(vertex_list[i][0], vertex_list[i][1], vertex_list[i][2], vertex_list[j][0], vertex_list[j][1], vertex_list[j][2], vertex_list[k][0], vertex_list[k][1], vertex_list[k][2])
-
-                if ui != -1:
-                    mesh_builder.setVertexUVCoordinates(mesh_builder.getVertexCount() - 3, uv_list[ui][0], uv_list[ui][1])
-
-                if uj != -1:
-                    mesh_builder.setVertexUVCoordinates(mesh_builder.getVertexCount() - 2, uv_list[uj][0], uv_list[uj][1])
-
-                if uk != -1:
-                    mesh_builder.setVertexUVCoordinates(mesh_builder.getVertexCount() - 1, uv_list[uk][0], uv_list[uk][1])
-
-                Job.yieldThread()
-            if not mesh_builder.hasNormals():
-                mesh_builder.calculateNormals(fast = True)
-
-            # make sure that the mesh data is not empty
-            if mesh_builder.getVertexCount() == 0:
-                Logger.log("d", "File did not contain valid data, unable to read.")
-                return None  # We didn't load anything.
-
-            scene_node.setMeshData(mesh_builder.build())
 
-        return scene_node
+        vertices = numpy.concatenate(vertices)
+        normals = numpy.concatenate(normals)
+        uvs = numpy.concatenate(uvs)
+        corners = numpy.concatenate(corners)
+        face_counts = numpy.concatenate(face_counts)
+        if progress_callback is not None:
+            progress_callback(50)
+        Job.yieldThread()
+
+        # Convert from the OBJ coordinate system (Z up) to ours (Y up).
+        vertices = vertices[:, [0, 2, 1]]
+        vertices[:, 2] *= -1
+        normals = normals[:, [0, 2, 1]]
+        normals[:, 2] *= -1
+
+        if len(vertices) == 0 or len(corners) == 0:
+            return  # We didn't load anything.
+
+        # OBJ counts from 1, so after this, -1 means the index was missing.
+        corners -= 1
+        vertex_index = corners[:, 0]
+        vertex_index[(vertex_index < 0) | (vertex_index >= len(vertices))] = 0  # Invalid indices point to the first vertex.
+        uv_index = corners[:, 1]
+        uv_index[uv_index >= len(uvs)] = -1
+        normal_index = corners[:, 2]
+        normal_index[normal_index >= len(normals)] = -1
+
+        has_uvs = (uv_index >= 0).any()
+        has_normals = (normal_index >= 0).all()
+
+        if has_normals:
+            # A vertex of the resulting mesh is each unique combination of position, UV and normal.
+            corner_keys = numpy.stack((vertex_index, uv_index if has_uvs else numpy.zeros_like(uv_index), normal_index), axis = 1)
+            _, unique_corners, corner_vertex = numpy.unique(corner_keys, axis = 0, return_index = True, return_inverse = True)
+            indices = self._triangulate(face_counts, corner_vertex.reshape(-1))
+        else:
+            # The normals are calculated per face, so vertices can't be shared between faces.
+            # Otherwise a shared vertex would only get the normal of one of its faces.
+            unique_corners = self._triangulate(face_counts, numpy.arange(len(corners))).reshape(-1)
+            indices = numpy.arange(len(unique_corners), dtype = numpy.int32).reshape((-1, 3))
+
+        mesh_normals = normals[normal_index[unique_corners]] if has_normals else None
+        mesh_uvs = None
+        if has_uvs:
+            uvs = numpy.concatenate((uvs, numpy.zeros((1, 2), dtype = numpy.float32)))  # Vertices without UV coordinates get (0, 0).
+            mesh_uvs = uvs[uv_index[unique_corners]]
+        yield MeshChunk(vertices[vertex_index[unique_corners]], normals = mesh_normals, indices = indices, uvs = mesh_uvs)
+        if progress_callback is not None:
+            progress_callback(100)
+
+    ##  Convert a list of strings with whitespace-separated numbers to an array.
+    #
+    #   \param lines The strings to convert, each containing \p width numbers.
+    #   \param width The number of numbers in each string.
+    #   \return A numpy array with one row per string.
+    def _parseFloats(self, lines, width):
+        if not lines:
+            return numpy.zeros((0, width), dtype = numpy.float32)
+        try:
+            result = numpy.array(" ".join(lines).split(), dtype = numpy.float32)
+        except ValueError:
+            result = None
+        if result is None or result.size != len(lines) * width:  # Convert one by one to find out which line is wrong.
+            result = numpy.array([line.split() for line in lines], dtype = numpy.float32)
+        return result.reshape((len(lines), width))
+
+    ##  Parse the data of all face lines.
+    #
+    #   Each corner of a face can be written as v, v/vt, v//vn or v/vt/vn. All
+    #   of these are converted to three indices, with 0 for a missing index.
+    #
+    #   \param face_lines The data of the face lines, without the "f" keyword.
+    #   \return A tuple of an array with one row of (v, vt, vn) for each corner
+    #   of each face, and an array with the number of corners of each face.
+    def _parseFaces(self, face_lines):
+        face_counts = numpy.fromiter(map(len, map(str.split, face_lines)), dtype = numpy.int64, count = len(face_lines))
+        corner_count = int(face_counts.sum())
+        if corner_count == 0:
+            return numpy.zeros((0, 3), dtype = numpy.int64), face_counts
+
+        text = " ".join(face_lines).replace("//", "/0/")
+        slashes = text.count("/")
+        width = slashes // corner_count + 1
+        if slashes % corner_count == 0 and width <= 3 and CORNER_FORM_PATTERNS[width].fullmatch(text):
+            # All corners are written in the same form, so numpy can parse them in one go.
+            corners = numpy.array(text.replace("/", " ").split(), dtype = numpy.int64).reshape((corner_count, width))
+            if width < 3:
+                corners = numpy.pad(corners, ((0, 0), (0, 3 - width)), "constant")
+            return corners, face_counts
+
+        # Mixed forms, parse each corner separately.
+        corners = numpy.zeros((corner_count, 3), dtype = numpy.int64)
+        for index, corner in enumerate(text.split()):
+            for column, value in enumerate(corner.split("/")[:3]):
+                if value:
+                    corners[index, column] = int(value)
+        return corners, face_counts
+
+    ##  Find where the matches of a pattern start in a text.
+    #
+    #   \return A sorted numpy array of offsets in the text.
+    def _matchPositions(self, pattern, text):
+        return numpy.fromiter((match.start() for match in pattern.finditer(text)), dtype = numpy.int64)
+
+    ##  Split polygons into triangles, as a fan around the first corner.
+    #
+    #   \param face_counts The number of corners of each polygon.
+    #   \param corner_vertex The vertex index of each corner of each polygon.
+    #   \return An array of vertex indices with one row per triangle.
+    def _triangulate(self, face_counts, corner_vertex):
+        face_starts = numpy.cumsum(face_counts) - face_counts
+        triangle_counts = numpy.maximum(face_counts - 2, 0)  # Degenerate faces with less than 3 corners are skipped.
+        triangle_count = int(triangle_counts.sum())
+
+        # For each triangle, the first corner of its polygon and which triangle of the fan it is.
+        triangle_face_start = numpy.repeat(face_starts, triangle_counts)
+        fan_index = numpy.arange(triangle_count) - numpy.repeat(numpy.cumsum(triangle_counts) - triangle_counts, triangle_counts)
+
+        triangles = numpy.empty((triangle_count, 3), dtype = numpy.int32)
+        triangles[:, 0] = corner_vertex[triangle_face_start]
+        triangles[:, 1] = corner_vertex[triangle_face_start + fan_index + 1]
+        triangles[:, 2] = corner_vertex[triangle_face_start + fan_index + 2]
+        return triangles
@@ -1,9 +1,12 @@
 import os.path
 
+import numpy
+
 import OBJReader
 
 test_path = os.path.join(os.path.dirname(OBJReader.__file__), "tests")
 
+
 def test_readOBJ():
     reader = OBJReader.OBJReader()
     sphere_file = os.path.join(test_path, "sphere.obj")
@@ -11,6 +14,111 @@ def test_readOBJ():
 
     assert result  # It must return a node
     assert result.getMeshData()  # It should have mesh data
-    assert result.getMeshData().getVertexCount() == 3840
+    assert result.getMeshData().getVertexCount() == 642  # Vertices are shared between faces.
     assert result.getMeshData().getFaceCount() == 1280
-    assert result.getMeshData().hasNormals()  # It should have normals.
\ No newline at end of file
+    assert result.getMeshData().hasNormals()  # It should have normals.
+    assert result.getMeshData().hasIndices()
+
+
+def test_readOBJPolygonsAndRelativeIndices(tmpdir):
+    obj_file = tmpdir.join("square.obj")
+    obj_file.write("\n".join([
+        "v 0 0 0",
+        "v 1 0 0",
+        "v 1 1 0",
+        "v 0 1 0",
+        "vt 0 0",
+        "vt 1 1",
+        "f -4/1 -3/1 -2/2 -1/2",  # A quad with relative indices.
+        "v 0 0 1",
+        "f 1 2 5"
+    ]))
+    reader = OBJReader.OBJReader()
+    result = reader.read(str(obj_file))
+
+    mesh_data = result.getMeshData()
+    assert mesh_data.getFaceCount() == 3  # The quad is split in two triangles.
+    assert mesh_data.hasUVCoordinates()
+    vertices = mesh_data.getVertices()
+    indices = mesh_data.getIndices()
+    # Y and Z are swapped, so the last vertex is at (0, 1, 0) in our coordinate system.
+    assert numpy.allclose(vertices[indices[2][2]], [0, 1, 0])
+    assert numpy.allclose(vertices[indices[0]], [[0, 0, 0], [1, 0, 0], [1, 0, -1]])
+    assert numpy.allclose(vertices[indices[1]], [[0, 0, 0], [1, 0, -1], [0, 0, -1]])
+
+
+def test_readOBJChunked(tmpdir):
+    obj_file = tmpdir.join("squares.obj")
+    obj_file.write("\n".join([
+        "v 0 0 0",
+        "v 1 0 0",
+        "v 1 1 0",
+        "v 0 1 0",
+        "f -4 -3 -2 -1",
+        "v 0 0 1",
+        "f -5 -4 -1",
+        "f 1 2 5"
+    ]))
+    reader = OBJReader.OBJReader()
+    expected = reader.read(str(obj_file)).getMeshData()
+
+    original_chunk_size = OBJReader.TEXT_CHUNK_SIZE
+    OBJReader.TEXT_CHUNK_SIZE = 5  # Make sure lines get split across chunks.
+    try:
+        result = reader.read(str(obj_file)).getMeshData()
+    finally:
+        OBJReader.TEXT_CHUNK_SIZE = original_chunk_size
+
+    assert result.getFaceCount() == 4
+    assert numpy.array_equal(result.getVertices()[result.getIndices()], expected.getVertices()[expected.getIndices()])
+    assert numpy.array_equal(result.getVertices()[result.getIndices()[2]], result.getVertices()[result.getIndices()[3]])  # Relative indices are resolved per chunk.
+
+
+def test_readOBJMixedCornerForms(tmpdir):
+    obj_file = tmpdir.join("mixed.obj")
+    obj_file.write("\n".join([
+        "v 0 0 0",
+        "v 1 0 0",
+        "v 0 1 0",
+        "v 0 0 1",
+        "v 1 0 1",
+        "v 0 1 1",
+        "vt 0 0",
+        "vt 1 0",
+        "vt 0 1",
+        "vn 0 0 1",
+        "f 1 2 3",
+        "f 4/1/1 5/2/1 6/3/1",  # As many slashes as there are corners in both faces, but in different forms.
+        "f 1/1 2 3//1"  # Different forms in one face.
+    ]))
+    reader = OBJReader.OBJReader()
+    mesh_data = reader.read(str(obj_file)).getMeshData()
+
+    assert mesh_data.getFaceCount() == 3
+    vertices = mesh_data.getVertices()
+    indices = mesh_data.getIndices()
+    assert numpy.allclose(vertices[indices[0]], [[0, 0, 0], [1, 0, 0], [0, 0, -1]])
+    assert numpy.allclose(vertices[indices[1]], [[0, 1, 0], [1, 1, 0], [0, 1, -1]])
+    assert numpy.allclose(vertices[indices[2]], vertices[indices[0]])
+
+
+def test_readOBJWithoutNormals(tmpdir):
+    obj_file = tmpdir.join("cube.obj")
+    obj_file.write("\n".join(["v {0} {1} {2}".format(x, y, z) for x in (0, 1) for y in (0, 1) for z in (0, 1)] + [
+        "f 1 2 4 3",
+        "f 5 7 8 6",
+        "f 1 5 6 2",
+        "f 3 4 8 7",
+        "f 1 3 7 5",
+        "f 2 6 8 4"
+    ]))
+    reader = OBJReader.OBJReader()
+    mesh_data = reader.read(str(obj_file)).getMeshData()
+
+    assert mesh_data.getFaceCount() == 12
+    vertices = mesh_data.getVertices()
+    normals = mesh_data.getNormals()
+    for face in mesh_data.getIndices():
+        face_normal = numpy.cross(vertices[face[1]] - vertices[face[0]], vertices[face[2]] - vertices[face[0]])
+        face_normal /= numpy.linalg.norm(face_normal)
+        assert numpy.allclose(normals[face], face_normal)  # Every corner has the normal of its own face.
@@ -2,16 +2,37 @@
 # Copyright (c) 2013 David Braam
 # Uranium is released under the terms of the LGPLv3 or higher.
 
+from UM.Math.Matrix import Matrix
+from UM.Mesh.MeshData import transformNormals, transformVertices, weldVertices
 from UM.Mesh.MeshWriter import MeshWriter
 from UM.Scene.Iterator.BreadthFirstIterator import BreadthFirstIterator
 from UM.Scene.SceneNode import SceneNode
+from UM.Job import Job
 
 import time
-import struct
+
+import numpy
+
+##  Converts scene coordinates (Y up) to OBJ coordinates (Z up).
+#
+#   This maps (x, y, z) to (x, -z, y).
+SCENE_TO_OBJ_MATRIX = numpy.array([
+    [1, 0, 0, 0],
+    [0, 0, -1, 0],
+    [0, 1, 0, 0],
+    [0, 0, 0, 1]
+], dtype = numpy.float64)
+
+##  Number of lines that are formatted in one go.
+CHUNK_LINE_COUNT = 65536
 
 class OBJWriter(MeshWriter):
     ##  Writes the specified nodes to a stream in the OBJ format.
     #
+    #   Vertices that are shared between faces are written once, and faces
+    #   refer to them by index. Duplicate vertices and normals are merged
+    #   before writing.
+    #
     #   \param stream The stream to write the OBJ data to.
     #   \param nodes The nodes to write as OBJ data.
     #   \param mode Additional information on how to serialise the OBJ format.
@@ -27,35 +48,59 @@ class OBJWriter(MeshWriter):
 
         stream.write("# URANIUM OBJ EXPORT {0}\n".format(time.strftime("%a %d %b %Y %H:%M:%S")))
 
-        face_offset = 1
+        vertex_offset = 1
+        normal_offset = 1
         for node in MeshWriter._meshNodes(nodes):
-            mesh_data = node.getMeshData().getTransformed(node.getWorldTransformation())
-            verts = mesh_data.getVertices()
-            if verts is None:
+            mesh_data = node.getMeshData()
+            vertices = mesh_data.getVertices()
+            if vertices is None:
                 continue   # No mesh data, nothing to do.
 
+            if mesh_data.hasIndices():
+                indices = mesh_data.getIndices()
+            else:
+                indices = numpy.arange(len(vertices) - len(vertices) % 3, dtype = numpy.int32).reshape((-1, 3))
+
+            transformation = Matrix(SCENE_TO_OBJ_MATRIX.dot(node.getWorldTransformation().getData()))
+            vertices, face_vertices, _ = weldVertices(transformVertices(vertices, transformation), indices)
+            face_vertices = face_vertices + vertex_offset
+
             stream.write("# {0}\n# Vertices\n".format(node.getName()))
+            self._writeLines(stream, "v %.9g %.9g %.9g\n", vertices)
 
-            if mesh_data.hasIndices():
-                for face in mesh_data.getIndices():
-                    v1 = verts[face[0]]
-                    v2 = verts[face[1]]
-                    v3 = verts[face[2]]
-                    stream.write("v {0} {1} {2}\n".format(v1[0], -v1[2], v1[1]))
-                    stream.write("v {0} {1} {2}\n".format(v2[0], -v2[2], v2[1]))
-                    stream.write("v {0} {1} {2}\n".format(v3[0], -v3[2], v3[1]))
+            if mesh_data.hasNormals():
+                normals, face_normals, _ = weldVertices(transformNormals(mesh_data.getNormals(), transformation), indices)
+                face_normals = face_normals + normal_offset
+
+                stream.write("# Normals\n")
+                self._writeLines(stream, "vn %.9g %.9g %.9g\n", normals)
 
                 stream.write("# Faces\n")
-                for face in mesh_data.getIndices():
-                    stream.write("f {0} {1} {2}\n".format(face[0] + face_offset, face[1] + face_offset, face[2] + face_offset))
+                faces = numpy.empty((len(indices), 6), dtype = numpy.int64)
+                faces[:, 0::2] = face_vertices
+                faces[:, 1::2] = face_normals
+                self._writeLines(stream, "f %d//%d %d//%d %d//%d\n", faces)
+                normal_offset += len(normals)
             else:
-                for vertex in verts:
-                    stream.write("v {0} {1} {2}\n".format(vertex[0], -vertex[2], vertex[1]))
-
                 stream.write("# Faces\n")
-                for face in range(face_offset, face_offset + len(verts) - 1, 3):
-                    stream.write("f {0} {1} {2}\n".format(face, face + 1, face + 2))
+                self._writeLines(stream, "f %d %d %d\n", face_vertices)
 
-            face_offset += mesh_data.getVertexCount()
+            vertex_offset += len(vertices)
 
         return True
+
+    ##  Write one line for each row of an array.
+    #
+    #   The lines are formatted in chunks with a single formatting operation
+    #   per chunk.
+    #
+    #   \param stream The stream to write the lines to.
+    #   \param template The format of a single line, with one placeholder for
+    #   each column of the array.
+    #   \param data A two-dimensional numpy array with the values to write.
+    def _writeLines(self, stream, template, data):
+        for start in range(0, len(data), CHUNK_LINE_COUNT):
+            chunk = data[start:start + CHUNK_LINE_COUNT]
+            stream.write((template * len(chunk)) % tuple(chunk.ravel().tolist()))
+            Job.yieldThread()
+
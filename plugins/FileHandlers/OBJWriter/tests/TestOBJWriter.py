@@ -0,0 +1,98 @@
+# Copyright (c) 2018 Ultimaker B.V.
+# Uranium is released under the terms of the LGPLv3 or higher.
+
+import importlib.util
+import io
+import os.path
+
+import numpy
+
+import OBJWriter
+from UM.Math.Quaternion import Quaternion
+from UM.Math.Vector import Vector
+from UM.Mesh.MeshBuilder import MeshBuilder
+from UM.Mesh.MeshData import transformNormals, transformVertices
+from UM.Mesh.MeshWriter import MeshWriter
+from UM.Scene.SceneNode import SceneNode
+
+# The reader is a separate plugin, so load it from its file.
+reader_spec = importlib.util.spec_from_file_location("OBJReader", os.path.join(os.path.dirname(OBJWriter.__file__), "..", "OBJReader", "OBJReader.py"))
+OBJReader = importlib.util.module_from_spec(reader_spec)
+reader_spec.loader.exec_module(OBJReader)
+
+
+def createNode(with_normals, position):
+    builder = MeshBuilder()
+    builder.addCube(0.0002, 30, 12.345678, center = Vector(0.00001, 100.123456, -3))  # Too small and precise for 6 decimals.
+    if with_normals:
+        builder.calculateNormals()
+    mesh_data = builder.build()
+    if not with_normals:
+        mesh_data = mesh_data.set(normals = None)
+    node = SceneNode()
+    node.setMeshData(mesh_data)
+    node.setSelectable(True)
+    node.setPosition(position)
+    node.setOrientation(Quaternion.fromAngleAxis(0.3, Vector.Unit_Y))
+    return node
+
+
+##  Get the corners of all faces of a node in world space, as the reader
+#   should read them back.
+def worldCorners(node, data):
+    mesh_data = node.getMeshData()
+    corners = transformVertices(data, node.getWorldTransformation()) if data is mesh_data.getVertices() else transformNormals(data, node.getWorldTransformation())
+    if mesh_data.hasIndices():
+        return corners[mesh_data.getIndices()].reshape((-1, 3))
+    return corners
+
+
+def test_roundTrip(tmpdir):
+    nodes = [createNode(True, Vector(5, 6, 7)), createNode(False, Vector(-20, 0, 0.5))]
+    stream = io.StringIO()
+
+    assert OBJWriter.OBJWriter().write(stream, nodes)
+
+    text = stream.getvalue()
+    assert text.count("\nv ") == 8 * 2  # The corners of both cubes are written once.
+    obj_file = tmpdir.join("cubes.obj")
+    obj_file.write(text)
+    mesh_data = OBJReader.OBJReader().read(str(obj_file)).getMeshData()
+
+    assert mesh_data.getFaceCount() == 24
+    indices = mesh_data.getIndices().reshape(-1)
+    expected = numpy.concatenate([worldCorners(node, node.getMeshData().getVertices()) for node in nodes])
+    assert numpy.allclose(mesh_data.getVertices()[indices], expected, rtol = 1e-6, atol = 1e-9)
+
+
+def test_roundTripNormals(tmpdir):
+    node = createNode(True, Vector(5, 6, 7))
+    stream = io.StringIO()
+
+    OBJWriter.OBJWriter().write(stream, [node])
+
+    obj_file = tmpdir.join("cube.obj")
+    obj_file.write(stream.getvalue())
+    mesh_data = OBJReader.OBJReader().read(str(obj_file)).getMeshData()
+    indices = mesh_data.getIndices().reshape(-1)
+    assert numpy.allclose(mesh_data.getNormals()[indices], worldCorners(node, node.getMeshData().getNormals()), atol = 1e-6)
+
+
+def test_precision(tmpdir):
+    builder = MeshBuilder()
+    builder.addFaceByPoints(0.0000123, 0, 0, 0, 0.0000456, 0, 123456.789, 0, 0.0000789)
+    node = SceneNode()
+    node.setMeshData(builder.build())
+    node.setSelectable(True)
+    stream = io.StringIO()
+
+    OBJWriter.OBJWriter().write(stream, [node])
+
+    obj_file = tmpdir.join("small.obj")
+    obj_file.write(stream.getvalue())
+    mesh_data = OBJReader.OBJReader().read(str(obj_file)).getMeshData()
+    assert numpy.array_equal(mesh_data.getVertices()[mesh_data.getIndices()].reshape((-1, 3)), node.getMeshData().getVertices())
+
+def test_writeNothing():
+    assert not OBJWriter.OBJWriter().write(io.StringIO(), [])
+    assert not OBJWriter.OBJWriter().write(io.BytesIO(), [createNode(True, Vector())], MeshWriter.OutputMode.BinaryMode)
@@ -3,153 +3,222 @@
 # Uranium is released under the terms of the LGPLv3 or higher.
 
 from UM.Mesh.MeshReader import MeshReader
-from UM.Mesh.MeshBuilder import MeshBuilder
+from UM.Mesh.MeshChunk import MeshChunk
+from UM.Mesh.MeshData import calculateNormalsFromVertices
 from UM.Logger import Logger
-from UM.Scene.SceneNode import SceneNode
 from UM.Job import Job
+from UM.Preferences import Preferences
 
+import io
 import os
+import re
 import struct
 import numpy
 
-use_numpystl = False
-
-try:
-    import stl  # numpy-stl lib
-    import stl.mesh
-
-    # Increase max count. (10 million should be okay-ish)
-    stl.stl.MAX_COUNT = 10000000
-    use_numpystl = True
-except ImportError:
-    Logger.log("w", "Could not find numpy-stl, falling back to slower code.")
-    # We have our own fallback code.
+##  Layout of a single facet record in a binary STL file.
+#
+#   Every facet is 50 bytes: a normal, three vertices and a two-byte attribute
+#   field. Numpy packs structured types without padding, so this matches the
+#   on-disk layout exactly and the whole payload can be viewed as one array.
+STL_BINARY_FACET_DTYPE = numpy.dtype([
+    ("normal", "<f4", (3, )),
+    ("vertices", "<f4", (3, 3)),
+    ("attribute", "<u2")
+])
+
+##  Converts STL coordinates (Z up) to scene coordinates (Y up).
+#
+#   Multiplying a row vector (x, y, z) with this matrix gives (x, z, -y).
+STL_TO_SCENE_MATRIX = numpy.array([
+    [1, 0, 0],
+    [0, 0, -1],
+    [0, 1, 0]
+], dtype = numpy.float32)
+
+##  Number of facets that are converted in one go when reading binary files.
+#
+#   Progress is reported and the thread yields after each chunk.
+BINARY_CHUNK_FACE_COUNT = 262144
+
+##  Number of characters that are parsed in one go when reading ASCII files.
+ASCII_CHUNK_SIZE = 16 * 1024 * 1024
+
+##  Matches a vertex line in an ASCII STL file, capturing the rest of the line
+#   after the keyword, which should be the three coordinates.
+ASCII_VERTEX_PATTERN = re.compile(r"^[ \t]*vertex[ \t]+([^\r\n]*)", re.MULTILINE)
 
 class STLReader(MeshReader):
     def __init__(self):
         super(STLReader, self).__init__()
         self._supported_extensions = [".stl"]
-
-    def load_file(self, file_name, mesh_builder, _use_numpystl = False):
-        if _use_numpystl:
-            self._loadWithNumpySTL(file_name, mesh_builder)
+        Preferences.getInstance().addPreference("mesh/weld_vertices", False)
+
+    ##  The result depends on whether vertices are welded.
+    def getCacheSettings(self):
+        return "weld_vertices={0}".format(Preferences.getInstance().getValue("mesh/weld_vertices"))
+
+    ##  Read the file in chunks.
+    #
+    #   The file is read as binary STL first. If it turns out not to be a
+    #   binary STL file, it is read as ASCII STL.
+    #
+    #   \param progress_callback A function that is called with the progress
+    #   made, from 0 to 100, or None.
+    #   \return A generator of MeshChunk objects.
+    def readChunks(self, file_name, progress_callback = None):
+        with open(file_name, "rb") as f:
+            num_faces = self._getBinaryFaceCount(f)
+            if num_faces:
+                yield from self._readBinaryChunks(f, num_faces, progress_callback)
+                return
+
+        with open(file_name, "rt") as f:
+            try:
+                yield from self._readAsciiChunks(f, progress_callback)
+            except UnicodeDecodeError:
+                Logger.log("w", "File %s is neither binary nor ASCII STL.", file_name)
+
+    ##  If the mesh/weld_vertices preference is enabled, identical vertices are
+    #   merged after all chunks have been read.
+    def _finishMesh(self, mesh_builder):
+        if Preferences.getInstance().getValue("mesh/weld_vertices"):
+            # Share the vertices between faces, which reduces the memory use to about a third.
+            mesh_builder.weldVertices()
         else:
-            f = open(file_name, "rb")
-            if not self._loadBinary(mesh_builder, f):
-                f.close()
-                f = open(file_name, "rt")
-                try:
-                    self._loadAscii(mesh_builder, f)
-                except UnicodeDecodeError:
-                    return None
-                f.close()
-            Job.yieldThread()  # Yield somewhat to ensure the GUI has time to update a bit.
-
-        mesh_builder.calculateNormals(fast = True)
-        mesh_builder.setFileName(file_name)
-
-    ## Decide if we need to use ascii or binary in order to read file
-    def read(self, file_name):
-        mesh_builder = MeshBuilder()
-        scene_node = SceneNode()
-
-        self.load_file(file_name, mesh_builder, _use_numpystl = use_numpystl)
-
-        mesh = mesh_builder.build()
-
-        if use_numpystl:
-            verts = mesh.getVertices()
-            # In some cases numpy stl reads incorrectly and the result is that the Z values are all 0
-            # Add new error cases if you find them.
-            if numpy.amin(verts[:, 1]) == numpy.amax(verts[:, 1]):
-                # Something may have gone wrong in numpy stl, start over without numpy stl
-                Logger.log("w", "All Z coordinates are the same using numpystl, trying again without numpy stl.")
-                mesh_builder = MeshBuilder()
-                self.load_file(file_name, mesh_builder, _use_numpystl = False)
-                mesh = mesh_builder.build()
-
-                verts = mesh.getVertices()
-                if numpy.amin(verts[:, 1]) == numpy.amax(verts[:, 1]):
-                    Logger.log("e", "All Z coordinates are still the same without numpy stl... let's hope for the best")
-
-        if mesh_builder.getVertexCount() == 0:
-            Logger.log("d", "File did not contain valid data, unable to read.")
-            return None  # We didn't load anything.
-        scene_node.setMeshData(mesh)
-        Logger.log("d", "Loaded a mesh with %s vertices", mesh_builder.getVertexCount())
-
-        return scene_node
+            super()._finishMesh(mesh_builder)
 
-    def _swapColumns(self, array, frm, to):
-        array[:, [frm, to]] = array[:, [to, frm]]
-
-    def _loadWithNumpySTL(self, file_name, mesh_builder):
-        for loaded_data in stl.mesh.Mesh.from_multi_file(file_name):
-            vertices = numpy.resize(loaded_data.points.flatten(), (int(loaded_data.points.size / 3), 3))
-
-            # Invert values of second column
-            vertices[:, 1] *= -1
-
-            # Swap column 1 and 2 (We have a different coordinate system)
-            self._swapColumns(vertices, 1, 2)
-
-            mesh_builder.addVertices(vertices)
+    ##  Compute the normals of a chunk, unless they will be replaced anyway.
+    #
+    #   \param vertices The vertices of the chunk, three per face.
+    #   \return The normals, or None if vertices will be welded.
+    def _chunkNormals(self, vertices):
+        if Preferences.getInstance().getValue("mesh/weld_vertices"):
+            return None  # Welding computes smooth normals.
+        return calculateNormalsFromVertices(vertices, len(vertices))
 
     # Private
-    ## Load the STL data from file by consdering the data as ascii.
-    # \param mesh The MeshData object where the data is written to.
+    ## Read the STL data from file by consdering the data as ascii.
+    #
+    #   The file is read in chunks of ASCII_CHUNK_SIZE characters in a single
+    #   pass. The vertex coordinates of each chunk are extracted with one regular
+    #   expression and converted to floats in bulk by numpy. Every chunk of text
+    #   results in one chunk of mesh data with the complete faces in it.
     # \param f The file handle
-    def _loadAscii(self, mesh_builder, f):
-        num_verts = 0
-        for lines in f:
-            for line in lines.split("\r"):
-                if "vertex" in line:
-                    num_verts += 1
-
-        mesh_builder.reserveFaceCount(num_verts / 3)
-        f.seek(0, os.SEEK_SET)
-        vertex = 0
-        face = [None, None, None]
-        for lines in f:
-            for line in lines.split("\r"):
-                if "vertex" in line:
-                    face[vertex] = line.split()[1:]
-                    vertex += 1
-                    if vertex == 3:
-                        mesh_builder.addFaceByPoints(
-                            float(face[0][0]), float(face[0][2]), -float(face[0][1]),
-                            float(face[1][0]), float(face[1][2]), -float(face[1][1]),
-                            float(face[2][0]), float(face[2][2]), -float(face[2][1])
-                        )
-                        vertex = 0
-
-                Job.yieldThread()
+    # \param progress_callback A function to report the progress to, or None.
+    # \return A generator of MeshChunk objects.
+    def _readAsciiChunks(self, f, progress_callback = None):
+        try:
+            file_size = os.fstat(f.fileno()).st_size
+        except (AttributeError, io.UnsupportedOperation):
+            file_size = 0
+
+        bytes_read = 0
+        remainder = ""  # Incomplete last line of the previous chunk.
+        pending = numpy.zeros((0, 3), dtype = numpy.float32)  # Vertices of a face that continues in the next chunk.
+        while True:
+            chunk = f.read(ASCII_CHUNK_SIZE)
+            bytes_read += len(chunk)
+            if chunk:
+                data = remainder + chunk
+                # Only parse complete lines, the rest is prepended to the next chunk.
+                end = max(data.rfind("\n"), data.rfind("\r")) + 1
+                if end == 0:
+                    remainder = data
+                    continue
+                remainder = data[end:]
+                data = data[:end]
+            else:
+                data = remainder
+
+            coordinates = ASCII_VERTEX_PATTERN.findall(data)
+            if coordinates:
+                new_verts = len(coordinates)
+                parsed = self._parseAsciiVertices(coordinates)
+                vertices = numpy.empty((len(pending) + new_verts, 3), dtype = numpy.float32)
+                vertices[:len(pending)] = pending
+                # Swap the Y and Z axes and flip the sign of the new Z axis while storing the coordinates.
+                vertices[len(pending):, 0] = parsed[:, 0]
+                vertices[len(pending):, 1] = parsed[:, 2]
+                vertices[len(pending):, 2] = -parsed[:, 1]
+
+                complete = len(vertices) - len(vertices) % 3  # Only complete faces.
+                pending = vertices[complete:]
+                if complete > 0:
+                    yield MeshChunk(vertices[:complete], normals = self._chunkNormals(vertices[:complete]))
+
+            if not chunk:
+                break
+            if file_size and progress_callback is not None:
+                progress_callback(min(100, int(100 * bytes_read / file_size)))
+            Job.yieldThread()
 
-    # Private
-    ## Load the STL data from file by consdering the data as Binary.
-    # \param mesh The MeshData object where the data is written to.
-    # \param f The file handle
-    def _loadBinary(self, mesh_builder, f):
+    ##  Convert the coordinates of vertex lines to an array.
+    #
+    #   All lines are converted by numpy in one go. Only if that fails, they are
+    #   checked one by one to report which one is wrong.
+    #
+    #   \param lines The text after the vertex keyword of each line.
+    #   \return A numpy array with one row of three coordinates per line.
+    def _parseAsciiVertices(self, lines):
+        try:
+            parsed = numpy.array(" ".join(lines).split(), dtype = numpy.float32)
+        except ValueError:
+            parsed = None
+        if parsed is None or parsed.size != len(lines) * 3:
+            for line in lines:
+                try:
+                    valid = len(numpy.array(line.split(), dtype = numpy.float32)) == 3
+                except ValueError:
+                    valid = False
+                if not valid:
+                    raise ValueError("Invalid vertex in ASCII STL file, expected three numbers: \"vertex {0}\"".format(line.strip()))
+        return parsed.reshape((len(lines), 3))
+
+    ##  Check whether a file is a binary STL file.
+    #
+    #   \param f The file handle, opened in binary mode. After this, it is
+    #   positioned at the start of the facet records.
+    #   \return The number of faces in the file, or 0 if it is not a binary
+    #   STL file.
+    def _getBinaryFaceCount(self, f):
         f.read(80)  # Skip the header
 
         num_faces = struct.unpack("<I", f.read(4))[0]
         # On ascii files, the num_faces will be big, due to 4 ascii bytes being seen as an unsigned int.
         if num_faces < 1 or num_faces > 1000000000:
-            return False
+            return 0
         f.seek(0, os.SEEK_END)
         file_size = f.tell()
         f.seek(84, os.SEEK_SET)
-        if file_size < num_faces * 50 + 84:
-            return False
-
-        mesh_builder.reserveFaceCount(num_faces)
-        for idx in range(0, num_faces):
-            data = struct.unpack(b"<ffffffffffffH", f.read(50))
-            mesh_builder.addFaceByPoints(
-                data[3], data[5], -data[4],
-                data[6], data[8], -data[7],
-                data[9], data[11], -data[10]
-            )
-            Job.yieldThread()
+        if file_size < num_faces * STL_BINARY_FACET_DTYPE.itemsize + 84:
+            return 0
+        return num_faces
 
-        return True
+    # Private
+    ## Read the STL data from file by consdering the data as Binary.
+    #
+    #   The facet records are memory mapped as one structured array, so they are
+    #   not copied until they are converted to scene coordinates. The conversion
+    #   is done in chunks, and each chunk is passed on as soon as it is done. The
+    #   first chunk tells how many faces there are in total, so memory for the
+    #   whole mesh can be reserved at once.
+    # \param f The file handle, positioned at the start of the facet records.
+    # \param num_faces The number of faces in the file.
+    # \param progress_callback A function to report the progress to, or None.
+    # \return A generator of MeshChunk objects.
+    def _readBinaryChunks(self, f, num_faces, progress_callback = None):
+        try:
+            facets = numpy.memmap(f, dtype = STL_BINARY_FACET_DTYPE, mode = "r", offset = 84, shape = (num_faces, ))
+        except (AttributeError, io.UnsupportedOperation):  # Not a real file, so it can't be mapped.
+            f.seek(84, os.SEEK_SET)
+            facets = numpy.frombuffer(f.read(num_faces * STL_BINARY_FACET_DTYPE.itemsize), dtype = STL_BINARY_FACET_DTYPE, count = num_faces)
+
+        for start in range(0, num_faces, BINARY_CHUNK_FACE_COUNT):
+            end = min(start + BINARY_CHUNK_FACE_COUNT, num_faces)
+            # View the output as one 3x3 block per face so that the swap of axes is a single matrix product.
+            vertices = numpy.empty(((end - start) * 3, 3), dtype = numpy.float32)
+            numpy.matmul(facets["vertices"][start:end], STL_TO_SCENE_MATRIX, out = vertices.reshape((end - start, 3, 3)))
+            yield MeshChunk(vertices, normals = self._chunkNormals(vertices), expected_vertex_count = num_faces * 3)
+            if progress_callback is not None:
+                progress_callback(int(100 * end / num_faces))
+            Job.yieldThread()
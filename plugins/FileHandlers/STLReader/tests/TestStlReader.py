@@ -1,37 +1,133 @@
+import io
 import os.path
+import struct
+
+import numpy
+import pytest
 
 import STLReader
 from UM.Mesh.MeshBuilder import MeshBuilder
 
 test_path = os.path.join(os.path.dirname(STLReader.__file__), "tests")
 
+##  Put the chunks of a mesh together in a mesh builder.
+def buildChunks(chunks):
+    mesh_builder = MeshBuilder()
+    for chunk in chunks:
+        mesh_builder.addMeshChunk(chunk)
+    return mesh_builder
+
 def test_readASCII():
     reader = STLReader.STLReader()
     ascii_path = os.path.join(test_path, "simpleTestCubeASCII.stl")
     result = reader.read(ascii_path)
     assert result
 
-    if STLReader.use_numpystl:
-        # If the system the test runs on supporst numpy stl, we should also check the non numpy stl option.
-        f = open(ascii_path, "rt")
-        mesh_builder = MeshBuilder()
-        reader._loadAscii(mesh_builder, f)
-        mesh_builder.calculateNormals(fast=True)
+    with open(ascii_path, "rt") as f:
+        mesh_builder = buildChunks(reader._readAsciiChunks(f))
 
-        assert mesh_builder.getVertexCount() != 0
+    assert mesh_builder.getVertexCount() != 0
 
 def test_readBinary():
     reader = STLReader.STLReader()
     binary_path = os.path.join(test_path, "simpleTestCubeBinary.stl")
     result = reader.read(binary_path)
 
-    if STLReader.use_numpystl:
-        # If the system the test runs on supporst numpy stl, we should also check the non numpy stl option.
-        f = open(binary_path, "rb")
-        mesh_builder = MeshBuilder()
-        reader._loadBinary(mesh_builder, f)
-        mesh_builder.calculateNormals(fast=True)
+    with open(binary_path, "rb") as f:
+        mesh_builder = buildChunks(reader._readBinaryChunks(f, reader._getBinaryFaceCount(f)))
 
-        assert mesh_builder.getVertexCount() != 0
+    assert mesh_builder.getVertexCount() != 0
     assert result
 
+def test_readASCIIChunked():
+    ascii_path = os.path.join(test_path, "simpleTestCubeASCII.stl")
+    expected = []
+    with open(ascii_path, "rt") as f:
+        for line in f:
+            parts = line.split()
+            if parts and parts[0] == "vertex":
+                expected.append([float(parts[1]), float(parts[3]), -float(parts[2])])
+
+    reader = STLReader.STLReader()
+    original_chunk_size = STLReader.ASCII_CHUNK_SIZE
+    STLReader.ASCII_CHUNK_SIZE = 7  # Make sure lines get split across chunks.
+    try:
+        with open(ascii_path, "rt") as f:
+            mesh_builder = buildChunks(reader._readAsciiChunks(f))
+    finally:
+        STLReader.ASCII_CHUNK_SIZE = original_chunk_size
+
+    assert mesh_builder.getVertexCount() == len(expected)
+    assert numpy.array_equal(mesh_builder.getVertices(), numpy.array(expected, dtype = numpy.float32))
+
+def test_readASCIIMalformed():
+    reader = STLReader.STLReader()
+    face = "facet normal 0 0 1\nouter loop\nvertex {0}\nvertex 1 0 0\nvertex 0 1 0\nendloop\nendfacet\n"
+    for vertex in ("0 0", "0 0 zero", "0 0 0 0"):  # Too few numbers, not a number, too many numbers.
+        with pytest.raises(ValueError) as error:
+            list(reader._readAsciiChunks(io.StringIO("solid test\n" + face.format("0 0 0") + face.format(vertex) + "endsolid test\n")))
+        assert "vertex " + vertex in str(error.value)
+
+    # Keywords are only recognised at the start of a line, and any whitespace between the numbers is fine.
+    mesh_builder = buildChunks(reader._readAsciiChunks(io.StringIO("solid vertex\n" + face.format("\t1e0   -2.5\t3 ") + "endsolid vertex\n")))
+    assert numpy.array_equal(mesh_builder.getVertices()[0], [1, 3, 2.5])
+
+def test_readBinaryCoordinates():
+    binary_path = os.path.join(test_path, "simpleTestCubeBinary.stl")
+    with open(binary_path, "rb") as f:
+        f.read(80)
+        num_faces = struct.unpack("<I", f.read(4))[0]
+        expected = []
+        for _ in range(num_faces):
+            data = struct.unpack(b"<ffffffffffffH", f.read(50))
+            expected.extend([[data[3], data[5], -data[4]], [data[6], data[8], -data[7]], [data[9], data[11], -data[10]]])
+
+    reader = STLReader.STLReader()
+    original_chunk_face_count = STLReader.BINARY_CHUNK_FACE_COUNT
+    STLReader.BINARY_CHUNK_FACE_COUNT = 5  # Make sure the faces are read in multiple chunks.
+    try:
+        with open(binary_path, "rb") as f:
+            assert reader._getBinaryFaceCount(f) == num_faces
+            chunks = list(reader._readBinaryChunks(f, num_faces))
+    finally:
+        STLReader.BINARY_CHUNK_FACE_COUNT = original_chunk_face_count
+    mesh_builder = buildChunks(chunks)
+
+    assert len(chunks) > 1
+    assert mesh_builder.getVertexCapacity() == num_faces * 3  # Reserved all at once by the first chunk.
+    assert mesh_builder.getVertexCount() == num_faces * 3
+    assert numpy.array_equal(mesh_builder.getVertices(), numpy.array(expected, dtype = numpy.float32))
+
+def test_readPreview():
+    reader = STLReader.STLReader()
+    vertex_counts = []
+    progress = []
+    original_chunk_face_count = STLReader.BINARY_CHUNK_FACE_COUNT
+    STLReader.BINARY_CHUNK_FACE_COUNT = 5
+    try:
+        result = reader.read(os.path.join(test_path, "simpleTestCubeBinary.stl"),
+                             progress_callback = progress.append,
+                             chunk_callback = lambda mesh_builder: vertex_counts.append(mesh_builder.build(share = True).getVertexCount()))
+        reader.read(os.path.join(test_path, "simpleTestCubeBinary.stl"))  # Other reads don't report to these callbacks.
+    finally:
+        STLReader.BINARY_CHUNK_FACE_COUNT = original_chunk_face_count
+
+    assert vertex_counts == [15, 30, 36]  # The partial meshes grow with every chunk.
+    assert progress == [41, 83, 100]
+    assert result.getMeshData().getVertexCount() == 36
+    assert result.getMeshData().hasNormals()
+
+def test_readIntoCache(tmpdir):
+    from UM.Mesh.MeshCache import MeshCache
+    from UM.Mesh.MeshReadWorker import readIntoCache
+
+    binary_path = os.path.join(test_path, "simpleTestCubeBinary.stl")
+    mesh_cache = MeshCache(str(tmpdir))
+    key = mesh_cache.getKey(binary_path)
+    task = (binary_path, "STLReader", "STLReader", str(tmpdir), key)
+
+    assert readIntoCache(task) == (binary_path, True)
+    cached = mesh_cache.load(key)
+    direct = STLReader.STLReader().read(binary_path).getMeshData()
+    assert numpy.array_equal(cached.getVertices(), direct.getVertices())
+    assert readIntoCache(task) == (binary_path, True)  # Already cached, so nothing is read.
@@ -7,10 +7,39 @@ from UM.Scene.SceneNode import SceneNode
 from UM.Scene.Iterator.BreadthFirstIterator import BreadthFirstIterator
 from UM.Logger import Logger
 
+from UM.Job import Job
+
 import time
 import struct
 import os
 
+import numpy
+
+##  Layout of a single facet record in a binary STL file.
+STL_BINARY_FACET_DTYPE = numpy.dtype([
+    ("normal", "<f4", (3, )),
+    ("vertices", "<f4", (3, 3)),
+    ("attribute", "<u2")
+])
+
+##  Converts scene coordinates (Y up) to STL coordinates (Z up).
+#
+#   This maps (x, y, z) to (x, -z, y).
+SCENE_TO_STL_MATRIX = numpy.array([
+    [1, 0, 0, 0],
+    [0, 0, -1, 0],
+    [0, 1, 0, 0],
+    [0, 0, 0, 1]
+], dtype = numpy.float64)
+
+##  Text of one facet in an ASCII STL file, to be filled with the normal and the three vertices.
+#
+#   The ten significant digits are enough to read back the exact 32-bit floats.
+ASCII_FACET_TEMPLATE = "facet normal %.9e %.9e %.9e\n  outer loop\n    vertex %.9e %.9e %.9e\n    vertex %.9e %.9e %.9e\n    vertex %.9e %.9e %.9e\n  endloop\nendfacet\n"
+
+##  Number of facets that are formatted in one go when writing ASCII files.
+ASCII_CHUNK_FACE_COUNT = 65536
+
 class STLWriter(MeshWriter):
     ##  Write the specified sequence of nodes to a stream in the STL format.
     #
@@ -40,39 +69,16 @@ class STLWriter(MeshWriter):
         stream.write("solid {0}\n".format(name))
 
         for node in nodes:
-            mesh_data = node.getMeshData().getTransformed(node.getWorldTransformation())
-            verts = mesh_data.getVertices()
-            if verts is None:
+            facets = self._getFacets(node)
+            if facets is None:
                 continue  # No mesh data, nothing to do.
 
-            if mesh_data.hasIndices():
-                for face in mesh_data.getIndices():
-                    stream.write("facet normal 0.0 0.0 0.0\n")
-                    stream.write("  outer loop\n")
-
-                    v1 = verts[face[0]]
-                    v2 = verts[face[1]]
-                    v3 = verts[face[2]]
-                    stream.write("    vertex {0} {1} {2}\n".format(v1[0], -v1[2], v1[1]))
-                    stream.write("    vertex {0} {1} {2}\n".format(v2[0], -v2[2], v2[1]))
-                    stream.write("    vertex {0} {1} {2}\n".format(v3[0], -v3[2], v3[1]))
-
-                    stream.write("  endloop\n")
-                    stream.write("endfacet\n")
-            else:
-                num_verts = mesh_data.getVertexCount()
-                for index in range(0, num_verts - 1, 3):
-                    stream.write("facet normal 0.0 0.0 0.0\n")
-                    stream.write("  outer loop\n")
-                    v1 = verts[index]
-                    v2 = verts[index + 1]
-                    v3 = verts[index + 2]
-                    stream.write("    vertex {0} {1} {2}\n".format(v1[0], -v1[2], v1[1]))
-                    stream.write("    vertex {0} {1} {2}\n".format(v2[0], -v2[2], v2[1]))
-                    stream.write("    vertex {0} {1} {2}\n".format(v3[0], -v3[2], v3[1]))
-
-                    stream.write("  endloop\n")
-                    stream.write("endfacet\n")
+            # Format a whole chunk of facets with a single formatting operation.
+            facets = facets.reshape((-1, 12))
+            for start in range(0, len(facets), ASCII_CHUNK_FACE_COUNT):
+                chunk = facets[start:start + ASCII_CHUNK_FACE_COUNT]
+                stream.write((ASCII_FACET_TEMPLATE * len(chunk)) % tuple(chunk.ravel().tolist()))
+                Job.yieldThread()
 
         stream.write("endsolid {0}\n".format(name))
 
@@ -85,33 +91,43 @@ class STLWriter(MeshWriter):
             if node.getMeshData().hasIndices():
                 face_count += node.getMeshData().getFaceCount()
             else:
-                face_count += node.getMeshData().getVertexCount() / 3
+                face_count += node.getMeshData().getVertexCount() // 3
 
         stream.write(struct.pack("<I", int(face_count))) #Write number of faces to STL
 
         for node in nodes:
-            mesh_data = node.getMeshData().getTransformed(node.getWorldTransformation())
-
-            if mesh_data.hasIndices():
-                verts = mesh_data.getVertices()
-                for face in mesh_data.getIndices():
-                    v1 = verts[face[0]]
-                    v2 = verts[face[1]]
-                    v3 = verts[face[2]]
-                    stream.write(struct.pack("<fff", 0.0, 0.0, 0.0))
-                    stream.write(struct.pack("<fff", v1[0], -v1[2], v1[1]))
-                    stream.write(struct.pack("<fff", v2[0], -v2[2], v2[1]))
-                    stream.write(struct.pack("<fff", v3[0], -v3[2], v3[1]))
-                    stream.write(struct.pack("<H", 0))
-            else:
-                num_verts = mesh_data.getVertexCount()
-                verts = mesh_data.getVertices()
-                for index in range(0, num_verts - 1, 3):
-                    v1 = verts[index]
-                    v2 = verts[index + 1]
-                    v3 = verts[index + 2]
-                    stream.write(struct.pack("<fff", 0.0, 0.0, 0.0))
-                    stream.write(struct.pack("<fff", v1[0], -v1[2], v1[1]))
-                    stream.write(struct.pack("<fff", v2[0], -v2[2], v2[1]))
-                    stream.write(struct.pack("<fff", v3[0], -v3[2], v3[1]))
-                    stream.write(struct.pack("<H", 0))
\ No newline at end of file
+            facets = self._getFacets(node)
+            if facets is None:
+                continue
+
+            records = numpy.zeros(len(facets), dtype = STL_BINARY_FACET_DTYPE)
+            records["normal"] = facets[:, 0]
+            records["vertices"] = facets[:, 1:]
+            stream.write(records.view(numpy.uint8))  # Write all facets of this node in one go.
+
+    ##  Get the facets of a node in world space and STL coordinates.
+    #
+    #   \param node The scene node to get the facets of.
+    #   \return A numpy array with for each face a row with the face normal and
+    #   the three vertices, or None if the node has no vertices.
+    def _getFacets(self, node):
+        mesh_data = node.getMeshData()
+        vertices = mesh_data.getVertices()
+        if vertices is None:
+            return None
+
+        # Transform to world space and to the STL coordinate system in one go.
+        transformation = SCENE_TO_STL_MATRIX.dot(node.getWorldTransformation().getData())
+        if mesh_data.hasIndices():
+            triangles = vertices[mesh_data.getIndices()]
+        else:
+            triangles = vertices[:len(vertices) - len(vertices) % 3].reshape((-1, 3, 3))
+
+        facets = numpy.empty((len(triangles), 4, 3), dtype = numpy.float32)
+        facets[:, 1:] = numpy.matmul(triangles, transformation[0:3, 0:3].T) + transformation[0:3, 3]
+
+        normals = numpy.cross(facets[:, 2] - facets[:, 1], facets[:, 3] - facets[:, 1])
+        lengths = numpy.linalg.norm(normals, axis = 1)
+        lengths[lengths == 0] = 1  # Degenerate faces get a zero normal.
+        facets[:, 0] = normals / lengths[:, numpy.newaxis]
+        return facets
@@ -0,0 +1,123 @@
+# Copyright (c) 2018 Ultimaker B.V.
+# Uranium is released under the terms of the LGPLv3 or higher.
+
+import io
+import re
+import struct
+
+import numpy
+
+import STLWriter
+from UM.Math.Quaternion import Quaternion
+from UM.Math.Vector import Vector
+from UM.Mesh.MeshBuilder import MeshBuilder
+from UM.Mesh.MeshWriter import MeshWriter
+from UM.Scene.SceneNode import SceneNode
+
+
+##  Create a node with a tetrahedron that is moved, rotated and scaled, so
+#   that the world transformation and the axis swap both show in the output.
+def createNode(indexed):
+    builder = MeshBuilder()
+    builder.addFaceByPoints(0, 0, 0, 0, 0, 10, 10, 0, 0)  # Facing up in the scene.
+    builder.addFaceByPoints(0, 0, 0, 0, 20, 0, 0, 0, 10)
+    builder.addFaceByPoints(0, 0, 0, 10, 0, 0, 0, 20, 0)
+    builder.addFaceByPoints(10, 0, 0, 0, 0, 10, 0, 20, 0)
+    if indexed:
+        builder.weldVertices()
+    node = SceneNode()
+    node.setMeshData(builder.build())
+    node.setSelectable(True)
+    node.setPosition(Vector(5, 6, 7))
+    node.setOrientation(Quaternion.fromAngleAxis(0.5, Vector.Unit_Y))
+    node.setScale(Vector(2, 2, 2))
+    return node
+
+
+##  Get the facets that the writer should write for a node, computed one by
+#   one from the scene vertices.
+def expectedFacets(node):
+    mesh_data = node.getMeshData()
+    vertices = mesh_data.getVertices()
+    if mesh_data.hasIndices():
+        vertices = vertices[mesh_data.getIndices()].reshape((-1, 3))
+    world = node.getWorldTransformation().getData()
+    facets = []
+    for face in range(len(vertices) // 3):
+        corners = []
+        for vertex in vertices[face * 3:face * 3 + 3]:
+            x, y, z = world.dot(numpy.append(vertex, 1))[0:3]
+            corners.append([x, -z, y])  # STL has Z up.
+        corners = numpy.array(corners)
+        normal = numpy.cross(corners[1] - corners[0], corners[2] - corners[0])
+        facets.append(numpy.concatenate(([normal / numpy.linalg.norm(normal)], corners)))
+    return numpy.array(facets)
+
+
+def readBinary(data):
+    face_count = struct.unpack("<I", data[80:84])[0]
+    records = numpy.frombuffer(data, dtype = STLWriter.STL_BINARY_FACET_DTYPE, count = face_count, offset = 84)
+    assert len(data) == 84 + face_count * STLWriter.STL_BINARY_FACET_DTYPE.itemsize
+    return numpy.concatenate((records["normal"][:, numpy.newaxis], records["vertices"]), axis = 1)
+
+
+def readAscii(text):
+    assert text.startswith("solid ")
+    assert text.rstrip().split("\n")[-1].startswith("endsolid ")
+    values = re.findall(r"^\s*(?:facet normal|vertex)\s+(\S+)\s+(\S+)\s+(\S+)", text, re.MULTILINE)
+    return numpy.array(values, dtype = numpy.float64).reshape((-1, 4, 3))
+
+
+def test_writeBinary():
+    for indexed in (False, True):
+        node = createNode(indexed)
+        stream = io.BytesIO()
+
+        assert STLWriter.STLWriter().write(stream, [node], MeshWriter.OutputMode.BinaryMode)
+
+        facets = readBinary(stream.getvalue())
+        assert len(facets) == 4
+        assert numpy.allclose(facets, expectedFacets(node), atol = 1e-4)
+
+
+def test_writeAscii():
+    for indexed in (False, True):
+        node = createNode(indexed)
+        stream = io.StringIO()
+
+        assert STLWriter.STLWriter().write(stream, [node], MeshWriter.OutputMode.TextMode)
+
+        facets = readAscii(stream.getvalue())
+        assert len(facets) == 4
+        assert numpy.allclose(facets, expectedFacets(node), atol = 1e-4)
+
+
+##  The ASCII file must contain the same 32-bit floats as the binary file.
+def test_writeAsciiPrecision():
+    node = createNode(True)
+    node.setPosition(Vector(1 / 3, 123.456789, -2 / 7))
+    binary_stream = io.BytesIO()
+    ascii_stream = io.StringIO()
+
+    STLWriter.STLWriter().write(binary_stream, [node], MeshWriter.OutputMode.BinaryMode)
+    STLWriter.STLWriter().write(ascii_stream, [node], MeshWriter.OutputMode.TextMode)
+
+    assert numpy.array_equal(readAscii(ascii_stream.getvalue()).astype(numpy.float32), readBinary(binary_stream.getvalue()))
+
+
+def test_writeAxisSwap():
+    node = createNode(False)
+    node.setPosition(Vector(0, 0, 0))
+    node.setOrientation(Quaternion())
+    node.setScale(Vector(1, 1, 1))
+    stream = io.BytesIO()
+
+    STLWriter.STLWriter().write(stream, [node], MeshWriter.OutputMode.BinaryMode)
+
+    facets = readBinary(stream.getvalue())
+    # The face at Y = 0 that faces up in the scene is at Z = 0 in the file and faces up along Z, and the scene's Z of 10 becomes a Y of -10.
+    assert numpy.allclose(facets[0], [[0, 0, 1], [0, 0, 0], [0, -10, 0], [10, 0, 0]])
+
+
+def test_writeNothing():
+    assert not STLWriter.STLWriter().write(io.BytesIO(), [], MeshWriter.OutputMode.BinaryMode)
@@ -0,0 +1,45 @@
+# Copyright (c) 2018 Ultimaker B.V.
+# Uranium is released under the terms of the LGPLv3 or higher.
+
+import os
+
+from UM.Logger import Logger
+from UM.Mesh.MeshFormat import MeshFormatError, readMeshes
+from UM.Mesh.MeshReader import MeshReader
+from UM.Scene.SceneNode import SceneNode
+
+
+##  Reads Uranium's own mesh files, as written by UMeshWriter.
+#
+#   Arrays that were stored without encoding are memory-mapped from the file,
+#   so these files load almost instantly. The convex hulls are stored in the
+#   file as well.
+class UMeshReader(MeshReader):
+    def __init__(self):
+        super().__init__()
+        self._supported_extensions = [".umesh"]
+
+    ##  Read the nodes in a file.
+    #
+    #   \return A node, or a list of nodes if the file contains more than one.
+    #   Nodes that shared a mesh when they were written share it again.
+    def read(self, file_name):
+        try:
+            meshes = readMeshes(file_name)
+        except (OSError, MeshFormatError):
+            Logger.logException("e", "Unable to read mesh file %s", file_name)
+            return None
+
+        nodes = []
+        for name, mesh, transformation in meshes:
+            node = SceneNode()
+            node.setName(name if name else os.path.basename(file_name))
+            node.setMeshData(mesh)
+            if transformation is not None:
+                node.setTransformation(transformation)
+            nodes.append(node)
+
+        if not nodes:
+            Logger.log("d", "File did not contain any meshes, unable to read.")
+            return None
+        return nodes[0] if len(nodes) == 1 else nodes
@@ -0,0 +1,20 @@
+# Copyright (c) 2018 Ultimaker B.V.
+# Uranium is released under the terms of the LGPLv3 or higher.
+
+from . import UMeshReader
+
+from UM.i18n import i18nCatalog
+i18n_catalog = i18nCatalog("uranium")
+
+def getMetaData():
+    return {
+        "mesh_reader": [
+            {
+                "extension": "umesh",
+                "description": i18n_catalog.i18nc("@item:inlistbox", "Uranium Mesh File")
+            }
+        ]
+    }
+
+def register(app):
+    return { "mesh_reader": UMeshReader.UMeshReader() }
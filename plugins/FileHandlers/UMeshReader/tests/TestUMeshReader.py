@@ -0,0 +1,24 @@
+import numpy
+
+import UMeshReader
+from UM.Math.Vector import Vector
+from UM.Mesh.MeshBuilder import MeshBuilder
+from UM.Mesh.MeshFormat import writeMeshes
+
+
+def test_read(tmpdir):
+    builder = MeshBuilder()
+    builder.addCube(10, 10, 10)
+    builder.calculateNormals()
+    mesh = builder.build()
+    file_name = str(tmpdir.join("cubes.umesh"))
+    with open(file_name, "wb") as f:
+        writeMeshes(f, [("first", mesh, None), ("second", mesh, None)])
+
+    reader = UMeshReader.UMeshReader()
+    result = reader.read(file_name)
+
+    assert len(result) == 2
+    assert result[0].getName() == "first"
+    assert result[0].getMeshData() is result[1].getMeshData()
+    assert numpy.array_equal(result[0].getMeshData().getIndices(), mesh.getIndices())
@@ -0,0 +1,28 @@
+# Copyright (c) 2018 Ultimaker B.V.
+# Uranium is released under the terms of the LGPLv3 or higher.
+
+from UM.Logger import Logger
+from UM.Mesh.MeshFormat import writeMeshes
+from UM.Mesh.MeshWriter import MeshWriter
+
+
+##  Writes nodes to Uranium's own mesh files.
+#
+#   The positions, normals, indices and colours are encoded to keep the files
+#   small. Nodes that share a mesh share it in the file as well.
+class UMeshWriter(MeshWriter):
+    ##  Write the specified sequence of nodes to a stream.
+    #
+    #   \param stream The output stream to write to.
+    #   \param nodes A sequence of scene nodes to write to the output stream.
+    #   \param mode The output mode to use. Only binary mode is supported.
+    def write(self, stream, nodes, mode = MeshWriter.OutputMode.BinaryMode):
+        if mode != MeshWriter.OutputMode.BinaryMode:
+            Logger.log("e", "Uranium mesh files can only be written in binary mode")
+            return False
+
+        mesh_nodes = [(node.getName(), node.getMeshData(), node.getWorldTransformation()) for node in MeshWriter._meshNodes(nodes)]
+        if not mesh_nodes:
+            return False  # Don't try to write a file if there is no mesh.
+        writeMeshes(stream, mesh_nodes)
+        return True
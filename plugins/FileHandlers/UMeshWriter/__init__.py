@@ -0,0 +1,24 @@
+# Copyright (c) 2018 Ultimaker B.V.
+# Uranium is released under the terms of the LGPLv3 or higher.
+
+from . import UMeshWriter
+
+from UM.i18n import i18nCatalog
+i18n_catalog = i18nCatalog("uranium")
+
+def getMetaData():
+    return {
+        "mesh_writer": {
+            "output": [
+                {
+                    "mime_type": "application/x-uranium-mesh",
+                    "mode": UMeshWriter.UMeshWriter.OutputMode.BinaryMode,
+                    "extension": "umesh",
+                    "description": i18n_catalog.i18nc("@item:inlistbox", "Uranium Mesh File")
+                }
+            ]
+        }
+    }
+
+def register(app):
+    return { "mesh_writer": UMeshWriter.UMeshWriter() }
@@ -3,6 +3,7 @@
 
 from UM.Event import MouseEvent, KeyEvent
 from UM.Tool import Tool
+from UM.Math.AxisAlignedBoxArray import AxisAlignedBoxArray
 from UM.Application import Application
 from UM.Scene.Selection import Selection
 from UM.Scene.Iterator.BreadthFirstIterator import BreadthFirstIterator
@@ -79,17 +80,20 @@ class SelectionTool(Tool):
 
         ray = self._scene.getActiveCamera().getRay(event.x, event.y)
 
-        intersections = []
+        nodes = []
+        boxes = []
         for node in BreadthFirstIterator(root):
             if node.isEnabled() and not node.isLocked():
-                intersection = node.getBoundingBox().intersectsRay(ray)
-                if intersection:
-                    intersections.append((node, intersection[0], intersection[1]))
+                bounding_box = node.getBoundingBox()
+                if bounding_box is not None:
+                    nodes.append(node)
+                    boxes.append(bounding_box)
 
-        if intersections:
-            intersections.sort(key=lambda k: k[1])
+        # Intersect the ray with all bounding boxes at once. The hits are sorted by distance.
+        hits, _ = AxisAlignedBoxArray.fromBoxes(boxes).intersectsRay(ray)
 
-            node = intersections[0][0]
+        if len(hits) > 0:
+            node = nodes[hits[0]]
             if not Selection.isSelected(node):
                 if not self._shift_is_active:
                     Selection.clear()
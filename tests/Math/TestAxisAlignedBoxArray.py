@@ -0,0 +1,47 @@
+# Copyright (c) 2018 Ultimaker B.V.
+# Uranium is released under the terms of the LGPLv3 or higher.
+
+import unittest
+import numpy
+from UM.Math.AxisAlignedBox import AxisAlignedBox
+from UM.Math.AxisAlignedBoxArray import AxisAlignedBoxArray
+from UM.Math.Ray import Ray
+from UM.Math.Vector import Vector
+
+class TestAxisAlignedBoxArray(unittest.TestCase):
+    def test_conversion(self):
+        boxes = [AxisAlignedBox(Vector(0, 0, 0), Vector(1, 2, 3)), AxisAlignedBox(Vector(-1, -1, -1), Vector(5, 5, 5))]
+        array = AxisAlignedBoxArray.fromBoxes(boxes)
+
+        self.assertEqual(len(array), 2)
+        numpy.testing.assert_array_equal(array.getData(), [[0, 0, 0, 1, 2, 3], [-1, -1, -1, 5, 5, 5]])
+        self.assertEqual(array[1].maximum, Vector(5, 5, 5))
+        self.assertEqual(array.getMinimum()[0], Vector(0, 0, 0))
+        self.assertFalse(array.getData().flags.writeable)
+
+    def test_intersectsRay(self):
+        ray = Ray(Vector(0, 0, 20), Vector(0, 0, -1))
+        array = AxisAlignedBoxArray([[-5, -5, -5, 5, 5, 5], [20, 20, 20, 30, 30, 30], [-1, -1, 8, 1, 1, 10]])
+
+        hits, distances = array.intersectsRay(ray)
+
+        numpy.testing.assert_array_equal(hits, [2, 0])
+        numpy.testing.assert_array_almost_equal(distances, [[10, 12], [15, 25]])
+
+    def test_intersectsRayMatchesAxisAlignedBox(self):
+        random = numpy.random.RandomState(0)
+        minimum = random.rand(200, 3) * 100 - 50
+        array = AxisAlignedBoxArray(numpy.concatenate((minimum, minimum + random.rand(200, 3) * 20), axis = 1))
+        ray = Ray(Vector(-60, -50, -40), Vector(1, 0.9, 0.8).normalized())
+
+        hits, distances = array.intersectsRay(ray)
+
+        expected = []
+        for index in range(len(array)):
+            intersection = array.getBox(index).intersectsRay(ray)
+            if intersection:
+                expected.append((intersection[0], index, intersection[1]))
+        expected.sort()
+        self.assertGreater(len(expected), 0)
+        numpy.testing.assert_array_equal(hits, [index for _, index, _ in expected])
+        numpy.testing.assert_array_almost_equal(distances, [(entry, leave) for entry, _, leave in expected], decimal = 3)
@@ -0,0 +1,58 @@
+# Copyright (c) 2018 Ultimaker B.V.
+# Uranium is released under the terms of the LGPLv3 or higher.
+
+import unittest
+import numpy
+from UM.Math.Matrix import Matrix
+from UM.Math.MatrixArray import MatrixArray
+from UM.Math.Vector import Vector
+from UM.Math.VectorArray import VectorArray
+
+class TestMatrixArray(unittest.TestCase):
+    def setUp(self):
+        first = Matrix()
+        first.compose(scale = Vector(1, 2, 3), angles = Vector(0.1, 0.2, 0.3), translate = Vector(4, 5, 6))
+        second = Matrix()
+        second.compose(scale = Vector(-1, 1, 2), angles = Vector(-0.5, 0.4, 1), translate = Vector(-1, 0, 1))
+        self._matrices = [first, second, Matrix()]
+        self._array = MatrixArray.fromMatrices(self._matrices)
+
+    def test_conversion(self):
+        self.assertEqual(len(self._array), 3)
+        self.assertEqual(self._array.toMatrices(), self._matrices)
+        self.assertEqual(self._array[1], self._matrices[1])
+
+    def test_multiply(self):
+        other = Matrix()
+        other.setByTranslation(Vector(1, 2, 3))
+
+        result = self._array.multiply(other)
+
+        for matrix, result_matrix in zip(self._matrices, result):
+            numpy.testing.assert_array_almost_equal(result_matrix._data, matrix.multiply(other, copy = True)._data)
+
+    def test_getInverse(self):
+        singular = MatrixArray(numpy.zeros((4, 4)))
+        array = MatrixArray(numpy.concatenate((self._array.getData(), singular.getData())))
+
+        inverse = array.getInverse()
+
+        for matrix, inverse_matrix in zip(self._matrices, inverse):
+            numpy.testing.assert_array_almost_equal(inverse_matrix._data, matrix.getInverse()._data)
+        self.assertEqual(inverse[3], Matrix(numpy.zeros((4, 4))))
+
+    def test_transformPoints(self):
+        points = VectorArray([[1, 2, 3], [4, 5, 6], [7, 8, 9]])
+
+        result = self._array.transformPoints(points)
+
+        for index, matrix in enumerate(self._matrices):
+            self.assertTrue(result[index].equals(points[index].preMultiply(matrix)))
+        self.assertEqual(self._array.transformPoints(Vector(0, 0, 0)), self._array.getTranslations())
+
+    def test_decompose(self):
+        results = self._array.decompose()
+
+        for index, matrix in enumerate(self._matrices):
+            for result, expected in zip(results, matrix.decompose()):
+                self.assertTrue(result[index].equals(expected), "{0} != {1}".format(result[index], expected))
@@ -0,0 +1,40 @@
+# Copyright (c) 2018 Ultimaker B.V.
+# Uranium is released under the terms of the LGPLv3 or higher.
+
+from UM.Math.Polygon import Polygon
+from UM.Math.PolygonArray import PolygonArray
+
+import numpy
+
+def square(x, y, size = 10):
+    return Polygon(numpy.array([[x, y], [x + size, y], [x + size, y + size], [x, y + size]], numpy.float32))
+
+def test_findIntersections():
+    polygons = [square(0, 0), square(5, 2), square(30, 0), square(38, 0), Polygon(), square(100, 100)]
+
+    pairs, translations = PolygonArray(polygons).findIntersections()
+
+    assert pairs.tolist() == [[0, 1], [2, 3]]
+    for (first, second), translation in zip(pairs, translations):
+        expected = polygons[first].intersectsPolygon(polygons[second])
+        assert numpy.allclose(translation, expected)
+
+def test_findIntersectionsMatchesPolygon():
+    random = numpy.random.RandomState(0)
+    polygons = [Polygon(random.rand(8, 2) * 20 + random.rand(2) * 100).getConvexHull() for _ in range(50)]
+
+    pairs, translations = PolygonArray(polygons).findIntersections()
+
+    expected_pairs = [(first, second) for first in range(len(polygons)) for second in range(first + 1, len(polygons))
+                      if polygons[first].intersectsPolygon(polygons[second]) is not None]
+    assert [tuple(pair) for pair in pairs.tolist()] == expected_pairs
+    for (first, second), translation in zip(pairs, translations):
+        assert numpy.allclose(translation, polygons[first].intersectsPolygon(polygons[second]))
+
+def test_findIntersectionsWith():
+    array = PolygonArray([square(0, 0), square(30, 0), square(12, 0)])
+
+    indices, translations = array.findIntersectionsWith(square(8, 0))
+
+    assert indices.tolist() == [0, 2]
+    assert numpy.allclose(translations[0], [2, 0])
@@ -0,0 +1,58 @@
+# Copyright (c) 2018 Ultimaker B.V.
+# Uranium is released under the terms of the LGPLv3 or higher.
+
+from UM.Math.Polygon import Polygon
+from UM.Math.SpatialIndex import SpatialIndex
+
+import numpy
+
+def square(x, y, size = 10):
+    return Polygon(numpy.array([[x, y], [x + size, y], [x + size, y + size], [x, y + size]], numpy.float32))
+
+def test_insertMoveRemove():
+    index = SpatialIndex(cell_size = 20)
+    index.insert("a", square(0, 0))
+    index.insert("b", square(50, 50))
+    assert len(index) == 2
+    assert sorted(index.queryRange((-5, -5), (60, 60))) == ["a", "b"]
+
+    index.update("a", square(200, 200, size = 50))
+    assert index.queryRange((0, 0), (20, 20)) == []
+    assert index.queryPoint(225, 240) == ["a"]
+
+    index.remove("a")
+    assert "a" not in index
+    assert index.queryPoint(225, 240) == []
+    assert index.queryRange((-1000, -1000), (1000, 1000)) == ["b"]
+
+def test_queryPolygonMatchesPolygon():
+    random = numpy.random.RandomState(0)
+    polygons = [Polygon(random.rand(8, 2) * 20 + random.rand(2) * 200).getConvexHull() for _ in range(100)]
+    index = SpatialIndex(cell_size = 15)
+    for key, polygon in enumerate(polygons):
+        index.insert(key, polygon)
+
+    query = square(80, 60, size = 40)
+    expected = [key for key, polygon in enumerate(polygons) if polygon.intersectsPolygon(query) is not None]
+    assert sorted(index.queryPolygon(query)) == expected
+
+def test_queryNearest():
+    random = numpy.random.RandomState(1)
+    index = SpatialIndex(cell_size = 10)
+    polygons = [square(*(random.rand(2) * 500), size = 5) for _ in range(200)]
+    for key, polygon in enumerate(polygons):
+        index.insert(key, polygon)
+
+    for x, y in [(250, 250), (3, 498), (-400, 1000)]:
+        distances = []
+        for key, polygon in enumerate(polygons):
+            points = polygon.getPoints()
+            closest = numpy.clip([x, y], points.min(axis = 0), points.max(axis = 0))  # Exact for squares.
+            distances.append((numpy.linalg.norm(closest - [x, y]), key))
+        expected = [key for _, key in sorted(distances)[0:3]]
+
+        result = index.queryNearest(x, y, count = 3)
+        assert [key for key, _ in result] == expected
+        assert numpy.allclose([distance for _, distance in result], [distance for distance, _ in sorted(distances)[0:3]])
+
+    assert index.queryNearest(*polygons[7].getPoints()[0] + 1)[0] == (7, 0.0)
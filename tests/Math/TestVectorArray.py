@@ -0,0 +1,41 @@
+# Copyright (c) 2018 Ultimaker B.V.
+# Uranium is released under the terms of the LGPLv3 or higher.
+
+import unittest
+import numpy
+from UM.Math.Matrix import Matrix
+from UM.Math.Vector import Vector
+from UM.Math.VectorArray import VectorArray
+
+class TestVectorArray(unittest.TestCase):
+    def test_conversion(self):
+        vectors = [Vector(1, 2, 3), Vector(4, 5, 6)]
+        array = VectorArray.fromVectors(vectors)
+
+        self.assertEqual(len(array), 2)
+        self.assertEqual(array[1], Vector(4, 5, 6))
+        self.assertEqual(list(array), vectors)
+        self.assertTrue(numpy.shares_memory(array.getVector(0)._data, array.getData()))  # Not copied.
+        self.assertTrue(numpy.shares_memory(VectorArray(array.getData()).getData(), array.getData()))
+        self.assertFalse(array.getData().flags.writeable)
+
+    def test_arithmetic(self):
+        array = VectorArray([[1, 0, 0], [0, 2, 0]])
+
+        self.assertEqual(array + Vector(1, 1, 1), VectorArray([[2, 1, 1], [1, 3, 1]]))
+        self.assertEqual(array * 2 - array, array)
+        numpy.testing.assert_array_almost_equal(array.lengths(), [1, 2])
+        numpy.testing.assert_array_almost_equal(array.dot(Vector(1, 1, 0)), [1, 2])
+        self.assertEqual(array.normalized().cross(Vector(0, 0, 1)), VectorArray([[0, -1, 0], [1, 0, 0]]))
+        self.assertEqual(array.getBoundingBox().maximum, Vector(1, 2, 0))
+
+    def test_preMultiply(self):
+        matrix = Matrix()
+        matrix.setByTranslation(Vector(10, 0, 0))
+        matrix.multiply(Matrix(numpy.diag([2, 2, 2, 1])))
+        array = VectorArray([[1, 2, 3], [4, 5, 6]])
+
+        result = array.preMultiply(matrix)
+
+        for index, vector in enumerate(array):
+            self.assertEqual(result[index], vector.preMultiply(matrix))
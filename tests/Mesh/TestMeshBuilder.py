@@ -0,0 +1,80 @@
+# Copyright (c) 2018 Ultimaker B.V.
+# Uranium is released under the terms of the LGPLv3 or higher.
+
+import numpy
+
+from UM.Mesh.MeshBuilder import MeshBuilder
+from UM.Mesh.MeshData import weldVertices
+
+
+def test_weldVertices():
+    builder = MeshBuilder()
+    builder.addFaceByPoints(0, 0, 0, 1, 0, 0, 0, 1, 0)
+    builder.addFaceByPoints(1, 0, 0, 1, 1, 0, 0, 1, 0)
+    vertices = builder.getVertices().copy()
+
+    builder.weldVertices()
+
+    assert builder.getVertexCount() == 4
+    assert builder.getFaceCount() == 2
+    assert numpy.array_equal(builder.getVertices()[builder.getIndices()].reshape((-1, 3)), vertices)
+    assert numpy.allclose(builder.getNormals(), [[0, 0, 1]] * 4)
+
+def test_weldVerticesTolerance():
+    vertices = numpy.array([[0, 0, 0], [0.001, 0, 0], [1, 0, 0], [-0.0, 0, 0], [0, 1, 0], [1.001, 0, 0]], dtype = numpy.float32)
+
+    welded, indices, vertex_map = weldVertices(vertices)
+    assert len(welded) == 5  # Only 0 and -0 are identical.
+    assert list(vertex_map) == [0, 1, 2, 0, 3, 4]
+
+    welded, indices, vertex_map = weldVertices(vertices, tolerance = 0.01)
+    assert len(welded) == 3
+    assert list(vertex_map) == [0, 0, 1, 0, 2, 1]
+    assert list(indices[1]) == [0, 2, 1]
+
+def test_weldVerticesCollidingKeys():
+    # These keys would have the same hash if the vertices were grouped by a hash of their coordinates.
+    vertices = numpy.array([[-30, -1, 29], [-30, 1, -29], [-30, -1, 29], [-30, 1, -29], [-30, -1, 29]], dtype = numpy.float32)
+    welded, indices, vertex_map = weldVertices(vertices, tolerance = 1)
+    assert len(welded) == 2
+    assert list(vertex_map) == [0, 1, 0, 1, 0]
+
+    grid = numpy.arange(-6, 7, dtype = numpy.float32)
+    lattice = numpy.stack(numpy.meshgrid(grid, grid, grid, indexing = "ij"), axis = 3).reshape((-1, 3))
+    vertices = numpy.concatenate([lattice] * 6)[numpy.random.RandomState(0).permutation(len(lattice) * 6)]
+    welded, indices, vertex_map = weldVertices(vertices, tolerance = 0.001)
+    assert len(welded) == 13 * 13 * 13
+    assert numpy.array_equal(welded[vertex_map], vertices)
+
+def test_addIndexedFaces():
+    builder = MeshBuilder()
+    builder.addVertex(5, 5, 5)
+    vertices = numpy.array([[0, 0, 0], [1, 0, 0], [0, 1, 0], [1, 1, 0]], dtype = numpy.float32)
+    colors = numpy.ones((4, 4), dtype = numpy.float32)
+
+    builder.addIndexedFaces(vertices, numpy.array([[0, 1, 2], [1, 3, 2]]), colors = colors)
+
+    assert builder.getVertexCount() == 5
+    assert numpy.array_equal(builder.getVertices()[1:5], vertices)
+    assert numpy.array_equal(builder.getIndices(), [[1, 2, 3], [2, 4, 3]])
+    assert numpy.array_equal(builder.getColors()[0:5], [[0, 0, 0, 0]] + [[1, 1, 1, 1]] * 4) # The earlier vertex gets no colour.
+
+def test_addFacesByPointsArray():
+    points = numpy.array([[0, 0, 0, 1, 0, 0, 0, 1, 0], [1, 0, 0, 1, 1, 0, 0, 1, 0]], dtype = numpy.float32)
+    bulk = MeshBuilder()
+    bulk.addFacesByPointsArray(points)
+    single = MeshBuilder()
+    for face in points:
+        single.addFaceByPoints(*face)
+
+    assert bulk.getVertexCount() == single.getVertexCount() == 6
+    assert numpy.array_equal(bulk.getVertices()[0:6], single.getVertices()[0:6])
+    assert numpy.array_equal(bulk.getVertices()[bulk.getIndices()], single.getVertices()[single.getIndices()])
+
+def test_addVerticesWithNormals():
+    builder = MeshBuilder()
+    builder.addVerticesWithNormals(numpy.array([[0, 0, 0, 0, 0, 1], [1, 0, 0, 0, 1, 0]]))
+    builder.addVertexWithNormal(2, 0, 0, 1, 0, 0)
+
+    assert builder.getVertexCount() == 3
+    assert numpy.array_equal(builder.getNormals()[0:3], [[0, 0, 1], [0, 1, 0], [1, 0, 0]])
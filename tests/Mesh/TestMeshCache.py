@@ -0,0 +1,82 @@
+# Copyright (c) 2018 Ultimaker B.V.
+# Uranium is released under the terms of the LGPLv3 or higher.
+
+import os
+
+import numpy
+
+from UM.Math.Vector import Vector
+from UM.Mesh.MeshBuilder import MeshBuilder
+from UM.Mesh.MeshCache import MeshCache
+
+
+def createMesh():
+    builder = MeshBuilder()
+    builder.addCube(10, 20, 30, center = Vector(1, 2, 3))
+    builder.calculateNormals()
+    builder.setFileName("cube.stl")
+    return builder.build()
+
+def test_storeAndLoad(tmpdir):
+    source = tmpdir.join("cube.stl")
+    source.write("solid cube")
+    cache = MeshCache(str(tmpdir.join("cache")))
+    key = cache.getKey(str(source))
+    mesh = createMesh()
+
+    assert cache.load(key) is None
+    assert cache.store(key, mesh)
+    cached = cache.load(key)
+
+    assert cached is not None
+    assert numpy.array_equal(cached.getVertices(), mesh.getVertices())
+    assert numpy.array_equal(cached.getNormals(), mesh.getNormals())
+    assert numpy.array_equal(cached.getIndices(), mesh.getIndices())
+    assert cached.getFileName() == "cube.stl"
+    assert cached.getExtents().minimum == mesh.getExtents().minimum
+    assert not cached.getVertices().flags.writeable
+
+def test_storeConvexHull(tmpdir):
+    cache = MeshCache(str(tmpdir))
+    mesh = createMesh()
+
+    cache.store("without_hull", mesh)
+    assert not mesh.hasConvexHull()  # Storing doesn't compute the hull.
+    assert not cache.load("without_hull").hasConvexHull()
+
+    mesh.getConvexHull()
+    cache.store("with_hull", mesh)
+    cached = cache.load("with_hull")
+    assert cached.hasConvexHull()
+    assert numpy.allclose(numpy.sort(cached.getConvexHullVertices(), axis = 0), numpy.sort(mesh.getConvexHullVertices(), axis = 0))
+
+    cache.store("computed_hull", createMesh(), compute_convex_hull = True)
+    assert cache.load("computed_hull").hasConvexHull()
+
+def test_keyChanges(tmpdir):
+    source = tmpdir.join("cube.stl")
+    source.write("solid cube")
+    cache = MeshCache(str(tmpdir.join("cache")))
+    key = cache.getKey(str(source))
+
+    assert cache.getKey(str(source)) == key
+    assert cache.getKey(str(source), settings = "weld_vertices=True") != key
+    source.write("solid other cube")
+    assert cache.getKey(str(source)) != key
+    assert cache.getKey(str(tmpdir.join("missing.stl"))) is None
+
+def test_evictLeastRecentlyUsed(tmpdir):
+    cache = MeshCache(str(tmpdir))
+    mesh = createMesh()
+    cache.store("old", mesh)
+    cache.store("new", mesh)
+    entry_size = cache.getSize() // 2
+    os.utime(str(tmpdir.join("new.mesh")), (0, 0))  # Pretend the newer entry hasn't been used for a long time.
+    cache.load("old")
+
+    cache.setMaxSize(entry_size * 2)
+    cache.store("newest", mesh)
+
+    assert cache.load("new") is None
+    assert cache.load("old") is not None
+    assert cache.load("newest") is not None
@@ -0,0 +1,268 @@
+# Copyright (c) 2018 Ultimaker B.V.
+# Uranium is released under the terms of the LGPLv3 or higher.
+
+import gc
+import math
+
+import numpy
+import pytest
+import scipy.spatial
+
+import UM.Mesh.MeshData
+from UM.Math.Matrix import Matrix
+from UM.Math.Vector import Vector
+from UM.Mesh.ConvexHullJob import ConvexHullJob
+from UM.Mesh.MeshBuilder import MeshBuilder
+from UM.Mesh.MeshData import MeshData, calculateNormalsFromIndexedVertices, createMemoryMappedArray, transformNormals, transformVertices, transformVerticesBatch
+from UM.Mesh.MeshDataRegistry import MeshDataRegistry
+from UM.Scene.SceneNode import SceneNode
+
+# Two faces of a unit cube that share the edge from (1, 0, 0) to (1, 1, 0).
+vertices = numpy.array([[0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 1, 0], [1, 0, -1], [1, 1, -1]], dtype = numpy.float32)
+indices = numpy.array([[0, 1, 2], [0, 2, 3], [1, 4, 5], [1, 5, 2]], dtype = numpy.int32)
+
+
+def test_calculateFlatNormals():
+    normals = calculateNormalsFromIndexedVertices(vertices, indices, len(indices))
+
+    assert normals.shape == (6, 3)  # One normal per vertex, not per corner.
+    assert numpy.allclose(normals[[0, 3]], [[0, 0, 1], [0, 0, 1]])
+    assert numpy.allclose(normals[[4, 5]], [[1, 0, 0], [1, 0, 0]])
+
+def test_calculateSmoothNormals():
+    normals = calculateNormalsFromIndexedVertices(vertices, indices, len(indices), smooth = True)
+
+    assert numpy.allclose(numpy.linalg.norm(normals, axis = 1), 1)
+    assert numpy.allclose(normals[0], [0, 0, 1])
+    # Vertex 1 is used by one front triangle and two side triangles of the same area.
+    assert numpy.allclose(normals[1], numpy.array([2, 0, 1]) / numpy.sqrt(5))
+
+def test_calculateAngleWeightedNormals():
+    normals = calculateNormalsFromIndexedVertices(vertices, indices, len(indices), smooth = True, angle_weighted = True)
+
+    # The faces around vertex 1 and 2 cover a right angle on both sides.
+    assert numpy.allclose(normals[1], numpy.array([1, 0, 1]) / numpy.sqrt(2))
+    assert numpy.allclose(normals[2], numpy.array([1, 0, 1]) / numpy.sqrt(2))
+
+def test_memoryMappedMesh(tmpdir, monkeypatch):
+    monkeypatch.setattr(UM.Mesh.MeshData, "CHUNK_VERTEX_COUNT", 4)  # Make sure that everything is done in multiple chunks.
+    points = numpy.random.RandomState(0).uniform(-1, 1, (50, 3)).astype(numpy.float32)
+    mapped = createMemoryMappedArray(points, str(tmpdir.join("vertices.npy")))
+    mesh = MeshData(vertices = mapped)
+    in_memory = MeshData(vertices = points)
+
+    assert isinstance(mesh.getVertices(), numpy.memmap)  # Not copied into memory.
+    assert numpy.array_equal(numpy.load(str(tmpdir.join("vertices.npy"))), points)
+
+    transformation = Matrix()
+    transformation.setByRotationAxis(0.5, Vector.Unit_Z)
+    transformation.translate(Vector(1, 2, 3))
+    assert numpy.allclose(mesh.getTransformed(transformation).getVertices(), in_memory.getTransformed(transformation).getVertices())
+    assert numpy.allclose(mesh.getTransformed(transformation).getVertices(), points.dot(transformation.getData()[0:3, 0:3].T) + transformation.getData()[0:3, 3], atol = 1e-6)
+
+    monkeypatch.setattr(UM.Mesh.MeshData, "CHUNK_VERTEX_COUNT", 20)
+    expected_hull = scipy.spatial.ConvexHull(points)
+    hull = mesh.getConvexHullVertices()
+    assert sorted(map(tuple, hull)) == sorted(map(tuple, points[expected_hull.vertices]))
+
+def test_getHash():
+    mesh = MeshData(vertices = vertices, indices = indices)
+    hash = mesh.getHash()
+
+    assert hash == MeshData(vertices = vertices.copy(), indices = indices.copy()).getHash()
+    assert hash != MeshData(vertices = vertices).getHash()  # The indices are part of the hash.
+    assert hash != MeshData(vertices = vertices + 1, indices = indices).getHash()
+    assert hash != MeshData(vertices = vertices.astype(numpy.float64), indices = indices).getHash()
+    assert MeshData(vertices = vertices[::2], indices = indices).getHash()  # Arrays that are not contiguous can be hashed too.
+    assert MeshData().getHash()
+
+def test_deduplicate():
+    registry = MeshDataRegistry()
+    mesh = MeshData(vertices = vertices, indices = indices, file_name = "part.stl")
+    copy = MeshData(vertices = vertices.copy(), indices = indices.copy(), file_name = "part.stl")
+    other_file = MeshData(vertices = vertices, indices = indices, file_name = "other.stl")
+
+    assert registry.deduplicate(mesh) is mesh
+    assert registry.deduplicate(copy) is mesh
+    assert registry.deduplicate(other_file) is other_file
+    assert registry.getMeshCount() == 2
+
+    del mesh, copy, other_file
+    gc.collect()
+    assert registry.getMeshCount() == 0  # Meshes that are no longer used are forgotten.
+
+def test_getVerticesAsByteArray():
+    mesh = MeshData(vertices = vertices, indices = indices)
+
+    assert bytes(mesh.getVerticesAsByteArray()) == vertices.tobytes()
+    assert len(mesh.getIndicesAsByteArray()) == indices.nbytes
+    assert mesh.getVerticesAsByteArray().obj is mesh.getVertices()  # Not copied.
+    assert mesh.getNormalsAsByteArray() is None
+
+def test_getInterleavedVertexBuffer():
+    colors = numpy.tile(numpy.array([[1, 0, 0, 1]], dtype = numpy.float32), (len(vertices), 1))
+    layer = numpy.arange(len(vertices), dtype = numpy.int32)
+    mesh = MeshData(vertices = vertices, colors = colors, attributes = {"layer": {"value": layer, "opengl_name": "a_layer", "opengl_type": "int"}})
+
+    stride, layout = mesh.getInterleavedVertexLayout()
+    assert stride == (3 + 4 + 1) * 4
+    assert [(attribute["opengl_name"], attribute["offset"]) for attribute in layout] == [("a_vertex", 0), ("a_color", 12), ("a_layer", 28)]
+
+    data = mesh.getInterleavedVertexBuffer()
+    assert len(data) == stride * len(vertices)
+    floats = numpy.frombuffer(data, dtype = numpy.float32).reshape((len(vertices), -1))
+    assert numpy.array_equal(floats[:, 0:3], vertices)
+    assert numpy.array_equal(floats[:, 3:7], colors)
+    assert numpy.array_equal(numpy.frombuffer(data, dtype = numpy.int32).reshape((len(vertices), -1))[:, 7], layer)
+    assert bytes(mesh.getInterleavedVertexBuffer(2, 5)) == bytes(data[2 * stride:5 * stride])  # Part of the buffer, for uploading in chunks.
+
+def test_getInterleavedVertexLayoutUnsupportedType(monkeypatch):
+    errors = []
+    monkeypatch.setattr(UM.Mesh.MeshData.Logger, "log", lambda log_type, message, *args: errors.append(message) if log_type == "e" else None)
+    mesh = MeshData(vertices = vertices, attributes = {"weird": {"value": numpy.zeros((len(vertices), 9), dtype = numpy.float32), "opengl_name": "a_weird", "opengl_type": "matrix3f"}})
+
+    for _ in range(3):  # Like drawing the mesh several times.
+        stride, layout = mesh.getInterleavedVertexLayout()
+        mesh.getInterleavedVertexBuffer()
+
+    assert stride == 3 * 4
+    assert [attribute["opengl_name"] for attribute in layout] == ["a_vertex"]  # The attribute that can't be used is left out.
+    assert len(errors) == 1  # It is only reported once, not on every draw.
+
+def test_getTransformedKeepsConvexHull(monkeypatch):
+    points = numpy.random.RandomState(1).uniform(-1, 1, (200, 3)).astype(numpy.float32)
+    mesh = MeshData(vertices = points)
+    mesh.getConvexHull()
+    transformation = Matrix()
+    transformation.setByRotationAxis(0.3, Vector.Unit_Y)
+    transformation.scaleByFactor(2)
+    expected = MeshData(vertices = points).getTransformed(transformation).getExtents()
+
+    def failingConvexHull(vertices, target_count):
+        raise AssertionError("The convex hull of all vertices should not be computed again.")
+    monkeypatch.setattr(UM.Mesh.MeshData, "approximateConvexHull", failingConvexHull)
+    transformed = mesh.getTransformed(transformation)
+    extents = transformed.getExtents()
+
+    assert numpy.allclose(extents.minimum.getData(), expected.minimum.getData(), atol = 1e-5)
+    assert numpy.allclose(extents.maximum.getData(), expected.maximum.getData(), atol = 1e-5)
+    assert len(transformed.getConvexHullVertices()) == len(mesh.getConvexHullVertices())
+
+def test_getExtentsWithoutConvexHull(monkeypatch):
+    def failingConvexHull(vertices, target_count):
+        raise AssertionError("The extents should not need the convex hull.")
+    monkeypatch.setattr(UM.Mesh.MeshData, "approximateConvexHull", failingConvexHull)
+    extents = MeshData(vertices = vertices).getExtents()
+
+    assert extents.minimum == Vector(0, 0, -1)
+    assert extents.maximum == Vector(1, 1, 0)
+
+def test_convexHullJob():
+    node = SceneNode()
+    node.setMeshData(MeshData(vertices = vertices))
+    child = SceneNode(node)
+    child.setMeshData(MeshData(vertices = vertices + 1))
+
+    ConvexHullJob([node]).run()
+
+    assert node.getMeshData()._convex_hull is not None
+    assert child.getMeshData()._convex_hull is not None
+
+def test_transformNormalsNonUniformScale():
+    # A slope of 45 degrees, which becomes steeper when stretched along Y.
+    normals = (numpy.array([[0, 1, 1]]) / numpy.sqrt(2)).astype(numpy.float32)
+    transformation = Matrix()
+    transformation.setByScaleVector(Vector(1, 2, 1))
+
+    transformed = transformNormals(normals, transformation)
+
+    assert transformed.dtype == numpy.float32
+    assert numpy.allclose(transformed, numpy.array([[0, 1, 2]]) / numpy.sqrt(5))  # Still perpendicular to the stretched slope.
+
+def test_transformVerticesInPlace():
+    transformation = Matrix()
+    transformation.setByTranslation(Vector(1, 2, 3))
+    data = vertices.copy()
+
+    result = transformVertices(data, transformation, out = data)
+
+    assert result is data
+    assert numpy.array_equal(data, vertices + [1, 2, 3])
+
+def test_transformIntegerVertices():
+    transformation = Matrix()
+    transformation.setByRotationAxis(math.pi / 4, Vector.Unit_Y)
+    data = numpy.array([[10, 0, 0], [0, 10, 0], [0, 0, 10]], dtype = numpy.int32)
+    half = 10 / math.sqrt(2)
+    expected = [[half, 0, -half], [0, 10, 0], [half, 0, half]]
+
+    result = transformVertices(data, transformation)
+    assert result.dtype.kind == "f"
+    assert numpy.allclose(result, expected, atol = 1e-4)
+    assert numpy.allclose(MeshData(vertices = data).getTransformed(transformation).getVertices(), expected, atol = 1e-4)
+    assert numpy.allclose(transformNormals(numpy.array([[0, 1, 0]]), transformation), [[0, 1, 0]])
+
+def test_transformVerticesBatch():
+    first = Matrix()
+    first.setByTranslation(Vector(10, 0, 0))
+    second = Matrix()
+    second.setByScaleFactor(2)
+
+    result = transformVerticesBatch([vertices, vertices[0:2]], [first, second])
+
+    assert result.shape == (len(vertices) + 2, 3)
+    assert numpy.array_equal(result[0:len(vertices)], transformVertices(vertices, first))
+    assert numpy.array_equal(result[len(vertices):], vertices[0:2] * 2)
+
+def test_splitConnectedComponents():
+    # The faces of the cube and a copy that is moved away, with their own vertices like in STL files.
+    triangles = vertices[indices].reshape((-1, 3))
+    mesh = MeshData(vertices = numpy.concatenate((triangles, triangles + [5, 0, 0])))
+
+    components = mesh.splitConnectedComponents()
+
+    assert len(components) == 2
+    assert numpy.array_equal(components[0].getVertices(), triangles)
+    assert numpy.array_equal(components[1].getVertices(), triangles + [5, 0, 0])
+
+def test_splitConnectedComponentsIndexed():
+    mesh = MeshData(vertices = numpy.concatenate((vertices + [5, 0, 0], vertices)), indices = numpy.concatenate((indices + len(vertices), indices)))
+
+    components = mesh.splitConnectedComponents()
+
+    # Components are in order of their first face, with their vertices renumbered.
+    assert len(components) == 2
+    assert numpy.array_equal(components[0].getVertices(), vertices)
+    assert numpy.array_equal(components[0].getIndices(), indices)
+    assert numpy.array_equal(components[1].getVertices(), vertices + [5, 0, 0])
+
+    single = MeshData(vertices = vertices, indices = indices)
+    assert single.splitConnectedComponents() == [single]
+
+def test_metrics():
+    builder = MeshBuilder()
+    builder.addCube(10, 20, 30, center = Vector(1, 2, 3))
+    mesh = builder.build()
+
+    assert abs(mesh.getVolume()) == pytest.approx(6000)
+    assert mesh.getSurfaceArea() == pytest.approx(2 * (10 * 20 + 20 * 30 + 10 * 30))
+    assert mesh.getCenterOfMass() == Vector(1, 2, 3)
+    footprint = mesh.getFootprint()
+    assert len(footprint.getPoints()) == 4
+    assert numpy.allclose(footprint.getPoints().min(axis = 0), [-4, -12])
+
+def test_metricsCarriedThroughTransform(monkeypatch):
+    builder = MeshBuilder()
+    builder.addCube(10, 10, 10)
+    mesh = builder.build()
+    volume = mesh.getVolume()
+    mesh.getSurfaceArea()
+    transformation = Matrix()
+    transformation.setByScaleVector(Vector(2, 1, 1))
+    transformation.translate(Vector(5, 0, 0))
+
+    transformed = mesh.getTransformed(transformation)
+    monkeypatch.setattr(transformed, "_computeMetrics", lambda: pytest.fail("The metrics should be carried over."))
+
+    assert transformed.getVolume() == pytest.approx(volume * 2)
+    assert transformed.getCenterOfMass() == Vector(10, 0, 0)
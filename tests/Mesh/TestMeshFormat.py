@@ -0,0 +1,80 @@
+# Copyright (c) 2018 Ultimaker B.V.
+# Uranium is released under the terms of the LGPLv3 or higher.
+
+import numpy
+import pytest
+
+from UM.Math.Matrix import Matrix
+from UM.Math.Vector import Vector
+from UM.Mesh.MeshBuilder import MeshBuilder
+from UM.Mesh.MeshFormat import MeshFormatError, QUANTIZATION_MAXIMUM, readMesh, readMeshes, writeMesh, writeMeshes, _decodeDeltaVarint, _encodeDeltaVarint
+
+
+def createMesh():
+    builder = MeshBuilder()
+    builder.addCube(10, 20, 30, center = Vector(1, 2, 3))
+    builder.calculateNormals()
+    builder.setFileName("cube.stl")
+    return builder.build()
+
+def test_deltaVarint():
+    values = numpy.array([0, 1, 2, 1, 300, 5, -70000, 2 ** 40, 0], dtype = numpy.int64)
+    encoded = _encodeDeltaVarint(values)
+    assert encoded.dtype == numpy.uint8
+    assert numpy.array_equal(_decodeDeltaVarint(encoded), values)
+
+    # Small differences take a single byte.
+    assert len(_encodeDeltaVarint(numpy.arange(1000))) == 1000
+
+def test_roundTripRaw(tmpdir):
+    mesh = createMesh()
+    file_name = str(tmpdir.join("cube.umesh"))
+    with open(file_name, "wb") as f:
+        writeMesh(f, mesh, quantize = False)
+    result = readMesh(file_name)
+
+    assert isinstance(result.getVertices(), numpy.memmap)
+    assert numpy.array_equal(result.getVertices(), mesh.getVertices())
+    assert numpy.array_equal(result.getNormals(), mesh.getNormals())
+    assert numpy.array_equal(result.getIndices(), mesh.getIndices())
+    assert result.getFileName() == "cube.stl"
+    assert result.getConvexHull() is not None
+    assert result._extents is not None  # Restored from the file instead of found again.
+    assert result.getExtents().minimum == mesh.getExtents().minimum
+    assert result.getExtents().maximum == mesh.getExtents().maximum
+
+def test_roundTripQuantized(tmpdir):
+    mesh = createMesh()
+    file_name = str(tmpdir.join("cube.umesh"))
+    with open(file_name, "wb") as f:
+        writeMesh(f, mesh)
+    result = readMesh(file_name)
+
+    # No position moves by more than half a step of the quantization grid.
+    extents = mesh.getExtents()
+    step = numpy.array([extents.width, extents.height, extents.depth]) / QUANTIZATION_MAXIMUM
+    assert numpy.all(numpy.abs(result.getVertices() - mesh.getVertices()) <= step / 2 + 1e-6)
+    assert numpy.allclose(result.getNormals(), mesh.getNormals(), atol = 1e-4)
+    assert numpy.array_equal(result.getIndices(), mesh.getIndices())
+    assert result.getVertices().dtype == mesh.getVertices().dtype
+    assert result.getIndices().dtype == mesh.getIndices().dtype
+
+def test_sharedMeshes(tmpdir):
+    mesh = createMesh()
+    transformation = Matrix()
+    transformation.setByTranslation(Vector(10, 0, 0))
+    file_name = str(tmpdir.join("cubes.umesh"))
+    with open(file_name, "wb") as f:
+        writeMeshes(f, [("first", mesh, None), ("second", mesh, transformation)])
+    nodes = readMeshes(file_name)
+
+    assert [name for name, _, _ in nodes] == ["first", "second"]
+    assert nodes[0][1] is nodes[1][1]
+    assert nodes[0][2] is None
+    assert nodes[1][2] == transformation
+
+def test_invalidFile(tmpdir):
+    file_name = tmpdir.join("invalid.umesh")
+    file_name.write("solid cube")
+    with pytest.raises(MeshFormatError):
+        readMeshes(str(file_name))
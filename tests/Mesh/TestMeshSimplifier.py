@@ -0,0 +1,61 @@
+# Copyright (c) 2018 Ultimaker B.V.
+# Uranium is released under the terms of the LGPLv3 or higher.
+
+import numpy
+
+import UM.Mesh.MeshSimplifier
+from UM.Mesh.MeshData import MeshData
+from UM.Mesh.MeshSimplifier import buildLevelsOfDetail, simplifyByClustering
+
+
+##  Create a sphere with a radius of 10 out of a grid of latitudes and longitudes.
+def createSphere(sections):
+    latitude, longitude = numpy.meshgrid(numpy.linspace(0, numpy.pi, sections + 1), numpy.linspace(0, 2 * numpy.pi, sections + 1), indexing = "ij")
+    vertices = numpy.stack((numpy.sin(latitude) * numpy.cos(longitude), numpy.cos(latitude), numpy.sin(latitude) * numpy.sin(longitude)), axis = -1).reshape((-1, 3)) * 10
+    corners = numpy.arange((sections + 1) * (sections + 1)).reshape((sections + 1, sections + 1))[:-1, :-1].reshape(-1)
+    indices = numpy.concatenate((
+        numpy.stack((corners, corners + sections + 1, corners + 1), axis = -1),
+        numpy.stack((corners + 1, corners + sections + 1, corners + sections + 2), axis = -1)
+    )).astype(numpy.int32)
+    return MeshData(vertices = vertices.astype(numpy.float32), indices = indices)
+
+def test_simplifyByClustering():
+    sphere = createSphere(100)
+
+    simplified = simplifyByClustering(sphere, 2)
+
+    assert 0 < simplified.getFaceCount() < sphere.getFaceCount() / 10
+    assert simplified.getIndices().max() < simplified.getVertexCount()  # Only vertices that are used are kept.
+    radii = numpy.linalg.norm(simplified.getVertices(), axis = 1)
+    assert numpy.all(numpy.abs(radii - 10) < 2 * numpy.sqrt(3))
+    assert numpy.allclose(numpy.linalg.norm(simplified.getNormals(), axis = 1), 1)
+
+def test_simplifyWithoutIndices():
+    sphere = createSphere(50)
+    unindexed = MeshData(vertices = sphere.getVertices()[sphere.getIndices()].reshape((-1, 3)))
+
+    simplified = simplifyByClustering(unindexed, 2)
+
+    assert simplified.hasIndices()
+    assert 0 < simplified.getFaceCount() < sphere.getFaceCount()
+
+def test_buildLevelsOfDetail(monkeypatch):
+    monkeypatch.setattr(UM.Mesh.MeshSimplifier, "LOD_MINIMUM_FACE_COUNT", 1000)
+    monkeypatch.setattr(UM.Mesh.MeshSimplifier, "LOD_SMALLEST_FACE_COUNT", 100)
+    sphere = createSphere(100)
+
+    levels = buildLevelsOfDetail(sphere)
+    sphere.setLevelsOfDetail(levels)
+
+    assert len(levels) >= 2
+    errors = [error for error, _ in levels]
+    face_counts = [level.getFaceCount() for _, level in levels]
+    assert errors == sorted(errors)
+    assert face_counts == sorted(face_counts, reverse = True)
+    assert face_counts[-1] >= 100
+    assert sphere.getLevelOfDetail(errors[0] / 2) is sphere
+    assert sphere.getLevelOfDetail(errors[1]) is levels[1][1]
+    assert sphere.getLevelOfDetail(1000) is levels[-1][1]
+
+def test_smallMeshHasNoLevelsOfDetail():
+    assert buildLevelsOfDetail(createSphere(10)) == []
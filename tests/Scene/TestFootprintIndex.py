@@ -0,0 +1,69 @@
+# Copyright (c) 2018 Ultimaker B.V.
+# Uranium is released under the terms of the LGPLv3 or higher.
+
+import threading
+
+from UM.Math.Vector import Vector
+from UM.Mesh.MeshBuilder import MeshBuilder
+from UM.Scene.FootprintIndex import FootprintIndex
+from UM.Scene.SceneNode import SceneNode
+from UM.Signal import Signal
+
+def createCubeNode(size = 10):
+    builder = MeshBuilder()
+    builder.addCube(size, size, size)
+    node = SceneNode()
+    node.setMeshData(builder.build())
+    return node
+
+##  Delivers signals right away, like an application does on its main thread.
+class DirectSignalDelivery:
+    def getMainThread(self):
+        return threading.current_thread()
+
+    def functionEvent(self, event):
+        event.call()
+
+def test_addAndRemoveNodes():
+    index = FootprintIndex(cell_size = 20)
+    node = createCubeNode()
+    other_node = createCubeNode()
+    other_node.setPosition(Vector(100, 0, 50))
+    empty_node = SceneNode()
+
+    index.addNode(node)
+    index.addNode(other_node)
+    index.addNode(empty_node)
+    assert index.queryPoint(0, 0) == [node]
+    assert index.queryPoint(100, 50) == [other_node]
+    assert index.getFootprint(empty_node) is None  # Tracked, but without footprint.
+    assert len(index.getNodes()) == 3
+
+    index.removeNode(node)
+    assert index.queryPoint(0, 0) == []
+    index.clear()
+    assert index.getNodes() == []
+    assert index.queryRange((-1000, -1000), (1000, 1000)) == []
+
+def test_followsNodes(monkeypatch):
+    monkeypatch.setattr(Signal, "_app", DirectSignalDelivery())
+    index = FootprintIndex(cell_size = 20)
+    node = createCubeNode()
+    index.addNode(node)
+    assert index.queryPoint(0, 0) == [node]
+
+    node.setPosition(Vector(100, 0, 50))
+    assert index.queryPoint(0, 0) == []
+    assert index.queryPoint(100, 50) == [node]
+
+    parent = SceneNode()
+    node.setParent(parent)
+    parent.translate(Vector(0, 0, 100))
+    assert index.queryPoint(100, 150) == [node]
+
+    node.setMeshData(createCubeNode(size = 60).getMeshData())
+    assert index.queryPoint(125, 175) == [node]
+
+    index.removeNode(node)
+    node.setPosition(Vector(0, 0, 0))
+    assert index.queryRange((-1000, -1000), (1000, 1000)) == []
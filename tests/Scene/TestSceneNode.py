@@ -7,6 +7,7 @@ from UM.Math.Vector import Vector
 from UM.Math.Quaternion import Quaternion
 from UM.Math.Matrix import Matrix
 from UM.Math.Float import Float
+from UM.Mesh.MeshBuilder import MeshBuilder
 
 import unittest
 import math
@@ -195,5 +196,22 @@ class SceneNodeTest(unittest.TestCase):
         self.assertEqual(node2.getWorldPosition(), Vector(15,10,10))
         pass
 
+    def test_splitConnectedComponents(self):
+        builder = MeshBuilder()
+        builder.addCube(10, 10, 10)
+        builder.addCube(10, 10, 10, center = Vector(20, 0, 0))
+        node = SceneNode()
+        node.setMeshData(builder.build())
+        node.setName("cubes")
+        node.scale(Vector(2, 2, 2))
+
+        new_nodes = node.splitConnectedComponents()
+
+        self.assertEqual(len(new_nodes), 2)
+        self.assertEqual(new_nodes[1].getName(), "cubes (2)")
+        self.assertEqual(new_nodes[1].getPosition(), Vector(40, 0, 0))
+        self.assertEqual(new_nodes[1].getMeshData().getExtents().center, Vector(0, 0, 0))
+        self.assertEqual(new_nodes[1].getBoundingBox().center, Vector(40, 0, 0))
+
 if __name__ == "__main__":
     unittest.main()
@@ -2,6 +2,7 @@
 # Uranium is released under the terms of the LGPLv3 or higher.
 
 from UM.Math.AxisAlignedBox import AxisAlignedBox
+from UM.Math.AxisAlignedBoxArray import AxisAlignedBoxArray
 from UM.Math.Ray import Ray
 from UM.Math.Vector import Vector
 
@@ -9,8 +10,18 @@ from UM.Math.Vector import Vector
 def intersects(box, ray):
     return box.intersectsRay(ray)
 
+@profile
+def intersectsBatched(boxes, ray):
+    return boxes.intersectsRay(ray)
+
 ray = Ray(Vector(10, 10, 10), Vector(-1, -1, -1))
 box = AxisAlignedBox(10, 10, 10)
 
 for i in range(100000):
     intersects(box, ray)
+
+# The same number of intersections, with batches of 10000 boxes.
+boxes = AxisAlignedBoxArray.fromBoxes([AxisAlignedBox(Vector(-5, -5, -5), Vector(5, 5, 5))] * 10000)
+
+for i in range(10):
+    intersectsBatched(boxes, ray)
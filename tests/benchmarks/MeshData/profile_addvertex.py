@@ -1,13 +1,25 @@
 # Copyright (c) 2015 Ultimaker B.V.
 # Uranium is released under the terms of the LGPLv3 or higher.
 
-from UM.Mesh.MeshData import MeshData
+import numpy
+
+from UM.Mesh.MeshBuilder import MeshBuilder
+
+VERTEX_COUNT = 1000000
 
 @profile
-def addVertex(mesh):
-    mesh.addVertex(0, 1, 0)
+def addVertex(builder):
+    builder.addVertex(0, 1, 0)
+
+@profile
+def addVertices(builder, vertices):
+    builder.addIndexedFaces(vertices, numpy.arange(len(vertices), dtype = numpy.int32).reshape((-1, 3)))
+
+builder = MeshBuilder()
+builder.reserveVertexCount(VERTEX_COUNT)
+for i in range(VERTEX_COUNT):
+    addVertex(builder)
 
-mesh = MeshData()
-mesh.reserveVertexCount(1000000)
-for i in range(1000000):
-    addVertex(mesh)
+builder = MeshBuilder()
+builder.addVertex(0, 0, 0) # Make sure the vertices get copied instead of adopted.
+addVertices(builder, numpy.tile(numpy.array([0, 1, 0], dtype = numpy.float32), (VERTEX_COUNT - VERTEX_COUNT % 3, 1)))
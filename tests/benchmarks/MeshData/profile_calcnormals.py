@@ -1,13 +1,27 @@
 # Copyright (c) 2015 Ultimaker B.V.
 # Uranium is released under the terms of the LGPLv3 or higher.
 
-from UM.Mesh.MeshData import MeshData
+import numpy
+
+from UM.Mesh.MeshBuilder import MeshBuilder
 
 @profile
 def calcNormals(mesh):
+    mesh.calculateNormals(fast = True)
+
+@profile
+def calcIndexedNormals(mesh):
     mesh.calculateNormals()
 
-mesh = MeshData()
+@profile
+def calcSmoothNormals(mesh):
+    mesh.calculateNormals(smooth = True)
+
+@profile
+def calcAngleWeightedNormals(mesh):
+    mesh.calculateNormals(smooth = True, angle_weighted = True)
+
+mesh = MeshBuilder()
 mesh.reserveVertexCount(99999)
 for i in range(33333):
     mesh.addVertex(0, 1, 0)
@@ -16,3 +30,22 @@ for i in range(33333):
 
 for i in range(100):
     calcNormals(mesh)
+
+# A grid of 300x300 vertices, where each vertex is shared by up to six faces.
+size = 300
+x, z = numpy.meshgrid(numpy.arange(size), numpy.arange(size))
+grid_vertices = numpy.stack((x.ravel(), numpy.sin(x.ravel() * 0.1), z.ravel()), axis = 1).astype(numpy.float32)
+corner = (numpy.arange(size - 1)[:, numpy.newaxis] * size + numpy.arange(size - 1)).ravel()
+grid_indices = numpy.concatenate((
+    numpy.stack((corner, corner + size, corner + 1), axis = 1),
+    numpy.stack((corner + 1, corner + size, corner + size + 1), axis = 1)
+)).astype(numpy.int32)
+
+indexed_mesh = MeshBuilder()
+indexed_mesh.addVertices(grid_vertices)
+indexed_mesh.addIndices(grid_indices)
+
+for i in range(100):
+    calcIndexedNormals(indexed_mesh)
+    calcSmoothNormals(indexed_mesh)
+    calcAngleWeightedNormals(indexed_mesh)